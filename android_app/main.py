@@ -13,6 +13,9 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
+from kivy.uix.togglebutton import ToggleButton
+
+from wire import encode_sample
 
 
 @dataclass
@@ -59,6 +62,11 @@ class SimulatorApp(App):
         ip_row.add_widget(self.port_input)
         root.add_widget(ip_row)
 
+        self.binary_toggle = ToggleButton(
+            text="Binary format (compact)", size_hint_y=None, height=40
+        )
+        root.add_widget(self.binary_toggle)
+
         buttons_layout = BoxLayout(orientation="vertical", spacing=6)
         for config in self._simulations():
             button = Button(text=config.name)
@@ -125,15 +133,22 @@ class SimulatorApp(App):
 
     def start_simulation(self, config: SimulationConfig) -> None:
         host, port = self._get_target()
+        binary = self.binary_toggle.state == "down"
 
         def run_loop() -> None:
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             start = time.time()
+            sequence = 0
             while not self.state.should_stop():
                 elapsed = time.time() - start
                 phase = 0 if elapsed < 5 else 1
                 payload = config.builder(phase)
-                sock.sendto(json.dumps(payload).encode("utf-8"), (host, port))
+                if binary:
+                    message = encode_sample(payload, sequence=sequence)
+                else:
+                    message = json.dumps(payload).encode("utf-8")
+                sock.sendto(message, (host, port))
+                sequence += 1
                 Clock.schedule_once(lambda *_: self._update_payload(payload))
                 time.sleep(0.5)
             sock.close()
@@ -0,0 +1,139 @@
+"""Compact binary sample format that `altrus run` auto-detects.
+
+Layout (little-endian): magic 0xA7, version, uint16 field-presence bitmap,
+uint32 device id, uint32 sequence, float64 unix timestamp, then one float32
+per present field in FIELDS order.
+
+`altrus_cli/wire.py` is the only definition of the format. Generated projects
+(`sensors/wire.py`) and the altrus-cli repository's `android_app/` and
+`mobile_web/` carry verbatim copies, the latter kept in sync by the repository's
+`scripts/sync_wire.py`. It must stay standard-library only.
+"""
+
+from __future__ import annotations
+
+import struct
+import time
+
+MAGIC = 0xA7
+VERSION = 1
+
+# Bit N of the presence bitmap marks FIELDS[N]. Append new fields at the end so
+# older decoders keep their bit positions; bump VERSION for any other change.
+FIELDS = (
+    "accel_x",
+    "accel_y",
+    "accel_z",
+    "heart_rate",
+    "body_temperature",
+    "gyro_x",
+    "gyro_y",
+    "gyro_z",
+    "spo2",
+    "eda",
+    "ppg",
+    "ecg",
+    "pressure",
+    "fall_detected",
+)
+
+# magic, version, presence bitmap, device id, sequence, unix timestamp
+_HEADER_FORMAT = "<BBHIId"
+HEADER_SIZE = struct.calcsize(_HEADER_FORMAT)
+_FIELD_BITS = {name: 1 << index for index, name in enumerate(FIELDS)}
+_META_FIELDS = ("device_id", "sequence", "timestamp")
+
+
+class WireError(ValueError):
+    """Raised for binary frames that are truncated or use an unknown version."""
+
+
+class _Layout:
+    __slots__ = ("encoder", "decoder", "names")
+
+    def __init__(self, bitmap: int) -> None:
+        names = [name for name in FIELDS if bitmap & _FIELD_BITS[name]]
+        values = "f" * len(names)
+        self.encoder = struct.Struct(_HEADER_FORMAT + values)
+        # Pad over magic, version and bitmap so unpacked values zip with names.
+        self.decoder = struct.Struct("<4xIId" + values)
+        self.names = _META_FIELDS + tuple(names)
+
+
+_layouts: dict[int, _Layout] = {}
+
+
+def _layout(bitmap: int) -> _Layout:
+    layout = _layouts.get(bitmap)
+    if layout is None:
+        if bitmap >> len(FIELDS):
+            raise WireError(f"unknown fields in presence bitmap {bitmap:#06x}")
+        layout = _layouts[bitmap] = _Layout(bitmap)
+    return layout
+
+
+def is_binary(data: bytes) -> bool:
+    return len(data) > 0 and data[0] == MAGIC
+
+
+def encode_sample(
+    payload: dict,
+    device_id: int = 0,
+    sequence: int = 0,
+    timestamp: float | None = None,
+) -> bytes:
+    """Pack the known sensor fields of `payload` as float32 values."""
+    bitmap = 0
+    for name in FIELDS:
+        if payload.get(name) is not None:
+            bitmap |= _FIELD_BITS[name]
+    layout = _layout(bitmap)
+    return layout.encoder.pack(
+        MAGIC,
+        VERSION,
+        bitmap,
+        device_id & 0xFFFFFFFF,
+        sequence & 0xFFFFFFFF,
+        time.time() if timestamp is None else timestamp,
+        *(float(payload[name]) for name in layout.names[len(_META_FIELDS):]),
+    )
+
+
+def split_binary(data: bytes | memoryview) -> list[memoryview]:
+    """Slice back-to-back binary samples without copying them.
+
+    Anything after the first malformed sample is returned as one trailing
+    slice so `decode_sample` rejects it.
+    """
+    view = memoryview(data)
+    frames = []
+    offset = 0
+    size = len(view)
+    while offset < size:
+        if size - offset < HEADER_SIZE or view[offset] != MAGIC:
+            frames.append(view[offset:])
+            break
+        try:
+            layout = _layout(view[offset + 2] | view[offset + 3] << 8)
+        except WireError:
+            frames.append(view[offset:])
+            break
+        end = offset + layout.decoder.size
+        frames.append(view[offset:end])
+        offset = end
+    return frames
+
+
+def decode_sample(data: bytes) -> dict:
+    """Unpack one binary frame into the same dict shape as a JSON payload.
+
+    Values are float32, so they carry about seven significant digits.
+    """
+    if len(data) < HEADER_SIZE:
+        raise WireError("frame shorter than header")
+    if data[1] != VERSION:
+        raise WireError(f"unsupported wire version {data[1]}")
+    layout = _layout(data[2] | data[3] << 8)
+    if len(data) < layout.decoder.size:
+        raise WireError("frame shorter than its presence bitmap requires")
+    return dict(zip(layout.names, layout.decoder.unpack_from(data)))
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import itertools
 import json
 import socket
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 
+from wire import encode_sample
+
 ROOT = Path(__file__).parent
+_sequence = itertools.count()
 
 
 class RelayHandler(BaseHTTPRequestHandler):
@@ -41,11 +45,25 @@ class RelayHandler(BaseHTTPRequestHandler):
             target_host = data["target_host"]
             target_port = int(data["target_port"])
             payload = data["payload"]
-        except (KeyError, ValueError, json.JSONDecodeError):
+            wire_format = data.get("format", "json")
+            device_id = int(data.get("device_id", 0))
+        except (KeyError, TypeError, ValueError, json.JSONDecodeError):
             self._send_text(400, "Invalid payload.")
             return
 
-        message = json.dumps(payload).encode("utf-8")
+        if wire_format == "binary":
+            if not isinstance(payload, dict):
+                self._send_text(400, "Invalid payload.")
+                return
+            try:
+                message = encode_sample(payload, device_id=device_id, sequence=next(_sequence))
+            except (OverflowError, TypeError, ValueError):
+                self._send_text(
+                    400, "Payload values must be float32-range numbers for binary format."
+                )
+                return
+        else:
+            message = json.dumps(payload).encode("utf-8")
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
             sock.sendto(message, (target_host, target_port))
 
@@ -0,0 +1,38 @@
+"""Copy src/altrus_cli/wire.py to the apps that send the binary sample format.
+
+Run from the repository root:
+
+    python scripts/sync_wire.py           # rewrite android_app/wire.py and mobile_web/wire.py
+    python scripts/sync_wire.py --check   # exit 1 if either copy differs from the source
+
+Generated projects need no syncing: `altrus init` writes the module source itself.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SOURCE = ROOT / "src" / "altrus_cli" / "wire.py"
+COPIES = (ROOT / "android_app" / "wire.py", ROOT / "mobile_web" / "wire.py")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="Only report stale copies")
+    args = parser.parse_args()
+
+    source = SOURCE.read_bytes()
+    stale = [path for path in COPIES if not path.exists() or path.read_bytes() != source]
+    if args.check:
+        for path in stale:
+            print(f"{path.relative_to(ROOT)} differs from {SOURCE.relative_to(ROOT)}")
+        raise SystemExit(1 if stale else 0)
+    for path in stale:
+        path.write_bytes(source)
+        print(f"Updated {path.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
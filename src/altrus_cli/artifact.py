@@ -0,0 +1,229 @@
+"""Versioned model artifacts: a JSON header plus a raw little-endian parameter block.
+
+Layout: magic b"ALTM", uint16 format version, uint16 reserved, uint32 header
+length, then the UTF-8 JSON header. The parameter block starts at the next
+multiple of 64 bytes. The header holds the model `schema` and
+`schema_version`, the SHA-256 `checksum` and `size` of the block, and for
+each parameter its `format` (a struct code such as "d" for float64), `shape`,
+`offset` within the block and optional `labels`.
+
+Parameters come back as read-only memoryviews (`numpy.frombuffer` wraps one
+without copying). Blocks of at least MMAP_MIN_BYTES stay memory-mapped, so
+scanner processes loading the same file share its pages. Smaller blocks are
+copied, which also lets a new file be renamed over the old one on Windows.
+
+Generated projects carry a verbatim copy of this module as `models/artifact.py`,
+so it must stay standard-library only. Convert a legacy pickle with
+`python -m models.artifact models/activity_model.pkl` (or `python -m altrus_cli.artifact`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+MAGIC = b"ALTM"
+FORMAT_VERSION = 1
+ACTIVITY_SCHEMA = "altrus.activity_model"
+ANOMALY_SCHEMA = "altrus.anomaly_model"
+MMAP_MIN_BYTES = 1 << 20
+
+# magic, format version, reserved, header length
+_PREFIX = struct.Struct("<4sHHI")
+_ALIGN = 64
+_FORMATS = "bBhHiIqQfd"
+_FIXED_CODES = {("l", 4): "i", ("l", 8): "q", ("L", 4): "I", ("L", 8): "Q"}
+_SCHEMAS = {
+    "activity_model": ACTIVITY_SCHEMA,
+    "anomaly_model": ANOMALY_SCHEMA,
+}
+
+
+class ArtifactError(ValueError):
+    """Raised for files that are not artifacts, fail the checksum or hold another schema."""
+
+
+class Artifact:
+    """A loaded artifact; `artifact[name]` is a parameter as a read-only memoryview."""
+
+    def __init__(self, header: dict, block) -> None:
+        self.header = header
+        self.schema = header["schema"]
+        self.schema_version = header["schema_version"]
+        self._block = block
+        self._views = {}
+        view = memoryview(block)
+        for name, spec in header["parameters"].items():
+            size = struct.calcsize(spec["format"])
+            count = 1
+            for length in spec["shape"]:
+                count *= length
+            raw = view[spec["offset"] : spec["offset"] + size * count]
+            if sys.byteorder != "little" and size > 1:
+                values = array(spec["format"])
+                values.frombytes(raw)
+                values.byteswap()
+                raw = memoryview(values).cast("B")
+            self._views[name] = raw.cast(spec["format"], spec["shape"])
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self._views[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._views
+
+    def labels(self, name: str) -> list[str] | None:
+        return self.header["parameters"][name].get("labels")
+
+    def as_dict(self, name: str) -> dict[str, float]:
+        """Return a labeled 1-D parameter as {label: value}."""
+        return dict(zip(self.labels(name), self._views[name].tolist()))
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _as_buffer(value) -> tuple[str, list[int], bytes, list[str] | None]:
+    """Return (format, shape, little-endian bytes, labels) for one parameter value."""
+    labels = None
+    if isinstance(value, dict):
+        labels = [str(key) for key in value]
+        value = list(value.values())
+    if isinstance(value, (int, float)):
+        value = [value]
+    if isinstance(value, (list, tuple)):
+        value = array("d", [float(item) for item in value])
+    view = memoryview(value)
+    code = view.format.lstrip("@=<")
+    # "l" is 4 bytes on Windows and 8 elsewhere; store the fixed-size code.
+    code = _FIXED_CODES.get((code, view.itemsize), code)
+    if code not in _FORMATS or view.format[0] in ">!" or not view.c_contiguous:
+        raise ArtifactError(f"unsupported parameter buffer with format {view.format!r}")
+    data = view.tobytes()
+    if sys.byteorder != "little" and view.itemsize > 1 and not view.format.startswith("<"):
+        swapped = array(code)
+        swapped.frombytes(data)
+        swapped.byteswap()
+        data = swapped.tobytes()
+    return code, list(view.shape), data, labels
+
+
+def encode_artifact(schema: str, parameters: dict, schema_version: int = 1) -> bytes:
+    """Return the artifact bytes for `parameters`.
+
+    Values may be lists of numbers (stored as float64), {label: number} dicts,
+    or any buffer such as an `array.array` or a NumPy array.
+    """
+    specs = {}
+    chunks = []
+    size = 0
+    for name, value in parameters.items():
+        code, shape, data, labels = _as_buffer(value)
+        size = _aligned(size)
+        specs[name] = {"format": code, "shape": shape, "offset": size}
+        if labels is not None:
+            specs[name]["labels"] = labels
+        chunks.append((size, data))
+        size += len(data)
+    block = bytearray(size)
+    for offset, data in chunks:
+        block[offset : offset + len(data)] = data
+    header = {
+        "schema": schema,
+        "schema_version": schema_version,
+        "checksum": "sha256:" + hashlib.sha256(block).hexdigest(),
+        "size": size,
+        "parameters": specs,
+    }
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    start = _aligned(_PREFIX.size + len(encoded))
+    prefix = _PREFIX.pack(MAGIC, FORMAT_VERSION, 0, len(encoded)) + encoded
+    return prefix + bytes(start - len(prefix)) + bytes(block)
+
+
+def write_artifact(path: Path, schema: str, parameters: dict, schema_version: int = 1) -> None:
+    """Write `encode_artifact(...)` to `path` through a temporary file and a rename."""
+    temporary = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    temporary.write_bytes(encode_artifact(schema, parameters, schema_version))
+    os.replace(temporary, path)
+
+
+def load_artifact(path: Path, schema: str | None = None, verify: bool = True) -> Artifact:
+    with path.open("rb") as handle:
+        prefix = handle.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ArtifactError(f"{path} is too short to be a model artifact")
+        magic, version, _, header_size = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ArtifactError(f"{path} is not a model artifact")
+        if version != FORMAT_VERSION:
+            raise ArtifactError(f"{path} uses unsupported artifact format {version}")
+        header = json.loads(handle.read(header_size).decode("utf-8"))
+        if schema is not None and header.get("schema") != schema:
+            raise ArtifactError(f"{path} holds {header.get('schema')!r}, expected {schema!r}")
+        start = _aligned(_PREFIX.size + header_size)
+        if header["size"] >= MMAP_MIN_BYTES:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            block = memoryview(mapped)[start : start + header["size"]]
+        else:
+            handle.seek(start)
+            block = handle.read(header["size"])
+    if len(block) != header["size"]:
+        raise ArtifactError(f"{path} is truncated")
+    if verify and "sha256:" + hashlib.sha256(block).hexdigest() != header["checksum"]:
+        raise ArtifactError(f"{path} fails its checksum")
+    return Artifact(header, block)
+
+
+class _DataUnpickler(pickle.Unpickler):
+    """Unpickle plain dicts, lists, strings and numbers only; never import or call anything."""
+
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f"refusing to load {module}.{name} from a model pickle")
+
+
+def convert_pickle(
+    source: Path, target: Path | None = None, schema: str | None = None
+) -> Path:
+    """Write the numeric entries of a legacy `.pkl` model next to it as an artifact."""
+    target = target or source.with_suffix(".altm")
+    schema = schema or _SCHEMAS.get(source.stem, f"altrus.{source.stem}")
+    with source.open("rb") as handle:
+        payload = _DataUnpickler(handle).load()
+    if not isinstance(payload, dict):
+        raise ArtifactError(f"{source} does not hold a dict of parameters")
+    parameters = {
+        name: value
+        for name, value in payload.items()
+        if isinstance(value, (int, float, list, tuple, dict))
+    }
+    write_artifact(target, schema, parameters)
+    return target
+
+
+def load_model_artifact(path: Path, schema: str) -> Artifact | None:
+    """Load `path`, converting a `.pkl` beside it first when that is newer or the only file.
+
+    Returns None when neither file exists.
+    """
+    legacy = path.with_suffix(".pkl")
+    if legacy.exists() and (
+        not path.exists() or legacy.stat().st_mtime_ns > path.stat().st_mtime_ns
+    ):
+        convert_pickle(legacy, path, schema)
+    if not path.exists():
+        return None
+    return load_artifact(path, schema)
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:]:
+        print(convert_pickle(Path(name)))
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from altrus_cli.framing import DEFAULT_MAX_FRAME_SIZE, FrameBuffer, FrameTooLarge
+from altrus_cli.udp import UdpReceiver, set_receive_buffer, split_datagram
+
+try:
+    import resource
+except ImportError:  # Windows has no RLIMIT_NOFILE
+    resource = None
+
+
+@dataclass
+class EngineStats:
+    connections: int = 0
+    total_connections: int = 0
+    bytes_in: int = 0
+    frames: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def format(self, frames_per_sec: float) -> str:
+        return (
+            f"[asyncio] connections={self.connections} "
+            f"(total {self.total_connections}) bytes_in={self.bytes_in} "
+            f"frames={self.frames} frames/sec={frames_per_sec:.1f}"
+        )
+
+
+class _TcpProtocol(asyncio.BufferedProtocol):
+    def __init__(
+        self,
+        handle_payload: Callable[[bytes], None],
+        stats: EngineStats,
+        framing: str,
+        max_frame_size: int,
+        observe_receive: Callable[[float], None] | None = None,
+    ) -> None:
+        self._handle_payload = handle_payload
+        self._stats = stats
+        self._observe_receive = observe_receive
+        self._read_started = 0.0
+        # Start small: thousands of idle connections each hold one buffer.
+        self._frames = FrameBuffer(framing, max_frame_size, initial_size=4096)
+        self._transport: asyncio.Transport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport
+        self._stats.connections += 1
+        self._stats.total_connections += 1
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._stats.connections -= 1
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        # The loop calls get_buffer right before recv_into and buffer_updated
+        # right after it, so the time between the two is the read itself.
+        if self._observe_receive is not None:
+            self._read_started = time.perf_counter()
+        return self._frames.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes: int) -> None:
+        if self._observe_receive is not None:
+            self._observe_receive(time.perf_counter() - self._read_started)
+        self._stats.bytes_in += nbytes
+        self._frames.buffer_updated(nbytes)
+        try:
+            for frame in self._frames.frames():
+                self._stats.frames += 1
+                self._handle_payload(frame)
+        except FrameTooLarge as exc:
+            peer = self._transport.get_extra_info("peername")
+            print(f"Closing connection from {peer[0] if peer else 'unknown'}: {exc}")
+            self._transport.close()
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, handle_payload: Callable[[bytes], None], stats: EngineStats) -> None:
+        self._handle_payload = handle_payload
+        self._stats = stats
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        self._stats.bytes_in += len(data)
+        for frame in split_datagram(data):
+            self._stats.frames += 1
+            self._handle_payload(frame)
+
+    def read_ready(self, receiver: UdpReceiver) -> None:
+        """Reader callback for a timed endpoint; `receiver` times each read."""
+        for datagram in receiver.receive(timeout=0):
+            self.datagram_received(datagram, None)
+
+
+async def _open_udp(
+    host: str,
+    port: int,
+    protocol: _UdpProtocol,
+    reuse_port: bool,
+    observe_receive: Callable[[float], None] | None,
+) -> tuple[socket.socket, Callable[[], None]]:
+    """Bind the UDP endpoint; return its socket and a function that closes it.
+
+    A datagram transport reads before any protocol callback runs, so a timed
+    endpoint reads its own socket from a reader callback instead. Event loops
+    without `add_reader` (the Windows proactor) fall back to the transport,
+    untimed.
+    """
+    loop = asyncio.get_running_loop()
+    if observe_receive is not None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            if reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind((host, port))
+            receiver = UdpReceiver(sock, observe=observe_receive)
+            loop.add_reader(sock, protocol.read_ready, receiver)
+        except NotImplementedError:
+            sock.close()
+        except BaseException:
+            sock.close()
+            raise
+        else:
+
+            def close() -> None:
+                loop.remove_reader(sock)
+                sock.close()
+
+            return sock, close
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: protocol,
+        local_addr=(host, port),
+        reuse_port=reuse_port,
+    )
+    return transport.get_extra_info("socket"), transport.close
+
+
+def _raise_fd_limit() -> None:
+    """Let one process hold thousands of client sockets."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard != resource.RLIM_INFINITY else 65536
+    if soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
+
+async def _report(stats: EngineStats, interval: float) -> None:
+    last_frames = stats.frames
+    last_time = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        rate = (stats.frames - last_frames) / (now - last_time)
+        print(stats.format(rate))
+        last_frames = stats.frames
+        last_time = now
+
+
+async def _serve(
+    host: str,
+    port: int,
+    handle_payload: Callable[[bytes], None],
+    stats: EngineStats,
+    report_interval: float,
+    framing: str,
+    max_frame_size: int,
+    receive_buffer: int | None,
+    reuse_port: bool,
+    observe_receive: Callable[[float], None] | None,
+) -> None:
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        lambda: _TcpProtocol(handle_payload, stats, framing, max_frame_size, observe_receive),
+        host,
+        port,
+        backlog=1024,
+        reuse_port=reuse_port,
+    )
+    udp_socket, close_udp = await _open_udp(
+        host, port, _UdpProtocol(handle_payload, stats), reuse_port, observe_receive
+    )
+    if receive_buffer:
+        set_receive_buffer(udp_socket, receive_buffer)
+    try:
+        async with server:
+            if report_interval > 0:
+                await _report(stats, report_interval)
+            else:
+                await server.serve_forever()
+    finally:
+        close_udp()
+
+
+def run_asyncio_engine(
+    host: str,
+    port: int,
+    handle_payload: Callable[[bytes], None],
+    report_interval: float = 5.0,
+    framing: str = "line",
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    receive_buffer: int | None = None,
+    reuse_port: bool = False,
+    observe_receive: Callable[[float], None] | None = None,
+) -> None:
+    """Serve TCP clients and a UDP endpoint on the same port from one event loop.
+
+    TCP streams are split by `FrameBuffer`, datagrams by `split_datagram`, and
+    every frame goes through `handle_payload`, exactly like the blocking engine.
+    `observe_receive`, if given, is called with the seconds each socket read
+    took.
+    """
+    _raise_fd_limit()
+    stats = EngineStats()
+    try:
+        asyncio.run(
+            _serve(
+                host,
+                port,
+                handle_payload,
+                stats,
+                report_interval,
+                framing,
+                max_frame_size,
+                receive_buffer,
+                reuse_port,
+                observe_receive,
+            )
+        )
+    finally:
+        elapsed = max(time.monotonic() - stats.started_at, 1e-9)
+        print(stats.format(stats.frames / elapsed))
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from altrus_cli.generator import ProjectConfig, generate_project
+from altrus_cli.scaffold import GenerationReport
+
+_KEY = re.compile(r"^([A-Za-z_][\w.-]*):(?:\s+(.*))?$")
+_LIST_FIELDS = ("sensors", "anomalies", "activities", "environments")
+
+
+class ConfigError(ValueError):
+    """Raised for project configs and batch manifests that cannot be used."""
+
+
+def _scalar(text: str) -> object:
+    if text.startswith("[") and text.endswith("]"):
+        return [_scalar(item.strip()) for item in text[1:-1].split(",") if item.strip()]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    return text
+
+
+def _lines(text: str) -> list[tuple[int, int, str]]:
+    """Return (line number, indent, content) for every significant line.
+
+    A `- key: value` list item is split into a bare `-` and the key on its
+    own line at the key's column, so the item parses like any mapping.
+    """
+    lines = []
+    for number, raw in enumerate(text.splitlines(), start=1):
+        content = re.sub(r"\s+#.*$", "", raw).rstrip()
+        if not content.strip() or content.lstrip().startswith("#"):
+            continue
+        indent = len(content) - len(content.lstrip())
+        content = content.strip()
+        while content.startswith("- ") and _KEY.match(content[2:].lstrip()):
+            rest = content[2:].lstrip()
+            lines.append((number, indent, "-"))
+            indent += len(content) - len(rest)
+            content = rest
+        lines.append((number, indent, content))
+    return lines
+
+
+def _block(lines: list, index: int, indent: int) -> tuple[object, int]:
+    if lines[index][2].startswith("-"):
+        items = []
+        while index < len(lines) and lines[index][1] == indent:
+            number, _, content = lines[index]
+            if not content.startswith("-"):
+                raise ConfigError(f"line {number}: expected a `-` list item")
+            rest = content[1:].strip()
+            index += 1
+            if rest:
+                items.append(_scalar(rest))
+            elif index < len(lines) and lines[index][1] > indent:
+                item, index = _block(lines, index, lines[index][1])
+                items.append(item)
+            else:
+                items.append(None)
+        return items, index
+    mapping: dict[str, object] = {}
+    while index < len(lines) and lines[index][1] == indent:
+        number, _, content = lines[index]
+        match = _KEY.match(content)
+        if match is None:
+            raise ConfigError(f"line {number}: expected `key: value`")
+        key, value = match.groups()
+        index += 1
+        if value:
+            mapping[key] = _scalar(value)
+        elif index < len(lines) and (
+            lines[index][1] > indent
+            or lines[index][1] == indent
+            and lines[index][2].startswith("-")
+        ):
+            mapping[key], index = _block(lines, index, lines[index][1])
+        else:
+            mapping[key] = None
+    return mapping, index
+
+
+def parse_yaml(text: str) -> object:
+    """Parse the YAML subset the generator writes: nested mappings and lists of scalars.
+
+    Also accepts `- key: value` list items, `[a, b]` flow lists, quoted
+    strings and `#` comments. Every scalar is returned as a string.
+    """
+    lines = _lines(text)
+    if not lines:
+        return {}
+    value, index = _block(lines, 0, lines[0][1])
+    if index < len(lines):
+        raise ConfigError(f"line {lines[index][0]}: unexpected indentation")
+    return value
+
+
+def _read_mapping(path: Path) -> dict:
+    try:
+        data = parse_yaml(path.read_text(encoding="utf-8"))
+    except OSError as error:
+        raise ConfigError(f"cannot read {path}: {error.strerror}") from None
+    except ConfigError as error:
+        raise ConfigError(f"{path}, {error}") from None
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path} must hold a mapping")
+    return data
+
+
+def _as_list(value: object, key: str, source: str) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ConfigError(f"{source}: `{key}` must be a list of names")
+    return value
+
+
+def project_config(data: dict, source: str, name: str | None = None) -> ProjectConfig:
+    """Build a ProjectConfig from a mapping shaped like `config/wristband_config.yaml`."""
+    project = data.get("project") or {}
+    if not isinstance(project, dict):
+        raise ConfigError(f"{source}: `project` must be a mapping")
+    name = name or data.get("name") or project.get("name")
+    if not name:
+        raise ConfigError(f"{source}: no project name (set `project: name:` or pass --name)")
+    lists = {key: _as_list(data.get(key), key, source) for key in _LIST_FIELDS}
+    if not lists["sensors"]:
+        raise ConfigError(f"{source}: `sensors` lists no sensors")
+    model_choice = data.get("model") or "default"
+    if model_choice not in ("default", "custom"):
+        raise ConfigError(f"{source}: `model` must be `default` or `custom`")
+    rules = data.get("anomaly_rules")
+    if rules is not None and not (
+        isinstance(rules, dict) and all(isinstance(rule, dict) for rule in rules.values())
+    ):
+        raise ConfigError(f"{source}: `anomaly_rules` must map anomalies to `when`/`scale`")
+    return ProjectConfig(
+        name=str(name),
+        model_choice=model_choice,
+        created_at=project.get("created_at"),
+        anomaly_rules=rules,
+        **lists,
+    )
+
+
+def load_project_config(path: Path, name: str | None = None) -> ProjectConfig:
+    return project_config(_read_mapping(path), str(path), name)
+
+
+def load_batch_manifest(path: Path) -> tuple[Path, list[ProjectConfig]]:
+    """Return the output directory and one config per project of a batch manifest.
+
+    ```yaml
+    output: sites            # relative to the manifest; default: its directory
+    defaults:
+      sensors: [accelerometer, heart_rate]
+    projects:
+      - name: site_001
+        from: site_001.yaml  # a wristband_config.yaml-style file
+      - name: site_002
+        anomalies: [fever]
+    ```
+
+    Each project starts from `defaults`, then its `from` file, then its own keys.
+    """
+    data = _read_mapping(path)
+    base = path.parent
+    output = base / str(data.get("output") or ".")
+    defaults = data.get("defaults") or {}
+    projects = data.get("projects")
+    if not isinstance(defaults, dict):
+        raise ConfigError(f"{path}: `defaults` must be a mapping")
+    if not isinstance(projects, list) or not projects:
+        raise ConfigError(f"{path}: `projects` must list at least one project")
+    configs = []
+    for index, entry in enumerate(projects, start=1):
+        source = f"{path}, project {index}"
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        if not isinstance(entry, dict):
+            raise ConfigError(f"{source}: expected a mapping")
+        merged = dict(defaults)
+        if entry.get("from"):
+            merged.update(_read_mapping(base / str(entry["from"])))
+        merged.update({key: value for key, value in entry.items() if key != "from"})
+        configs.append(project_config(merged, source, entry.get("name")))
+    names = [config.name for config in configs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ConfigError(f"{path}: duplicate project names {', '.join(duplicates)}")
+    return output, configs
+
+
+def generate_batch(
+    configs: list[ProjectConfig],
+    output_dir: Path,
+    jobs: int | None = None,
+    force: bool = False,
+) -> list[tuple[str, GenerationReport | None, str | None]]:
+    """Generate every project, `jobs` at a time in worker processes.
+
+    Returns (name, report, error) per project in input order; one project
+    failing with an OSError or a ValueError (such as ConfigError) does not
+    stop the others.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(configs))
+    results = []
+    if jobs <= 1:
+        for config in configs:
+            try:
+                report = generate_project(config, output_dir, force)
+            except (OSError, ValueError) as error:  # ValueError covers ConfigError
+                results.append((config.name, None, str(error)))
+            else:
+                results.append((config.name, report, None))
+        return results
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            (config.name, pool.submit(generate_project, config, output_dir, force))
+            for config in configs
+        ]
+        for name, future in futures:
+            try:
+                results.append((name, future.result(), None))
+            except (OSError, ValueError) as error:
+                results.append((name, None, str(error)))
+    return results
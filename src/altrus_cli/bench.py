@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import signal
+import socket
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from altrus_cli import __version__
+from altrus_cli.framing import encode_frame
+from altrus_cli.runtime import run_scanner
+from altrus_cli.wire import encode_sample
+
+# Warm-up samples carry this device id and stay out of the results.
+PROBE_DEVICE_ID = 0xFFFFFFFF
+_PACE_INTERVAL = 0.005
+_PAYLOAD_POOL_SIZE = 1000
+# After the generators finish, wait this long for the scanner to work through
+# what is still queued; UDP stops waiting once no sample arrived for _SETTLE.
+_DRAIN_TIMEOUT = 60.0
+_SETTLE = 1.0
+
+
+class LatencySink:
+    """Record send-to-prediction latency from the `timestamp` the generator sets."""
+
+    def __init__(self, ready: Any, results: Any, processed: Any) -> None:
+        self._ready = ready
+        self._results = results
+        self._processed = processed
+        self.latencies = array("d")
+        self.first_at = None
+        self.last_at = None
+
+    def write(self, received_at: float, payload: dict, prediction: dict) -> None:
+        if payload.get("device_id") == PROBE_DEVICE_ID:
+            self._ready.set()
+            return
+        sent_at = payload.get("timestamp")
+        if sent_at is None:
+            return
+        if self.first_at is None:
+            self.first_at = received_at
+        self.last_at = received_at
+        self.latencies.append(received_at - sent_at)
+        self._processed.value += 1
+
+    def close(self) -> None:
+        self._results.send((self.latencies.tobytes(), self.first_at, self.last_at))
+        self._results.close()
+
+
+def _scanner_main(ready: Any, results: Any, processed: Any, scanner_options: dict) -> None:
+    sys.stdout = open(os.devnull, "w")
+    run_scanner(extra_sinks=[LatencySink(ready, results, processed)], **scanner_options)
+
+
+def _payload_builders(
+    project_root: Path,
+) -> tuple[Callable[[], dict], list[Callable[[], dict]]]:
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+    from sensors.simulated.simulator import generate_sample
+
+    def normal() -> dict:
+        sample = generate_sample(anomaly_rate=0.0)
+        sample["heart_rate"] = round(60 + abs(sample["accel_x"]) * 20, 2)
+        sample["body_temperature"] = round(36.5 + abs(sample["accel_y"]) * 0.5, 2)
+        return sample
+
+    anomalies = []
+    for path in sorted((project_root / "simulations").glob("run_*.py")):
+        module = importlib.import_module(f"simulations.{path.stem}")
+        build = getattr(module, "_payload", None)
+        if build is not None:
+            anomalies.append(lambda build=build: build(1))
+    return normal, anomalies
+
+
+def _payload_pool(project_root: Path, anomaly_ratio: float, seed: int) -> list[dict]:
+    random.seed(seed)
+    normal, anomalies = _payload_builders(project_root)
+    pool = []
+    for _ in range(_PAYLOAD_POOL_SIZE):
+        if anomalies and random.random() < anomaly_ratio:
+            pool.append(random.choice(anomalies)())
+        else:
+            pool.append(normal())
+    return pool
+
+
+def _encoder(
+    wire_format: str, protocol: str, framing: str
+) -> Callable[[dict, int, int], bytes]:
+    def encode(payload: dict, device_id: int, sequence: int) -> bytes:
+        if wire_format == "binary":
+            message = encode_sample(payload, device_id, sequence, time.time())
+        else:
+            sample = {**payload, "device_id": device_id, "sequence": sequence}
+            sample["timestamp"] = time.time()
+            message = json.dumps(sample).encode("utf-8")
+        if protocol == "tcp":
+            return encode_frame(message, framing)
+        return message
+
+    return encode
+
+
+def _generator_main(
+    index: int,
+    options: dict,
+    start_at: float,
+    sent_counts: Any,
+) -> None:
+    pool = _payload_pool(options["project_root"], options["anomaly_ratio"], seed=index)
+    encode = _encoder(options["wire_format"], options["protocol"], options["framing"])
+    rate = options["rate"] / options["generators"]
+    devices = options["devices"]
+    address = (options["host"], options["port"])
+    if options["protocol"] == "tcp":
+        sock = socket.create_connection(address)
+        send = sock.sendall
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        def send(message: bytes) -> None:
+            try:
+                sock.sendto(message, address)
+            except (BlockingIOError, ConnectionRefusedError):
+                pass
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    deadline = start_at + options["duration"]
+    sent = 0
+    next_tick = time.monotonic()
+    try:
+        while time.time() < deadline:
+            if rate > 0:
+                # Send in small bursts so pacing costs one sleep per tick, not per sample.
+                burst = max(int(rate * _PACE_INTERVAL), 1)
+                next_tick += burst / rate
+            else:
+                burst = 64
+            for _ in range(burst):
+                payload = pool[sent % len(pool)]
+                send(encode(payload, index * devices + sent % devices, sent))
+                sent += 1
+            if rate > 0:
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+    finally:
+        sent_counts[index] = sent
+        sock.close()
+
+
+def _free_port(protocol: str) -> int:
+    kind = socket.SOCK_STREAM if protocol == "tcp" else socket.SOCK_DGRAM
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(options: dict, ready: Any, timeout: float = 15.0) -> None:
+    encode = _encoder(options["wire_format"], options["protocol"], options["framing"])
+    probe = {"heart_rate": 70.0, "accel_x": 0.0, "accel_y": 0.0, "accel_z": 0.0}
+    address = (options["host"], options["port"])
+    deadline = time.monotonic() + timeout
+    while not ready.is_set():
+        if time.monotonic() > deadline:
+            raise RuntimeError("the benchmark scanner did not start in time")
+        try:
+            if options["protocol"] == "tcp":
+                with socket.create_connection(address, timeout=1.0) as sock:
+                    sock.sendall(encode(probe, PROBE_DEVICE_ID, 0))
+            else:
+                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                    sock.sendto(encode(probe, PROBE_DEVICE_ID, 0), address)
+        except OSError:
+            pass
+        ready.wait(0.1)
+
+
+def _drain(processed: Any, sent: int, protocol: str) -> None:
+    """Wait until the scanner has processed every sent sample, bounded by _DRAIN_TIMEOUT.
+
+    TCP delivers everything, so only the timeout ends the wait; lost UDP datagrams
+    never arrive, so UDP also stops once the count has not moved for _SETTLE seconds.
+    """
+    deadline = time.monotonic() + _DRAIN_TIMEOUT
+    last_count = processed.value
+    settle_at = time.monotonic() + _SETTLE
+    while processed.value < sent and time.monotonic() < deadline:
+        time.sleep(0.05)
+        if processed.value != last_count:
+            last_count = processed.value
+            settle_at = time.monotonic() + _SETTLE
+        elif protocol == "udp" and time.monotonic() >= settle_at:
+            return
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def run_bench(
+    project_root: Path,
+    protocol: str = "udp",
+    engine: str = "blocking",
+    framing: str = "line",
+    wire_format: str = "json",
+    rate: float = 0.0,
+    duration: float = 10.0,
+    generators: int = 2,
+    devices: int = 100,
+    anomaly_ratio: float = 0.1,
+    port: int = 0,
+    output: Path | None = None,
+    **pipeline_options: Any,
+) -> dict:
+    """Run a scanner and a multi-process load generator against it on loopback.
+
+    Latency is measured from the moment a generator encodes a sample to the
+    moment the scanner has its prediction, so it includes socket queueing.
+    Returns the result dict, which is also written to `output` as JSON.
+    """
+    if protocol == "tcp" and wire_format == "binary" and framing != "length":
+        raise SystemExit("Binary samples over TCP need --framing length.")
+    host = "127.0.0.1"
+    port = port or _free_port(protocol)
+    options = dict(
+        project_root=project_root,
+        protocol=protocol,
+        host=host,
+        port=port,
+        framing=framing,
+        wire_format=wire_format,
+        rate=rate,
+        duration=duration,
+        generators=generators,
+        devices=devices,
+        anomaly_ratio=anomaly_ratio,
+    )
+
+    context = multiprocessing.get_context()
+    ready = context.Event()
+    results, scanner_results = context.Pipe(duplex=False)
+    processed_count = context.Value("Q", 0, lock=False)
+    scanner = context.Process(
+        target=_scanner_main,
+        args=(
+            ready,
+            scanner_results,
+            processed_count,
+            dict(
+                project_root=project_root,
+                protocol=protocol,
+                host=host,
+                port=port,
+                engine=engine,
+                framing=framing,
+                **pipeline_options,
+            ),
+        ),
+        name="altrus-bench-scanner",
+    )
+    scanner.start()
+    sent_counts = context.Array("Q", generators, lock=False)
+    workers = []
+    try:
+        _wait_until_ready(options, ready)
+        target = "max rate" if rate <= 0 else f"{rate:.0f} samples/sec"
+        print(
+            f"Benchmarking {protocol.upper()} ({wire_format}, {engine} engine) at {target} "
+            f"for {duration:.0f}s with {generators} generator processes..."
+        )
+        start_at = time.time() + 0.5
+        for index in range(generators):
+            worker = context.Process(
+                target=_generator_main,
+                args=(index, options, start_at, sent_counts),
+                name=f"altrus-bench-generator-{index}",
+            )
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+        _drain(processed_count, sum(sent_counts), protocol)
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        if scanner.is_alive():
+            os.kill(scanner.pid, signal.SIGINT)
+    if not results.poll(30.0):
+        scanner.terminate()
+        raise RuntimeError("the benchmark scanner did not report its results")
+    raw_latencies, first_at, last_at = results.recv()
+    scanner.join(10.0)
+
+    latencies = array("d")
+    latencies.frombytes(raw_latencies)
+    ordered = sorted(latencies)
+    sent = sum(sent_counts)
+    processed = len(ordered)
+    if protocol == "udp":
+        loss = {"drop_rate": round((sent - processed) / sent, 6) if sent else 0.0}
+    else:
+        # TCP never drops: missing samples were still queued when the drain timed out.
+        loss = {"unprocessed": sent - processed}
+    active = (last_at - first_at) if first_at is not None and last_at != first_at else 0.0
+    result = {
+        "altrus_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "options": {
+            "protocol": protocol,
+            "engine": engine,
+            "framing": framing,
+            "format": wire_format,
+            "rate": rate,
+            "duration": duration,
+            "generators": generators,
+            "devices": devices,
+            "anomaly_ratio": anomaly_ratio,
+            **{name: value for name, value in pipeline_options.items()},
+        },
+        "sent": sent,
+        "processed": processed,
+        **loss,
+        "send_rate": round(sent / duration, 1),
+        "samples_per_sec": round((processed - 1) / active, 1) if active else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(ordered, 0.50) * 1000, 3),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 3),
+            "p999": round(_percentile(ordered, 0.999) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    }
+    _print_result(result)
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2, default=str) + "\n", encoding="utf-8")
+        print(f"Result written to {output}")
+    return result
+
+
+def _print_result(result: dict) -> None:
+    latency = result["latency_ms"]
+    if "drop_rate" in result:
+        loss = f"drop_rate={result['drop_rate'] * 100:.2f}%"
+    else:
+        loss = f"unprocessed={result['unprocessed']}"
+    print(
+        f"sent={result['sent']} processed={result['processed']} {loss}\n"
+        f"send rate={result['send_rate']:.1f}/s "
+        f"sustained={result['samples_per_sec']:.1f} samples/sec\n"
+        f"latency p50={latency['p50']:.3f}ms p99={latency['p99']:.3f}ms "
+        f"p999={latency['p999']:.3f}ms max={latency['max']:.3f}ms"
+    )
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import ipaddress
+import selectors
+import socket
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from altrus_cli.framing import (
+    DEFAULT_MAX_FRAME_SIZE,
+    FrameBuffer,
+    FrameTooLarge,
+    encode_frame,
+)
+from altrus_cli.runtime import StageTimes, build_pipeline
+from altrus_cli.udp import MAX_DATAGRAM_SIZE, split_datagram
+
+CAPTURE_MAGIC = b"ALTRCAP1"
+PROTOCOL_UDP = 0
+PROTOCOL_TCP = 1
+
+# receive timestamp, payload length, source port, protocol, address length
+_RECORD = struct.Struct("<dIHBB")
+
+
+class CaptureError(ValueError):
+    """Raised for files that are not captures or end in a truncated record."""
+
+
+@dataclass
+class CaptureRecord:
+    timestamp: float
+    protocol: int
+    host: str
+    port: int
+    data: bytes
+
+
+class CaptureWriter:
+    """Append received frames to a capture file.
+
+    UDP records hold whole datagrams; TCP records hold single frames with the
+    framing already removed, so a capture replays the same way whichever
+    framing the senders used.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.records = 0
+        self.bytes = 0
+        self._file = path.open("ab")
+        if self._file.tell() == 0:
+            self._file.write(CAPTURE_MAGIC)
+
+    def write(
+        self,
+        protocol: int,
+        address: tuple,
+        data: bytes,
+        timestamp: float | None = None,
+    ) -> None:
+        packed = ipaddress.ip_address(address[0]).packed
+        self._file.write(
+            _RECORD.pack(
+                time.time() if timestamp is None else timestamp,
+                len(data),
+                address[1],
+                protocol,
+                len(packed),
+            )
+        )
+        self._file.write(packed)
+        self._file.write(data)
+        self.records += 1
+        self.bytes += len(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_capture(path: Path) -> Iterator[CaptureRecord]:
+    with path.open("rb") as handle:
+        if handle.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise CaptureError(f"{path} is not an altrus capture file")
+        yield from _read_records(handle)
+
+
+def _read_records(handle: BinaryIO) -> Iterator[CaptureRecord]:
+    header_size = _RECORD.size
+    while True:
+        header = handle.read(header_size)
+        if not header:
+            return
+        if len(header) < header_size:
+            raise CaptureError("capture ends in a truncated record header")
+        timestamp, length, port, protocol, address_length = _RECORD.unpack(header)
+        body = handle.read(address_length + length)
+        if len(body) < address_length + length:
+            raise CaptureError("capture ends in a truncated record")
+        yield CaptureRecord(
+            timestamp=timestamp,
+            protocol=protocol,
+            host=str(ipaddress.ip_address(body[:address_length])),
+            port=port,
+            data=body[address_length:],
+        )
+
+
+def record_traffic(
+    output: Path,
+    protocol: str,
+    host: str,
+    port: int,
+    framing: str = "line",
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    duration: float | None = None,
+) -> None:
+    """Capture UDP datagrams and/or framed TCP messages until Ctrl+C."""
+    writer = CaptureWriter(output)
+    selector = selectors.DefaultSelector()
+    if protocol in ("udp", "both"):
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp.bind((host, port))
+        udp.setblocking(False)
+        selector.register(udp, selectors.EVENT_READ, "udp")
+    if protocol in ("tcp", "both"):
+        tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        tcp.bind((host, port))
+        tcp.listen(128)
+        tcp.setblocking(False)
+        selector.register(tcp, selectors.EVENT_READ, "accept")
+
+    print(
+        f"Recording {protocol.upper()} traffic on {host}:{port} to {output}. "
+        "Press Ctrl+C to stop."
+    )
+    started = time.monotonic()
+    last_flush = started
+    datagram = bytearray(MAX_DATAGRAM_SIZE)
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            for key, _ in selector.select(timeout=0.5):
+                if key.data == "udp":
+                    size, address = key.fileobj.recvfrom_into(datagram)
+                    writer.write(PROTOCOL_UDP, address, bytes(datagram[:size]))
+                elif key.data == "accept":
+                    conn, address = key.fileobj.accept()
+                    conn.setblocking(False)
+                    selector.register(
+                        conn,
+                        selectors.EVENT_READ,
+                        (address, FrameBuffer(framing, max_frame_size, initial_size=4096)),
+                    )
+                else:
+                    address, frames = key.data
+                    try:
+                        received = frames.recv_into(key.fileobj)
+                    except (BlockingIOError, InterruptedError):
+                        continue
+                    except OSError:
+                        received = 0
+                    try:
+                        for frame in frames.frames():
+                            writer.write(PROTOCOL_TCP, address, bytes(frame))
+                    except FrameTooLarge as exc:
+                        print(f"Closing connection from {address[0]}: {exc}")
+                        received = 0
+                    if not received:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+            now = time.monotonic()
+            if now - last_flush >= 1.0:
+                writer.flush()
+                last_flush = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+        writer.close()
+        print(f"\nRecorded {writer.records} frames ({writer.bytes} bytes) to {output}.")
+
+
+def _pace(records: Iterator[CaptureRecord], speed: float) -> Iterator[CaptureRecord]:
+    """Delay records to their original spacing divided by `speed` (0 = no delay)."""
+    if speed <= 0:
+        yield from records
+        return
+    first = None
+    started = time.monotonic()
+    for record in records:
+        if first is None:
+            first = record.timestamp
+        delay = (record.timestamp - first) / speed - (time.monotonic() - started)
+        if delay > 0:
+            time.sleep(delay)
+        yield record
+
+
+def replay_in_process(
+    capture: Path,
+    project_root: Path,
+    speed: float = 0.0,
+    **pipeline_options,
+) -> None:
+    """Feed a capture straight into the scanner's payload handler, skipping sockets."""
+    stage_times = StageTimes()
+    pipeline = build_pipeline(project_root, stage_times=stage_times, **pipeline_options)
+    handle_payload = pipeline.handle_payload
+    records = 0
+    frames = 0
+    started = time.perf_counter()
+    try:
+        for record in _pace(read_capture(capture), speed):
+            records += 1
+            if record.protocol == PROTOCOL_UDP:
+                for frame in split_datagram(record.data):
+                    frames += 1
+                    handle_payload(frame)
+            else:
+                frames += 1
+                handle_payload(record.data)
+    except KeyboardInterrupt:
+        print("\nReplay stopped.")
+    finally:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        pipeline.close()
+    _print_report(records, frames, elapsed, stage_times)
+    pipeline.print_model_stats()
+
+
+def _print_report(records: int, frames: int, elapsed: float, stage_times: StageTimes) -> None:
+    print(
+        f"Replayed {records} records / {frames} frames in {elapsed:.3f}s "
+        f"({frames / elapsed:.1f} frames/sec)"
+    )
+    stages = {
+        "decode": stage_times.decode,
+        "window": stage_times.window,
+        "inference": stage_times.inference,
+        "sinks": stage_times.sinks,
+    }
+    stages["replay overhead"] = max(elapsed - sum(stages.values()), 0.0)
+    for name, seconds in stages.items():
+        per_frame = seconds / frames * 1e6 if frames else 0.0
+        print(
+            f"  {name:<16} {seconds:8.3f}s  {per_frame:8.2f} us/frame  "
+            f"{seconds / elapsed * 100:5.1f}%"
+        )
+
+
+def replay_over_network(
+    capture: Path,
+    host: str,
+    port: int,
+    speed: float = 0.0,
+    framing: str = "line",
+) -> None:
+    """Send a capture to a running `altrus run` over UDP/TCP.
+
+    Each TCP source address in the capture gets its own connection, and
+    frames are re-framed with `framing`, which must match the scanner's.
+    """
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    connections: dict[tuple[str, int], socket.socket] = {}
+    records = 0
+    sent = 0
+    skipped = 0
+    started = time.perf_counter()
+    try:
+        for record in _pace(read_capture(capture), speed):
+            records += 1
+            if record.protocol == PROTOCOL_UDP:
+                udp.sendto(record.data, (host, port))
+            else:
+                source = (record.host, record.port)
+                if source not in connections:
+                    try:
+                        connections[source] = socket.create_connection((host, port))
+                    except OSError as exc:
+                        print(f"Cannot connect to {host}:{port} over TCP ({exc}).")
+                        connections[source] = None
+                conn = connections[source]
+                if conn is None:
+                    skipped += 1
+                    continue
+                conn.sendall(encode_frame(record.data, framing))
+            sent += len(record.data)
+    except KeyboardInterrupt:
+        print("\nReplay stopped.")
+    finally:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        udp.close()
+        for conn in connections.values():
+            if conn is not None:
+                conn.close()
+    print(
+        f"Sent {records - skipped} records ({sent} bytes) to {host}:{port} in "
+        f"{elapsed:.3f}s ({(records - skipped) / elapsed:.1f} records/sec); "
+        f"skipped {skipped} TCP records. See the scanner's stats for its side."
+    )
+
@@ -1,10 +1,33 @@
 from __future__ import annotations
 
 import argparse
+import os
+import socket
+import time
 from pathlib import Path
 
-from altrus_cli.generator import ProjectConfig, create_project
-from altrus_cli.runtime import run_scanner
+from altrus_cli.batch import (
+    ConfigError,
+    generate_batch,
+    load_batch_manifest,
+    load_project_config,
+)
+from altrus_cli.bench import run_bench
+from altrus_cli.capture import record_traffic, replay_in_process, replay_over_network
+from altrus_cli.decoder import DECODER_BACKENDS
+from altrus_cli.framing import DEFAULT_MAX_FRAME_SIZE, FRAMING_MODES
+from altrus_cli.generator import ProjectConfig, generate_project
+from altrus_cli.profiling import DEFAULT_PROFILE_SECONDS, PROFILERS
+from altrus_cli.runtime import load_environment_profile, run_scanner
+from altrus_cli.sinks import (
+    DEFAULT_KEEP_FILES,
+    DEFAULT_MAX_FILE_AGE,
+    DEFAULT_MAX_FILE_BYTES,
+    SINK_FORMATS,
+)
+from altrus_cli.udp import DEFAULT_BATCH_SIZE
+from altrus_cli.windows import DEFAULT_WINDOW_SIZE, WINDOW_DTYPES
+from altrus_cli.workers import run_workers
 
 PREDEFINED_SENSORS = [
     "accelerometer",
@@ -109,6 +132,68 @@ def _prompt_choice(title: str, options: list[str]) -> str:
         print("Please enter a valid selection.")
 
 
+def _add_pipeline_arguments(
+    parser: argparse.ArgumentParser,
+    default_sink: str = "ndjson",
+    default_interval: float | None = 0.5,
+) -> None:
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=default_interval,
+        help="Minimum seconds between terminal updates",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW_SIZE,
+        help="Samples per device in the sliding inference window (0 disables it)",
+    )
+    parser.add_argument(
+        "--decoder",
+        choices=[*DECODER_BACKENDS, "generic"],
+        default="auto",
+        help="JSON decoding into schema records (auto prefers orjson) or generic dicts",
+    )
+    parser.add_argument(
+        "--sink",
+        choices=SINK_FORMATS,
+        default=default_sink,
+        help="Persist every prediction to the project's data/ directory in this format",
+    )
+    parser.add_argument(
+        "--sink-max-bytes",
+        type=int,
+        default=DEFAULT_MAX_FILE_BYTES,
+        help="Start a new prediction file once the current one reaches this size",
+    )
+    parser.add_argument(
+        "--sink-max-age",
+        type=float,
+        default=DEFAULT_MAX_FILE_AGE,
+        help="Start a new prediction file after this many seconds",
+    )
+    parser.add_argument(
+        "--sink-keep",
+        type=int,
+        default=DEFAULT_KEEP_FILES,
+        help="Number of prediction files each scanner process keeps",
+    )
+
+
+def _pipeline_options(args: argparse.Namespace) -> dict:
+    return dict(
+        output_interval=args.interval,
+        stats_interval=args.stats_interval,
+        window_size=args.window,
+        decoder=args.decoder,
+        sink_format=args.sink,
+        sink_max_bytes=args.sink_max_bytes,
+        sink_max_age=args.sink_max_age,
+        sink_keep=args.sink_keep,
+    )
+
+
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Generate a wristband sensor fusion project scaffold.",
@@ -122,6 +207,27 @@ def _parse_args() -> argparse.Namespace:
         help="Directory to create the project in",
         default=str(Path.cwd()),
     )
+    source = init_parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--from",
+        dest="from_config",
+        help="Generate without prompts from a wristband_config.yaml-style file",
+    )
+    source.add_argument(
+        "--batch",
+        help="Generate every project listed in a batch manifest (YAML)",
+    )
+    init_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for --batch (default: one per CPU)",
+    )
+    init_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Overwrite generated files that were edited since they were generated",
+    )
 
     run_parser = subparsers.add_parser("run", help="Run the live scanner in a project")
     run_parser.add_argument(
@@ -141,27 +247,261 @@ def _parse_args() -> argparse.Namespace:
         default=5055,
         help="Port to bind for incoming sensor data",
     )
+    _add_pipeline_arguments(run_parser, default_interval=None)
     run_parser.add_argument(
-        "--interval",
+        "--engine",
+        choices=["blocking", "asyncio"],
+        default="blocking",
+        help="Scanner engine; asyncio serves many TCP clients and UDP on one port",
+    )
+    run_parser.add_argument(
+        "--stats-interval",
         type=float,
-        default=0.5,
-        help="Minimum seconds between terminal updates",
+        default=5.0,
+        help="Seconds between connection/throughput reports (0 disables)",
+    )
+    run_parser.add_argument(
+        "--framing",
+        choices=FRAMING_MODES,
+        default="line",
+        help="TCP framing: newline-delimited JSON or 4-byte big-endian length prefix",
+    )
+    run_parser.add_argument(
+        "--max-frame-size",
+        type=int,
+        default=DEFAULT_MAX_FRAME_SIZE,
+        help="Close TCP connections that send a frame larger than this many bytes",
+    )
+    run_parser.add_argument(
+        "--rcvbuf",
+        type=int,
+        help="UDP socket receive buffer (SO_RCVBUF) in bytes; defaults to the OS setting",
+    )
+    run_parser.add_argument(
+        "--udp-batch",
+        type=int,
+        help=f"Datagrams per receive call (recvmmsg on Linux; default {DEFAULT_BATCH_SIZE})",
+    )
+    run_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Scanner processes sharing the port via SO_REUSEPORT (Linux/BSD; default 1)",
+    )
+    run_parser.add_argument(
+        "--window-dtype",
+        choices=WINDOW_DTYPES,
+        help="Storage for sliding-window values (default float64)",
+    )
+    run_parser.add_argument(
+        "--state-memory-mb",
+        type=int,
+        help="Cap on each scanner's sliding-window state; quiet devices are dropped first",
+    )
+    run_parser.add_argument(
+        "--profile-env",
+        metavar="ENVIRONMENT",
+        help=(
+            "Runtime profile: raspberry_pi, linux, windows or environments/<name>.yaml "
+            "(default: the config's first environment; `none` disables profiles)"
+        ),
+    )
+    run_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this port (worker N of --workers uses port + N)",
+    )
+    run_parser.add_argument(
+        "--metrics-host",
+        default="127.0.0.1",
+        help="Host/IP the metrics endpoint binds to",
+    )
+    run_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the receive loop from startup (SIGUSR1 toggles it at any time)",
+    )
+    run_parser.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default="cprofile",
+        help="cProfile (.pstats) or the low-overhead stack sampler (.collapsed)",
+    )
+    run_parser.add_argument(
+        "--profile-seconds",
+        type=float,
+        default=DEFAULT_PROFILE_SECONDS,
+        help="Stop each profile after this many seconds (0 = until toggled off)",
+    )
+    run_parser.add_argument(
+        "--trace-memory",
+        type=float,
+        nargs="?",
+        const=0.0,
+        metavar="SECONDS",
+        help="Trace allocations from startup; snapshot every SECONDS if given",
     )
 
-    return parser.parse_args()
+    record_parser = subparsers.add_parser(
+        "record", help="Capture raw sensor traffic to a file for later replay"
+    )
+    record_parser.add_argument(
+        "--protocol",
+        choices=["udp", "tcp", "both"],
+        default="both",
+        help="Traffic to capture",
+    )
+    record_parser.add_argument("--host", default="0.0.0.0", help="Host/IP to bind")
+    record_parser.add_argument("--port", type=int, default=5055, help="Port to bind")
+    record_parser.add_argument(
+        "--framing",
+        choices=FRAMING_MODES,
+        default="line",
+        help="TCP framing used by the senders",
+    )
+    record_parser.add_argument(
+        "--max-frame-size",
+        type=int,
+        default=DEFAULT_MAX_FRAME_SIZE,
+        help="Close TCP connections that send a frame larger than this many bytes",
+    )
+    record_parser.add_argument(
+        "--output",
+        help="Capture file to append to (default: data/capture-<time>.altrcap)",
+    )
+    record_parser.add_argument(
+        "--duration",
+        type=float,
+        help="Stop after this many seconds instead of waiting for Ctrl+C",
+    )
 
+    replay_parser = subparsers.add_parser(
+        "replay", help="Feed a capture back into the scanner and report timings"
+    )
+    replay_parser.add_argument("capture", help="Capture file written by `altrus record`")
+    replay_parser.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="Playback speed: 1 = recorded pace, N = N times faster, 0 = as fast as possible",
+    )
+    replay_parser.add_argument(
+        "--mode",
+        choices=["in-process", "network"],
+        default="in-process",
+        help="Call the payload handler directly, or send to a running `altrus run`",
+    )
+    replay_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Scanner host for --mode network",
+    )
+    replay_parser.add_argument(
+        "--port",
+        type=int,
+        default=5055,
+        help="Scanner port for --mode network",
+    )
+    replay_parser.add_argument(
+        "--framing",
+        choices=FRAMING_MODES,
+        default="line",
+        help="TCP framing for --mode network; must match the scanner's",
+    )
+    replay_parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between prediction sink reports (0 disables)",
+    )
+    _add_pipeline_arguments(replay_parser)
 
-def _run_init(args: argparse.Namespace) -> None:
-    name = args.name or _prompt_text("Project name", default="wristband_project")
-    output_dir = Path(args.output).expanduser().resolve()
+    bench_parser = subparsers.add_parser(
+        "bench", help="Load-test a local scanner with simulated wristbands"
+    )
+    bench_parser.add_argument(
+        "--protocol",
+        choices=["udp", "tcp"],
+        default="udp",
+        help="Network protocol the generators send over",
+    )
+    bench_parser.add_argument(
+        "--engine",
+        choices=["blocking", "asyncio"],
+        default="blocking",
+        help="Scanner engine under test",
+    )
+    bench_parser.add_argument(
+        "--framing",
+        choices=FRAMING_MODES,
+        default="line",
+        help="TCP framing used by the generators and the scanner",
+    )
+    bench_parser.add_argument(
+        "--format",
+        choices=["json", "binary"],
+        default="json",
+        help="Sample encoding; binary over TCP needs --framing length",
+    )
+    bench_parser.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="Target samples/sec across all generators (0 = as fast as possible)",
+    )
+    bench_parser.add_argument(
+        "--duration",
+        type=float,
+        default=10.0,
+        help="Seconds to send for",
+    )
+    bench_parser.add_argument(
+        "--generators",
+        type=int,
+        default=2,
+        help="Load generator processes",
+    )
+    bench_parser.add_argument(
+        "--devices",
+        type=int,
+        default=100,
+        help="Simulated wristbands per generator",
+    )
+    bench_parser.add_argument(
+        "--anomaly-ratio",
+        type=float,
+        default=0.1,
+        help="Share of samples built by the project's anomaly simulations",
+    )
+    bench_parser.add_argument(
+        "--port",
+        type=int,
+        default=0,
+        help="Loopback port for the scanner (0 picks a free one)",
+    )
+    bench_parser.add_argument(
+        "--json",
+        help="Write the result to this JSON file for diffing between runs",
+    )
+    bench_parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between the scanner's own reports (its output is discarded)",
+    )
+    _add_pipeline_arguments(bench_parser, default_sink="none")
 
+    return parser.parse_args()
+
+
+def _prompt_config(name: str | None) -> ProjectConfig:
+    name = name or _prompt_text("Project name", default="wristband_project")
     sensors = _prompt_multi_select("Select wristband sensors", PREDEFINED_SENSORS)
     anomalies = _prompt_multi_select("Select anomalies to detect", PREDEFINED_ANOMALIES)
     activities = _prompt_multi_select("Select activities to classify", PREDEFINED_ACTIVITIES)
     environments = _prompt_multi_select("Select target environments", ENVIRONMENTS)
     model_choice = _prompt_choice("Select model setup", MODEL_CHOICES)
 
-    config = ProjectConfig(
+    return ProjectConfig(
         name=name,
         sensors=sensors,
         anomalies=anomalies,
@@ -170,8 +510,80 @@ def _run_init(args: argparse.Namespace) -> None:
         model_choice=model_choice,
     )
 
-    project_path = create_project(config, output_dir)
-    print(f"\nProject created at: {project_path}")
+
+def _run_batch(args: argparse.Namespace) -> None:
+    if args.jobs is not None and args.jobs < 1:
+        raise SystemExit("--jobs must be at least 1")
+    try:
+        output_dir, configs = load_batch_manifest(Path(args.batch).expanduser())
+    except ConfigError as error:
+        raise SystemExit(str(error)) from None
+    failed = 0
+    for name, report, error in generate_batch(configs, output_dir, args.jobs, args.force):
+        if report is None:
+            failed += 1
+            print(f"{name}: failed: {error}")
+        else:
+            print(f"{name}: {report.summary()}")
+    print(f"\n{len(configs) - failed} of {len(configs)} projects generated in {output_dir}")
+    if failed:
+        raise SystemExit(1)
+
+
+def _run_init(args: argparse.Namespace) -> None:
+    if args.batch:
+        _run_batch(args)
+        return
+    output_dir = Path(args.output).expanduser().resolve()
+    if args.from_config:
+        try:
+            config = load_project_config(Path(args.from_config).expanduser(), args.name)
+        except ConfigError as error:
+            raise SystemExit(str(error)) from None
+    else:
+        config = _prompt_config(args.name)
+
+    report = generate_project(config, output_dir, force=args.force)
+    print(f"\nProject created at: {report.project_dir}")
+    print(report.summary())
+    if report.skipped:
+        print("Edited files were kept; pass --force to overwrite them.")
+
+
+def _apply_runtime_profile(args: argparse.Namespace, project_root: Path) -> None:
+    """Fill the run options left unset on the command line from the environment profile."""
+    profile = None
+    if args.profile_env != "none":
+        try:
+            selected = load_environment_profile(project_root, args.profile_env)
+        except ValueError as error:
+            raise SystemExit(str(error)) from None
+        if selected is not None:
+            environment, profile = selected
+            print(f"Using the {environment} runtime profile.")
+    defaults = {
+        "interval": 0.5,
+        "rcvbuf": None,
+        "udp_batch": DEFAULT_BATCH_SIZE,
+        "workers": 1,
+        "window_dtype": "float64",
+        "state_memory_mb": None,
+    }
+    if profile is not None:
+        defaults.update(
+            interval=profile.output_interval,
+            rcvbuf=profile.receive_buffer or None,
+            udp_batch=profile.udp_batch,
+            workers=profile.workers or os.cpu_count() or 1,
+            window_dtype=profile.window_dtype,
+            state_memory_mb=profile.state_memory_mb,
+        )
+        if not hasattr(socket, "SO_REUSEPORT"):
+            # --workers cannot run here; a profile for another platform runs one scanner.
+            defaults["workers"] = 1
+    for option, value in defaults.items():
+        if getattr(args, option) is None:
+            setattr(args, option, value)
 
 
 def main() -> None:
@@ -180,16 +592,81 @@ def main() -> None:
         _run_init(args)
     if args.command == "run":
         project_root = Path.cwd()
+        _apply_runtime_profile(args, project_root)
         print(
             "Starting live scanner. "
             "Send JSON sensor payloads over the selected protocol."
         )
-        run_scanner(
+        scanner_options = dict(
             project_root=project_root,
             protocol=args.protocol,
             host=args.host,
             port=args.port,
-            output_interval=args.interval,
+            engine=args.engine,
+            framing=args.framing,
+            max_frame_size=args.max_frame_size,
+            receive_buffer=args.rcvbuf,
+            udp_batch=args.udp_batch,
+            metrics_host=args.metrics_host,
+            metrics_port=args.metrics_port,
+            profile=args.profile,
+            profiler=args.profiler,
+            profile_seconds=args.profile_seconds,
+            trace_memory=args.trace_memory,
+            window_dtype=args.window_dtype,
+            state_memory=None if args.state_memory_mb is None else args.state_memory_mb << 20,
+            **_pipeline_options(args),
+        )
+        if args.workers > 1:
+            run_workers(args.workers, **scanner_options)
+        else:
+            run_scanner(**scanner_options)
+    if args.command == "record":
+        output = args.output
+        if output is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            output = Path.cwd() / "data" / f"capture-{stamp}.altrcap"
+        record_traffic(
+            Path(output),
+            protocol=args.protocol,
+            host=args.host,
+            port=args.port,
+            framing=args.framing,
+            max_frame_size=args.max_frame_size,
+            duration=args.duration,
+        )
+    if args.command == "replay":
+        capture = Path(args.capture)
+        if args.mode == "network":
+            replay_over_network(
+                capture,
+                host=args.host,
+                port=args.port,
+                speed=args.speed,
+                framing=args.framing,
+            )
+        else:
+            replay_in_process(
+                capture,
+                Path.cwd(),
+                speed=args.speed,
+                **_pipeline_options(args),
+            )
+    if args.command == "bench":
+        run_bench(
+            Path.cwd(),
+            protocol=args.protocol,
+            engine=args.engine,
+            framing=args.framing,
+            wire_format=args.format,
+            rate=args.rate,
+            duration=args.duration,
+            generators=args.generators,
+            devices=args.devices,
+            anomaly_ratio=args.anomaly_ratio,
+            port=args.port,
+            output=Path(args.json) if args.json else None,
+            **_pipeline_options(args),
         )
 
 
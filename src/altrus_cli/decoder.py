@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+from json.scanner import make_scanner
+from typing import Iterable
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+from altrus_cli.wire import FIELDS
+
+# Payload fields each predefined sensor contributes. Other (custom) sensors
+# contribute a field with their own name.
+SENSOR_FIELDS = {
+    "accelerometer": ("accel_x", "accel_y", "accel_z"),
+    "gyroscope": ("gyro_x", "gyro_y", "gyro_z"),
+    "heart_rate": ("heart_rate",),
+    "body_temperature": ("body_temperature",),
+    "fall_detection_sensor": ("fall_detected",),
+    "ppg": ("ppg",),
+    "ecg": ("ecg",),
+    "spo2": ("spo2",),
+    "eda": ("eda",),
+    "barometer": ("pressure",),
+}
+META_FIELDS = ("device_id", "sequence", "timestamp")
+DECODER_BACKENDS = ("auto", "orjson", "json")
+
+# Exact classes, so bool (a subclass of int) is not taken for a reading.
+_NUMBER_TYPES = (int, float)
+_OPEN_BRACE = ord("{")
+_WHITESPACE = b" \t\r\n"
+_scan_once = make_scanner(json.JSONDecoder())
+
+
+def schema_fields(sensors: Iterable[str]) -> tuple[str, ...]:
+    """Return the payload fields to keep for the configured `sensors`.
+
+    An empty sensor list keeps every field the binary wire format knows.
+    """
+    fields = list(META_FIELDS)
+    for sensor in sensors:
+        for name in SENSOR_FIELDS.get(sensor, (sensor,)):
+            if name not in fields:
+                fields.append(name)
+    if len(fields) == len(META_FIELDS):
+        fields.extend(FIELDS)
+    return tuple(fields)
+
+
+class PayloadDecoder:
+    """Decode JSON frames down to the fields of the configured sensor schema.
+
+    Frames that do not start with "{" are rejected before any parsing, and
+    fields outside the schema are dropped, as are readings that are not
+    numbers (null, strings, booleans, lists); `device_id` may be any value.
+    `orjson` is used when installed; otherwise the stdlib scanner is called
+    directly, skipping the generic `json.loads` wrapper. Payloads stay plain
+    dicts: models read them with `payload.get(...)`, which a slot or tuple
+    record can only serve through a Python-level method several times slower
+    than `dict.get`.
+    """
+
+    def __init__(self, sensors: Iterable[str] = (), backend: str = "auto") -> None:
+        if backend not in DECODER_BACKENDS:
+            raise ValueError(f"unknown decoder backend {backend!r}")
+        if backend == "orjson" and orjson is None:
+            raise ValueError("the orjson backend needs `pip install orjson`")
+        if backend == "auto":
+            backend = "json" if orjson is None else "orjson"
+        self.backend = backend
+        self.fields = schema_fields(sensors)
+        self._field_set = frozenset(self.fields)
+        self._parse = orjson.loads if backend == "orjson" else _parse_json
+
+    def decode(self, raw: bytes) -> dict | None:
+        """Return the numeric schema fields of `raw`, or None when it is not a JSON object."""
+        if not raw or raw[0] != _OPEN_BRACE:
+            if not raw or raw[0] not in _WHITESPACE:
+                return None
+            raw = bytes(raw).strip()
+            if not raw or raw[0] != _OPEN_BRACE:
+                return None
+        try:
+            data = self._parse(raw)
+        except ValueError:
+            return None
+        if data.__class__ is not dict:
+            return None
+        field_set = self._field_set
+        for name, value in data.items():
+            if name not in field_set or (
+                value.__class__ not in _NUMBER_TYPES and name != "device_id"
+            ):
+                break
+        else:
+            return data
+        return {
+            name: value
+            for name, value in data.items()
+            if name in field_set
+            and (value.__class__ in _NUMBER_TYPES or name == "device_id")
+        }
+
+
+def _parse_json(raw: bytes) -> object:
+    text = str(raw, "utf-8")
+    try:
+        data, end = _scan_once(text, 0)
+    except StopIteration:
+        raise ValueError("not a JSON document") from None
+    if end != len(text) and text[end:].strip():
+        raise ValueError("trailing data after JSON object")
+    return data
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+from altrus_cli.windows import WINDOW_DTYPES
+
+
+@dataclass
+class RuntimeProfile:
+    """`altrus run` tuning for one target environment.
+
+    `receive_buffer` 0 keeps the OS default and `workers` 0 starts one
+    scanner process per CPU. `state_memory_mb` caps the sliding-window state
+    of each scanner process; the least recently seen devices are dropped
+    once it is reached.
+    """
+
+    receive_buffer: int
+    workers: int
+    udp_batch: int
+    output_interval: float
+    window_dtype: str
+    state_memory_mb: int
+
+
+ENVIRONMENT_PROFILES = {
+    # 1 GB, 4-core ARM board: three scanners leave a core for the kernel's
+    # network processing and the sink thread, float32 windows and a 48 MB cap
+    # per scanner keep the whole runtime under ~300 MB, and fewer terminal
+    # updates spare the slow console.
+    "raspberry_pi": RuntimeProfile(
+        receive_buffer=1 << 20,
+        workers=3,
+        udp_batch=32,
+        output_interval=1.0,
+        window_dtype="float32",
+        state_memory_mb=48,
+    ),
+    # One scanner, as without a profile: more processes mean more sink files
+    # and metrics ports, so set `workers` (0 = one per CPU) to opt in.
+    "linux": RuntimeProfile(
+        receive_buffer=8 << 20,
+        workers=1,
+        udp_batch=64,
+        output_interval=0.5,
+        window_dtype="float64",
+        state_memory_mb=512,
+    ),
+    # No SO_REUSEPORT or recvmmsg on Windows: one scanner reading one
+    # datagram per call, with a larger buffer to ride out bursts.
+    "windows": RuntimeProfile(
+        receive_buffer=4 << 20,
+        workers=1,
+        udp_batch=1,
+        output_interval=0.5,
+        window_dtype="float64",
+        state_memory_mb=256,
+    ),
+}
+
+_COMMENTS = {
+    "receive_buffer": "UDP SO_RCVBUF in bytes (0 = OS default; capped by net.core.rmem_max)",
+    "workers": "scanner processes sharing the port (0 = one per CPU)",
+    "udp_batch": "datagrams read per receive call",
+    "output_interval": "minimum seconds between terminal updates",
+    "window_dtype": "sliding-window values: float32 or float64",
+    "state_memory_mb": "per-scanner cap on sliding-window state",
+}
+
+
+def profile_path(project_root: Path, environment: str) -> Path:
+    return project_root / "environments" / f"{environment}.yaml"
+
+
+def profile_yaml(environment: str, profile: RuntimeProfile) -> str:
+    lines = [
+        f"# Runtime profile for {environment}; `altrus run` loads the first environment",
+        "# in config/wristband_config.yaml (`--profile-env NAME` picks another).",
+    ]
+    for item in fields(profile):
+        lines.append(f"{item.name}: {getattr(profile, item.name)}  # {_COMMENTS[item.name]}")
+    return "\n".join(lines) + "\n"
+
+
+def load_profile(path: Path, base: RuntimeProfile | None = None) -> RuntimeProfile:
+    """Read a profile file; keys it leaves out come from `base` (the linux profile)."""
+    # Imported here: batch imports the generator, which imports this module.
+    from altrus_cli.batch import ConfigError, parse_yaml
+
+    try:
+        data = parse_yaml(path.read_text(encoding="utf-8"))
+    except ConfigError as error:
+        raise ConfigError(f"{path}, {error}") from None
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path} must hold `setting: value` lines")
+    values = dict(vars(base or ENVIRONMENT_PROFILES["linux"]))
+    types = {item.name: type(values[item.name]) for item in fields(RuntimeProfile)}
+    for key, raw in data.items():
+        if key not in types:
+            raise ConfigError(f"{path}: unknown setting {key!r}")
+        try:
+            values[key] = types[key](raw)
+        except (TypeError, ValueError):
+            raise ConfigError(f"{path}: invalid {key} {raw!r}") from None
+    profile = RuntimeProfile(**values)
+    if profile.window_dtype not in WINDOW_DTYPES:
+        raise ConfigError(f"{path}: window_dtype must be one of {', '.join(WINDOW_DTYPES)}")
+    return profile
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import socket
+import struct
+from typing import Iterator
+
+FRAMING_MODES = ["line", "length"]
+DEFAULT_MAX_FRAME_SIZE = 64 * 1024
+
+_LENGTH_PREFIX = struct.Struct(">I")
+_MIN_READ = 4096
+
+
+class FrameTooLarge(ValueError):
+    """Raised when a peer sends a frame above the configured size limit."""
+
+
+def encode_frame(message: bytes, mode: str = "line") -> bytes:
+    if mode == "length":
+        return _LENGTH_PREFIX.pack(len(message)) + message
+    return message + b"\n"
+
+
+class FrameBuffer:
+    """Receive buffer that splits a byte stream into frames in linear time.
+
+    Data is read straight into a preallocated `bytearray` (via `recv_into` or
+    the asyncio `BufferedProtocol` hooks). Consumed bytes are skipped by moving
+    a start offset instead of re-slicing the buffer, newline scans resume where
+    the previous scan stopped, and unconsumed bytes are only moved to the front
+    when the tail runs out of room. `mode` is "line" for newline-delimited
+    frames or "length" for frames prefixed with a 4-byte big-endian size.
+    """
+
+    def __init__(
+        self,
+        mode: str = "line",
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+        initial_size: int = 16 * 1024,
+    ) -> None:
+        if mode not in FRAMING_MODES:
+            raise ValueError(f"Unknown framing mode: {mode}")
+        self.mode = mode
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray(initial_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+        self._needed = 0
+
+    @property
+    def pending(self) -> int:
+        return self._end - self._start
+
+    def get_buffer(self, size_hint: int = -1) -> memoryview:
+        """Return writable free space at the tail of the buffer."""
+        wanted = max(size_hint, self._needed - self.pending, _MIN_READ)
+        if len(self._buffer) - self._end < wanted:
+            self._make_room(wanted)
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._end += nbytes
+
+    def recv_into(self, sock: socket.socket) -> int:
+        received = sock.recv_into(self.get_buffer())
+        self._end += received
+        return received
+
+    def feed(self, data: bytes) -> None:
+        self.get_buffer(len(data))[: len(data)] = data
+        self._end += len(data)
+
+    def frames(self) -> Iterator[bytes]:
+        if self.mode == "length":
+            yield from self._length_frames()
+        else:
+            yield from self._line_frames()
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+
+    def _line_frames(self) -> Iterator[bytes]:
+        buffer = self._buffer
+        while True:
+            newline = buffer.find(b"\n", self._scan, self._end)
+            if newline < 0:
+                self._scan = self._end
+                if self.pending > self.max_frame_size:
+                    raise FrameTooLarge(
+                        f"line exceeds {self.max_frame_size} bytes without a newline"
+                    )
+                return
+            if newline - self._start > self.max_frame_size:
+                raise FrameTooLarge(f"line exceeds {self.max_frame_size} bytes")
+            frame = bytes(self._view[self._start:newline])
+            self._start = self._scan = newline + 1
+            yield frame
+
+    def _length_frames(self) -> Iterator[bytes]:
+        while self.pending >= _LENGTH_PREFIX.size:
+            (size,) = _LENGTH_PREFIX.unpack_from(self._buffer, self._start)
+            if size > self.max_frame_size:
+                raise FrameTooLarge(
+                    f"frame of {size} bytes exceeds {self.max_frame_size} bytes"
+                )
+            total = _LENGTH_PREFIX.size + size
+            if self.pending < total:
+                self._needed = total
+                return
+            begin = self._start + _LENGTH_PREFIX.size
+            frame = bytes(self._view[begin:begin + size])
+            self._start += total
+            self._needed = 0
+            yield frame
+
+    def _make_room(self, wanted: int) -> None:
+        pending = self.pending
+        capacity = len(self._buffer)
+        # Moving in place is only worth it when the bytes moved are bounded by
+        # the free space it creates; otherwise double the buffer. Either way
+        # each byte is moved an amortized constant number of times.
+        if pending + wanted <= capacity // 2 or (
+            pending + wanted <= capacity and self._start >= pending
+        ):
+            # memoryview slice assignment handles the overlapping move.
+            self._view[:pending] = self._view[self._start:self._end]
+        else:
+            while capacity < pending + wanted:
+                capacity *= 2
+            buffer = bytearray(capacity)
+            buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        self._scan = max(self._scan - self._start, 0)
+        self._start = 0
+        self._end = pending
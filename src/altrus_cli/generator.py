@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import inspect
+import re
 from dataclasses import dataclass
 from datetime import datetime
-import pickle
 from pathlib import Path
 
+from altrus_cli import artifact, wire
+from altrus_cli.artifact import ACTIVITY_SCHEMA, ANOMALY_SCHEMA, encode_artifact
+from altrus_cli.environments import ENVIRONMENT_PROFILES, profile_path, profile_yaml
+from altrus_cli.scaffold import GenerationReport, ScaffoldWriter
+
 
 @dataclass
 class ProjectConfig:
@@ -14,6 +20,30 @@ class ProjectConfig:
     activities: list[str]
     environments: list[str]
     model_choice: str
+    # Kept from the config a project is regenerated from, so its config file stays stable.
+    created_at: str | None = None
+    anomaly_rules: dict[str, dict[str, object]] | None = None
+
+
+# Rules written to wristband_config.yaml; models/rules.py holds the same defaults.
+ANOMALY_RULES = {
+    "sleep_disruption": {
+        "when": "accel_magnitude.max >= threshold and accel_magnitude.mean <= 0.4",
+        "scale": 1.5,
+    },
+    "stress_spike": {"when": "eda >= threshold and heart_rate >= 100", "scale": 4.0},
+    "overexertion": {
+        "when": "heart_rate >= threshold and accel_magnitude >= 2.2",
+        "scale": 30.0,
+    },
+    "arrhythmia": {"when": "heart_rate.std >= threshold", "scale": 15.0},
+    "tachycardia": {"when": "heart_rate >= threshold", "scale": 40.0},
+    "bradycardia": {"when": "heart_rate <= threshold", "scale": 40.0},
+    "fever": {"when": "body_temperature >= threshold", "scale": 2.0},
+    "heart_attack": {"when": "accel_magnitude >= threshold", "scale": 2.0},
+    "fall_detection": {"when": "fall_detected >= threshold", "scale": 0.0},
+    "cardiac_arrest": {"when": "heart_rate <= threshold", "scale": 0.0},
+}
 
 
 def _yaml_lines(data: object, indent: int = 0) -> list[str]:
@@ -39,14 +69,35 @@ def _yaml_lines(data: object, indent: int = 0) -> list[str]:
     return [f"{prefix}{data}"]
 
 
-def _write_yaml(path: Path, data: dict[str, object]) -> None:
+def _write_yaml(files: ScaffoldWriter, path: Path, data: dict[str, object]) -> None:
     lines = _yaml_lines(data)
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    files.write_text(path, "\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _existing_created_at(config_path: Path) -> str | None:
+    try:
+        text = config_path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+    match = re.search(r"^\s+created_at:\s*(\S+)", text, re.MULTILINE)
+    return match.group(1) if match else None
 
 
 def create_project(config: ProjectConfig, output_dir: Path) -> Path:
+    return generate_project(config, output_dir).project_dir
+
+
+def generate_project(
+    config: ProjectConfig, output_dir: Path, force: bool = False
+) -> GenerationReport:
+    """Render the scaffold into `output_dir / config.name`, rewriting only changed files.
+
+    Files edited since they were generated are kept unless `force` is set;
+    see `ScaffoldWriter`.
+    """
     project_dir = output_dir / config.name
     project_dir.mkdir(parents=True, exist_ok=True)
+    files = ScaffoldWriter(project_dir, force=force)
 
     config_dir = project_dir / "config"
     sensors_dir = project_dir / "sensors"
@@ -58,6 +109,7 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
     env_dir = project_dir / "environments"
     tests_dir = project_dir / "tests"
     simulations_dir = project_dir / "simulations"
+    benchmarks_dir = project_dir / "benchmarks"
 
     for directory in [
         config_dir,
@@ -69,25 +121,39 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         env_dir,
         tests_dir,
         simulations_dir,
+        benchmarks_dir,
     ]:
         directory.mkdir(parents=True, exist_ok=True)
 
+    config_path = config_dir / "wristband_config.yaml"
+    created_at = (
+        config.created_at
+        or _existing_created_at(config_path)
+        or datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    )
+    anomaly_rules = {
+        name: ANOMALY_RULES[name] for name in config.anomalies if name in ANOMALY_RULES
+    }
+    anomaly_rules.update(config.anomaly_rules or {})
     _write_yaml(
-        config_dir / "wristband_config.yaml",
+        files,
+        config_path,
         {
             "project": {
                 "name": config.name,
-                "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "created_at": created_at,
             },
             "sensors": config.sensors,
             "anomalies": config.anomalies,
             "activities": config.activities,
             "environments": config.environments,
             "model": config.model_choice,
+            "anomaly_rules": anomaly_rules,
         },
     )
 
-    (project_dir / "README.md").write_text(
+    files.write_text(
+        project_dir / "README.md",
         "# Wristband Sensor Fusion Project\n\n"
         "This project was generated by the Altrus CLI.\n"
         "Update `config/wristband_config.yaml` to adjust sensors, anomalies, activities, "
@@ -101,6 +167,12 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         "```bash\n"
         "altrus run --protocol tcp --port 5055\n"
         "```\n\n"
+        "TCP senders can use 4-byte big-endian length-prefixed frames instead of "
+        "newline-delimited JSON:\n\n"
+        "```bash\n"
+        "altrus run --protocol tcp --framing length\n"
+        "python -m tests.run_simulation --protocol=tcp --framing=length\n"
+        "```\n\n"
         "Run a short UDP simulation test:\n\n"
         "```bash\n"
         "python -m tests.run_simulation\n"
@@ -114,23 +186,111 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         "python -m simulations.run_heart_attack\n"
         "python -m simulations.run_cardiac_arrest\n"
         "```\n\n"
+        "Add `--format=binary` to any simulation (or `tests.run_simulation`) to send the "
+        "compact binary sample format from `sensors/wire.py` instead of JSON. The scanner "
+        "detects it automatically on the same port; over TCP it needs "
+        "`--framing=length`.\n\n"
         "## Models\n\n"
-        "Default models are stored in `models/activity_model.pkl` and "
-        "`models/anomaly_model.pkl`. Replace them with your trained models by copying "
-        "new `.pkl` files into the `models/` folder.\n",
+        "Default models are stored in `models/activity_model.altm` and "
+        "`models/anomaly_model.altm`. Replace them with your trained models by copying "
+        "the `.altm` files that `training_workspace/train_models.py` writes into the "
+        "`models/` folder.\n\n"
+        "An `.altm` artifact is a small JSON header (schema, version, SHA-256 checksum and "
+        "the layout of each parameter) followed by a raw little-endian parameter block; "
+        "`models/artifact.py` documents the layout. Loading never runs code from the file, "
+        "and a file that fails its checksum or holds the wrong schema is rejected. "
+        "Parameter blocks of 1 MiB or more are memory-mapped read-only, so every scanner "
+        "process started with `--workers` shares one copy of the pages.\n\n"
+        "Older `.pkl` models still load: when `models/<name>.pkl` is newer than "
+        "`models/<name>.altm`, or is the only file, it is converted into the `.altm` on the "
+        "next load. Only plain dicts, lists and numbers are unpickled. Convert explicitly "
+        "with `python -m models.artifact models/activity_model.pkl`.\n\n"
+        "Models are loaded once per process by `models/registry.py` and reloaded when an "
+        "`.altm` file's modification time or size changes, so `altrus run` does not need a "
+        "restart. Write the new file under a temporary name and rename it into place so "
+        "the scanner never reads a partial file (`write_artifact` does this). A `.pkl` "
+        "dropped into a running project is watched as well: it is converted and the new "
+        "model loaded at the next check.\n\n"
+        "## Windowed inference\n\n"
+        "`altrus run` keeps a sliding window of the last `--window` samples (default 10) "
+        "per `device_id` and passes it to `run_inference` as `window`. Models receive it "
+        "through `predict(..., window)`: `window[\"heart_rate\"].mean`, `.std`, `.min`, "
+        "`.max` and `.count` are updated in constant time per sample, and "
+        "`\"accel_magnitude\"` holds the largest absolute acceleration axis. The default "
+        "activity model classifies the window mean, so the label no longer flickers "
+        "between samples. Pass `--window 0` to score every sample on its own.\n\n"
+        "## Anomaly rules\n\n"
+        "The default anomaly model evaluates the rules under `anomaly_rules` in "
+        "`config/wristband_config.yaml` for every anomaly listed under `anomalies`:\n\n"
+        "```yaml\n"
+        "anomaly_rules:\n"
+        "  tachycardia:\n"
+        "    when: heart_rate >= threshold\n"
+        "    scale: 40.0\n"
+        "  low_spo2:\n"
+        "    when: spo2 <= 90\n"
+        "    scale: 5\n"
+        "```\n\n"
+        "A `when` joins `>=` or `<=` conditions with `and`. Each condition reads a payload "
+        "field, `accel_magnitude`, or a window statistic such as `heart_rate.std` "
+        "(`mean`, `std`, `variance`, `min`, `max`; these fire once the device's window is "
+        "full). `threshold` is the anomaly's trained threshold from "
+        "`models/anomaly_model.altm`. The score is how far the first condition is past its "
+        "bound divided by `scale`, capped at 1. Predictions list every firing anomaly and "
+        "its score under `anomalies` and report the most severe one as `anomaly_type`; "
+        "rules missing from the config fall back to the defaults in `models/rules.py`, "
+        "which also documents the order of severity.\n\n"
+        "The rules are compiled once into a plan that holds only the enabled anomalies "
+        "and skips every rule on a sensor the payload does not carry. `altrus run` "
+        "picks up edits to the rules and to the `anomalies` and `activities` lists "
+        "within a second, without a restart. If an edited rule does not parse, the "
+        "previous rules stay in use and the reload counts as a failed model reload.\n\n"
+        "## Batch inference\n\n"
+        "`pipelines.inference.run_inference_batch` scores columnar batches (arrays of "
+        "`accel_x`, `accel_y`, `accel_z`, `heart_rate`, `body_temperature`, `eda` and "
+        "`fall_detected` with NaN for missing readings) in one NumPy pass and returns the "
+        "same predictions as `run_inference` without a window, minus the per-anomaly "
+        "`anomalies` scores. It requires `pip install numpy`; use `to_batch` to convert a "
+        "list of payload dicts.\n\n"
+        "## Benchmarks\n\n"
+        "`benchmarks/run_benchmarks.py` times model loading, `ActivityModel.predict`, "
+        "`AnomalyModel.predict`, `run_inference` (with and without a window) and payload "
+        "decoding for several payload shapes, using only the standard library. Record a "
+        "baseline, then check every model or pipeline change against it:\n\n"
+        "```bash\n"
+        "python -m benchmarks.run_benchmarks\n"
+        "python -m benchmarks.run_benchmarks --compare --max-regression 20\n"
+        "```\n\n"
+        "`--compare` exits with status 1 when any case is more than `--max-regression` "
+        "percent slower than `benchmarks/baseline.json`, and `--budget US` does the same "
+        "when `run_inference` takes longer than `US` microseconds per sample. Compare "
+        "runs on the same machine; the baseline records the Python version and platform "
+        "it was measured on.\n",
         encoding="utf-8",
     )
 
     if config.model_choice == "default":
-        (models_dir / "activity_model.py").write_text(
+        files.write_text(
+            models_dir / "activity_model.py",
             "\"\"\"Default activity classifier model.\"\"\"\n\n"
-            "import pickle\n"
             "from pathlib import Path\n\n"
+            "try:\n"
+            "    import numpy as np\n"
+            "except ImportError:  # numpy is only needed for predict_batch\n"
+            "    np = None\n\n"
+            "from models.artifact import ACTIVITY_SCHEMA, load_model_artifact\n\n"
+            "MODEL_PATH = Path(__file__).with_name(\"activity_model.altm\")\n\n"
             "\n"
             "class ActivityModel:\n"
             "    def __init__(self, thresholds: list[float]) -> None:\n"
             "        self.thresholds = thresholds\n\n"
-            "    def predict(self, accel_magnitude: float, activities: list[str]) -> str:\n"
+            "    def predict(self, accel_magnitude: float, activities: list[str], window=None) -> str:\n"
+            "        \"\"\"Classify one sample, or the device's recent mean when `window` is given.\n\n"
+            "        `window` maps channel names such as \"accel_magnitude\" or \"heart_rate\" to\n"
+            "        running stats (count, mean, variance, std, min, max) over the last samples.\n"
+            "        \"\"\"\n"
+            "        if window is not None and \"accel_magnitude\" in window:\n"
+            "            accel_magnitude = window[\"accel_magnitude\"].mean\n"
             "        if accel_magnitude <= self.thresholds[0]:\n"
             "            return activities[0] if len(activities) > 0 else \"sleep\"\n"
             "        if accel_magnitude <= self.thresholds[1]:\n"
@@ -138,98 +298,141 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
             "        if accel_magnitude <= self.thresholds[2]:\n"
             "            return activities[2] if len(activities) > 2 else \"walk\"\n"
             "        return activities[3] if len(activities) > 3 else \"run\"\n\n"
+            "    def labels(self, activities: list[str]) -> list[str]:\n"
+            "        defaults = [\"sleep\", \"rest\", \"walk\", \"run\"]\n"
+            "        return [\n"
+            "            activities[index] if len(activities) > index else default\n"
+            "            for index, default in enumerate(defaults)\n"
+            "        ]\n\n"
+            "    def predict_batch(self, accel_magnitude: \"np.ndarray\", activities: list[str]) -> \"np.ndarray\":\n"
+            "        \"\"\"Return activity codes indexing `labels(activities)`, one per magnitude.\"\"\"\n"
+            "        thresholds = np.asarray(self.thresholds[:3], dtype=np.float64)\n"
+            "        return np.searchsorted(thresholds, accel_magnitude, side=\"left\").astype(np.int8)\n\n"
             "\n"
             "def load_activity_model() -> ActivityModel:\n"
-            "    path = Path(__file__).with_name(\"activity_model.pkl\")\n"
-            "    if path.exists():\n"
-            "        data = pickle.loads(path.read_bytes())\n"
-            "        return ActivityModel(data[\"thresholds\"])\n"
+            "    artifact = load_model_artifact(MODEL_PATH, ACTIVITY_SCHEMA)\n"
+            "    if artifact is not None:\n"
+            "        return ActivityModel(artifact[\"thresholds\"].tolist())\n"
             "    return ActivityModel([0.4, 1.2, 2.2])\n",
             encoding="utf-8",
         )
 
-        (models_dir / "anomaly_model.py").write_text(
+        files.write_text(
+            models_dir / "anomaly_model.py",
             "\"\"\"Default anomaly detector model.\"\"\"\n\n"
-            "import pickle\n"
             "from pathlib import Path\n\n"
+            "try:\n"
+            "    import numpy as np\n"
+            "except ImportError:  # numpy is only needed for predict_batch\n"
+            "    np = None\n\n"
+            "from models.artifact import ANOMALY_SCHEMA, load_model_artifact\n"
+            "from models.registry import registry\n"
+            "from models.rules import CONFIG_PATH, DEFAULT_THRESHOLDS, RulePlan, load_rules\n\n"
+            "MODEL_PATH = Path(__file__).with_name(\"anomaly_model.altm\")\n\n"
+            "\n"
+            "def _round_like_python(values: \"np.ndarray\", digits: int) -> \"np.ndarray\":\n"
+            "    scale = 10.0 ** digits\n"
+            "    scaled = values * scale\n"
+            "    rounded = np.rint(scaled) / scale\n"
+            "    # np.rint and round() can disagree when the scaled value sits on a tie.\n"
+            "    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6\n"
+            "    for index in np.flatnonzero(near_tie):\n"
+            "        rounded[index] = round(float(values[index]), digits)\n"
+            "    return rounded\n\n"
             "\n"
             "class AnomalyModel:\n"
             "    def __init__(self, thresholds: dict[str, float]) -> None:\n"
-            "        self.thresholds = thresholds\n\n"
-            "    def predict(self, payload: dict, anomalies: list[str]) -> dict:\n"
-            "        heart_rate = payload.get(\"heart_rate\")\n"
-            "        temperature = payload.get(\"body_temperature\")\n"
-            "        accel = max(\n"
-            "            abs(payload.get(\"accel_x\", 0.0)),\n"
-            "            abs(payload.get(\"accel_y\", 0.0)),\n"
-            "            abs(payload.get(\"accel_z\", 0.0)),\n"
-            "        )\n"
-            "        anomaly_type = None\n"
-            "        score = 0.0\n"
-            "        if heart_rate is not None:\n"
-            "            if heart_rate >= self.thresholds[\"tachycardia\"]:\n"
-            "                anomaly_type = \"tachycardia\"\n"
-            "                score = min((heart_rate - self.thresholds[\"tachycardia\"]) / 40, 1.0)\n"
-            "            elif heart_rate <= self.thresholds[\"bradycardia\"]:\n"
-            "                anomaly_type = \"bradycardia\"\n"
-            "                score = min((self.thresholds[\"bradycardia\"] - heart_rate) / 40, 1.0)\n"
-            "        if temperature is not None and temperature >= self.thresholds[\"fever\"]:\n"
-            "            anomaly_type = \"fever\"\n"
-            "            score = max(score, min((temperature - self.thresholds[\"fever\"]) / 2.0, 1.0))\n"
-            "        if accel >= self.thresholds[\"heart_attack\"]:\n"
-            "            anomaly_type = \"heart_attack\"\n"
-            "            score = max(score, min((accel - self.thresholds[\"heart_attack\"]) / 2.0, 1.0))\n"
-            "        if heart_rate is not None and heart_rate <= self.thresholds[\"cardiac_arrest\"]:\n"
-            "            anomaly_type = \"cardiac_arrest\"\n"
-            "            score = 1.0\n"
-            "        anomaly = anomaly_type is not None\n"
-            "        if anomaly_type not in anomalies:\n"
-            "            anomaly_type = None\n"
-            "            anomaly = False\n"
-            "            score = 0.0\n"
+            "        self.thresholds = thresholds\n"
+            "        self._rules = None\n"
+            "        self._enabled = None\n"
+            "        self._plan = None\n\n"
+            "    def plan(self, anomalies: list[str]) -> RulePlan:\n"
+            "        \"\"\"Return the compiled rules for `anomalies`; rebuilt when they or the rules change.\"\"\"\n"
+            "        rules = registry.get(\"anomaly_rules\", CONFIG_PATH, load_rules)\n"
+            "        if rules is not self._rules or anomalies != self._enabled:\n"
+            "            self._plan = RulePlan(rules, self.thresholds, anomalies)\n"
+            "            self._rules = rules\n"
+            "            self._enabled = list(anomalies)\n"
+            "        return self._plan\n\n"
+            "    def predict(self, payload: dict, anomalies: list[str], window=None) -> dict:\n"
+            "        # Thresholds apply per sample so a cardiac arrest is flagged at once;\n"
+            "        # rules on `window` stats fire once the device's window is full.\n"
+            "        fired = self.plan(anomalies).evaluate(payload, window)\n"
+            "        if not fired:\n"
+            "            return {\"anomaly\": False, \"score\": 0.0, \"anomaly_type\": \"normal\", \"anomalies\": {}}\n"
+            "        scores = {name: round(score, 3) for name, score in fired.items()}\n"
+            "        return {\n"
+            "            \"anomaly\": True,\n"
+            "            \"score\": max(scores.values()),\n"
+            "            \"anomaly_type\": next(reversed(scores)),\n"
+            "            \"anomalies\": scores,\n"
+            "        }\n\n"
+            "    def predict_batch(self, batch: dict, anomalies: list[str]) -> dict:\n"
+            "        \"\"\"Vectorized `predict` over columns where NaN marks a missing reading.\n\n"
+            "        `anomaly_type` holds codes indexing `anomaly_labels`.\n"
+            "        \"\"\"\n"
+            "        plan = self.plan(anomalies)\n"
+            "        codes, score = plan.evaluate_batch(batch)\n"
             "        return {\n"
-            "            \"anomaly\": anomaly,\n"
-            "            \"score\": round(score, 3),\n"
-            "            \"anomaly_type\": anomaly_type or \"normal\",\n"
+            "            \"anomaly\": codes > 0,\n"
+            "            \"score\": _round_like_python(score, 3),\n"
+            "            \"anomaly_type\": codes,\n"
+            "            \"anomaly_labels\": plan.labels,\n"
             "        }\n\n"
             "\n"
             "def load_anomaly_model() -> AnomalyModel:\n"
-            "    path = Path(__file__).with_name(\"anomaly_model.pkl\")\n"
-            "    if path.exists():\n"
-            "        data = pickle.loads(path.read_bytes())\n"
-            "        return AnomalyModel(data[\"thresholds\"])\n"
-            "    return AnomalyModel({\n"
-            "        \"tachycardia\": 120.0,\n"
-            "        \"bradycardia\": 50.0,\n"
-            "        \"fever\": 38.0,\n"
-            "        \"heart_attack\": 3.5,\n"
-            "        \"cardiac_arrest\": 30.0,\n"
-            "    })\n",
+            "    artifact = load_model_artifact(MODEL_PATH, ANOMALY_SCHEMA)\n"
+            "    if artifact is not None:\n"
+            "        return AnomalyModel(artifact.as_dict(\"thresholds\"))\n"
+            "    return AnomalyModel(dict(DEFAULT_THRESHOLDS))\n",
             encoding="utf-8",
         )
 
         activity_params = {"thresholds": [0.4, 1.2, 2.2]}
         anomaly_params = {
             "thresholds": {
+                "sleep_disruption": 1.5,
+                "stress_spike": 8.0,
+                "overexertion": 160.0,
+                "arrhythmia": 15.0,
                 "tachycardia": 120.0,
                 "bradycardia": 50.0,
                 "fever": 38.0,
                 "heart_attack": 3.5,
+                "fall_detection": 0.5,
                 "cardiac_arrest": 30.0,
             }
         }
-        (models_dir / "activity_model.pkl").write_bytes(pickle.dumps(activity_params))
-        (models_dir / "anomaly_model.pkl").write_bytes(pickle.dumps(anomaly_params))
+        files.write_bytes(
+            models_dir / "activity_model.altm",
+            encode_artifact(ACTIVITY_SCHEMA, activity_params),
+        )
+        files.write_bytes(
+            models_dir / "anomaly_model.altm",
+            encode_artifact(ANOMALY_SCHEMA, anomaly_params),
+        )
     else:
-        (models_dir / "activity_model.py").write_text(
+        files.write_text(
+            models_dir / "activity_model.py",
             "\"\"\"Custom activity model stub.\"\"\"\n\n"
-            "import pickle\n"
             "from pathlib import Path\n\n"
+            "try:\n"
+            "    import numpy as np\n"
+            "except ImportError:  # numpy is only needed for predict_batch\n"
+            "    np = None\n\n"
+            "from models.artifact import ACTIVITY_SCHEMA, load_model_artifact\n\n"
+            "MODEL_PATH = Path(__file__).with_name(\"activity_model.altm\")\n\n"
             "\n"
             "class ActivityModel:\n"
             "    def __init__(self, thresholds: list[float]) -> None:\n"
             "        self.thresholds = thresholds\n\n"
-            "    def predict(self, accel_magnitude: float, activities: list[str]) -> str:\n"
+            "    def predict(self, accel_magnitude: float, activities: list[str], window=None) -> str:\n"
+            "        \"\"\"Classify one sample, or the device's recent mean when `window` is given.\n\n"
+            "        `window` maps channel names such as \"accel_magnitude\" or \"heart_rate\" to\n"
+            "        running stats (count, mean, variance, std, min, max) over the last samples.\n"
+            "        \"\"\"\n"
+            "        if window is not None and \"accel_magnitude\" in window:\n"
+            "            accel_magnitude = window[\"accel_magnitude\"].mean\n"
             "        if accel_magnitude <= self.thresholds[0]:\n"
             "            return activities[0] if len(activities) > 0 else \"sleep\"\n"
             "        if accel_magnitude <= self.thresholds[1]:\n"
@@ -237,39 +440,425 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
             "        if accel_magnitude <= self.thresholds[2]:\n"
             "            return activities[2] if len(activities) > 2 else \"walk\"\n"
             "        return activities[3] if len(activities) > 3 else \"run\"\n\n"
+            "    def labels(self, activities: list[str]) -> list[str]:\n"
+            "        defaults = [\"sleep\", \"rest\", \"walk\", \"run\"]\n"
+            "        return [\n"
+            "            activities[index] if len(activities) > index else default\n"
+            "            for index, default in enumerate(defaults)\n"
+            "        ]\n\n"
+            "    def predict_batch(self, accel_magnitude: \"np.ndarray\", activities: list[str]) -> \"np.ndarray\":\n"
+            "        \"\"\"Return activity codes indexing `labels(activities)`, one per magnitude.\"\"\"\n"
+            "        thresholds = np.asarray(self.thresholds[:3], dtype=np.float64)\n"
+            "        return np.searchsorted(thresholds, accel_magnitude, side=\"left\").astype(np.int8)\n\n"
             "\n"
             "def load_activity_model() -> ActivityModel:\n"
-            "    path = Path(__file__).with_name(\"activity_model.pkl\")\n"
-            "    if path.exists():\n"
-            "        data = pickle.loads(path.read_bytes())\n"
-            "        return ActivityModel(data[\"thresholds\"])\n"
-            "    raise NotImplementedError(\"Provide activity_model.pkl or custom logic.\")\n",
+            "    artifact = load_model_artifact(MODEL_PATH, ACTIVITY_SCHEMA)\n"
+            "    if artifact is not None:\n"
+            "        return ActivityModel(artifact[\"thresholds\"].tolist())\n"
+            "    raise NotImplementedError(\"Provide activity_model.altm (or .pkl) or custom logic.\")\n",
             encoding="utf-8",
         )
-        (models_dir / "anomaly_model.py").write_text(
+        files.write_text(
+            models_dir / "anomaly_model.py",
             "\"\"\"Custom anomaly model stub.\"\"\"\n\n"
-            "import pickle\n"
             "from pathlib import Path\n\n"
+            "try:\n"
+            "    import numpy as np\n"
+            "except ImportError:  # numpy is only needed for predict_batch\n"
+            "    np = None\n\n"
+            "from models.artifact import ANOMALY_SCHEMA, load_model_artifact\n\n"
+            "MODEL_PATH = Path(__file__).with_name(\"anomaly_model.altm\")\n\n"
             "\n"
             "class AnomalyModel:\n"
-            "    def predict(self, payload: dict, anomalies: list[str]) -> dict:\n"
-            "        return {\"anomaly\": False, \"score\": 0.0, \"anomaly_type\": \"normal\"}\n\n"
+            "    def predict(self, payload: dict, anomalies: list[str], window=None) -> dict:\n"
+            "        return {\n"
+            "            \"anomaly\": False,\n"
+            "            \"score\": 0.0,\n"
+            "            \"anomaly_type\": \"normal\",\n"
+            "            \"anomalies\": {},\n"
+            "        }\n\n"
+            "    def predict_batch(self, batch: dict, anomalies: list[str]) -> dict:\n"
+            "        size = len(batch[\"heart_rate\"])\n"
+            "        return {\n"
+            "            \"anomaly\": np.zeros(size, dtype=bool),\n"
+            "            \"score\": np.zeros(size, dtype=np.float64),\n"
+            "            \"anomaly_type\": np.zeros(size, dtype=np.int8),\n"
+            "            \"anomaly_labels\": [\"normal\"],\n"
+            "        }\n\n"
             "\n"
             "def load_anomaly_model() -> AnomalyModel:\n"
-            "    path = Path(__file__).with_name(\"anomaly_model.pkl\")\n"
-            "    if path.exists():\n"
-            "        data = pickle.loads(path.read_bytes())\n"
+            "    artifact = load_model_artifact(MODEL_PATH, ANOMALY_SCHEMA)\n"
+            "    if artifact is not None:\n"
             "        model = AnomalyModel()\n"
-            "        model.thresholds = data[\"thresholds\"]\n"
+            "        model.thresholds = artifact.as_dict(\"thresholds\")\n"
             "        return model\n"
-            "    raise NotImplementedError(\"Provide anomaly_model.pkl or custom logic.\")\n",
+            "    raise NotImplementedError(\"Provide anomaly_model.altm (or .pkl) or custom logic.\")\n",
             encoding="utf-8",
         )
 
-    (pipelines_dir / "inference.py").write_text(
+    # A verbatim copy, so the trainer and the project read the same format.
+    files.write_text(models_dir / "artifact.py", inspect.getsource(artifact), encoding="utf-8")
+
+    files.write_text(
+        models_dir / "rules.py",
+        "\"\"\"Declarative anomaly rules compiled into a flat evaluation plan.\n\n"
+        "Rules live under `anomaly_rules` in config/wristband_config.yaml:\n\n"
+        "    anomaly_rules:\n"
+        "      tachycardia:\n"
+        "        when: heart_rate >= threshold\n"
+        "        scale: 40\n\n"
+        "`when` joins conditions with `and`. A condition compares a payload field,\n"
+        "`accel_magnitude` (the largest absolute acceleration axis) or a sliding\n"
+        "window statistic such as `heart_rate.std` with `>=` or `<=`. The word\n"
+        "`threshold` stands for the anomaly's trained threshold from\n"
+        "anomaly_model.altm; write a number instead to override it. The score is how\n"
+        "far the first condition is past its bound divided by `scale`, capped at 1.0\n"
+        "(`scale: 0` always scores 1.0).\n\n"
+        "Built-in rules run from least to most severe, and the most severe firing\n"
+        "anomaly becomes `anomaly_type`. Anomalies that only the config defines rank\n"
+        "below the built-in ones.\n"
+        "\"\"\"\n\n"
+        "from __future__ import annotations\n\n"
+        "import re\n"
+        "from dataclasses import dataclass\n"
+        "from pathlib import Path\n\n"
+        "try:\n"
+        "    import numpy as np\n"
+        "except ImportError:  # numpy is only needed for RulePlan.evaluate_batch\n"
+        "    np = None\n\n"
+        "CONFIG_PATH = Path(__file__).resolve().parents[1] / \"config\" / \"wristband_config.yaml\"\n\n"
+        "DEFAULT_THRESHOLDS = {\n"
+        "    \"sleep_disruption\": 1.5,\n"
+        "    \"stress_spike\": 8.0,\n"
+        "    \"overexertion\": 160.0,\n"
+        "    \"arrhythmia\": 15.0,\n"
+        "    \"tachycardia\": 120.0,\n"
+        "    \"bradycardia\": 50.0,\n"
+        "    \"fever\": 38.0,\n"
+        "    \"heart_attack\": 3.5,\n"
+        "    \"fall_detection\": 0.5,\n"
+        "    \"cardiac_arrest\": 30.0,\n"
+        "}\n\n"
+        "# name: (when, scale), least severe first\n"
+        "DEFAULT_RULES = {\n"
+        "    \"sleep_disruption\": (\n"
+        "        \"accel_magnitude.max >= threshold and accel_magnitude.mean <= 0.4\",\n"
+        "        1.5,\n"
+        "    ),\n"
+        "    \"stress_spike\": (\"eda >= threshold and heart_rate >= 100\", 4.0),\n"
+        "    \"overexertion\": (\"heart_rate >= threshold and accel_magnitude >= 2.2\", 30.0),\n"
+        "    \"arrhythmia\": (\"heart_rate.std >= threshold\", 15.0),\n"
+        "    \"tachycardia\": (\"heart_rate >= threshold\", 40.0),\n"
+        "    \"bradycardia\": (\"heart_rate <= threshold\", 40.0),\n"
+        "    \"fever\": (\"body_temperature >= threshold\", 2.0),\n"
+        "    \"heart_attack\": (\"accel_magnitude >= threshold\", 2.0),\n"
+        "    \"fall_detection\": (\"fall_detected >= threshold\", 0.0),\n"
+        "    \"cardiac_arrest\": (\"heart_rate <= threshold\", 0.0),\n"
+        "}\n\n"
+        "WINDOW_STATS = (\"mean\", \"std\", \"variance\", \"min\", \"max\")\n"
+        "_PAYLOAD, _ACCEL, _WINDOW = \"payload\", \"accel\", \"window\"\n"
+        "_ACCEL_AXES = (\"accel_x\", \"accel_y\", \"accel_z\")\n"
+        "_CONDITION = re.compile(r\"^\\s*([A-Za-z_]\\w*)(?:\\.(\\w+))?\\s*(>=|<=)\\s*(\\S+)\\s*$\")\n\n"
+        "\n"
+        "@dataclass(frozen=True)\n"
+        "class Condition:\n"
+        "    field: str\n"
+        "    stat: str | None\n"
+        "    at_least: bool\n"
+        "    threshold: float | None\n\n"
+        "    def holds(self, value: float) -> bool:\n"
+        "        return value >= self.threshold if self.at_least else value <= self.threshold\n\n"
+        "    def excess(self, value):\n"
+        "        return value - self.threshold if self.at_least else self.threshold - value\n\n"
+        "\n"
+        "@dataclass(frozen=True)\n"
+        "class Rule:\n"
+        "    name: str\n"
+        "    conditions: tuple[Condition, ...]\n"
+        "    scale: float\n\n"
+        "\n"
+        "def parse_condition(text: str) -> Condition:\n"
+        "    match = _CONDITION.match(text)\n"
+        "    if match is None:\n"
+        "        raise ValueError(f\"cannot parse rule condition {text!r}\")\n"
+        "    field, stat, operator, bound = match.groups()\n"
+        "    if stat is not None and stat not in WINDOW_STATS:\n"
+        "        raise ValueError(f\"unknown window statistic {stat!r} in {text!r}\")\n"
+        "    threshold = None if bound == \"threshold\" else float(bound)\n"
+        "    return Condition(field, stat, operator == \">=\", threshold)\n\n"
+        "\n"
+        "def parse_rule(name: str, when: str, scale: float) -> Rule:\n"
+        "    conditions = tuple(parse_condition(part) for part in when.split(\" and \"))\n"
+        "    return Rule(name, conditions, float(scale))\n\n"
+        "\n"
+        "def _config_rules(text: str) -> dict[str, dict[str, str]]:\n"
+        "    rules: dict[str, dict[str, str]] = {}\n"
+        "    in_section = False\n"
+        "    current = None\n"
+        "    for line in text.splitlines():\n"
+        "        stripped = line.strip()\n"
+        "        if not stripped or stripped.startswith(\"#\"):\n"
+        "            continue\n"
+        "        indent = len(line) - len(line.lstrip())\n"
+        "        if indent == 0:\n"
+        "            in_section = stripped == \"anomaly_rules:\"\n"
+        "            continue\n"
+        "        if not in_section:\n"
+        "            continue\n"
+        "        key, _, value = stripped.partition(\":\")\n"
+        "        if not value.strip():\n"
+        "            current = rules.setdefault(key.strip(), {})\n"
+        "        elif current is not None:\n"
+        "            current[key.strip()] = value.strip()\n"
+        "    return rules\n\n"
+        "\n"
+        "def load_rules(path: Path = CONFIG_PATH) -> tuple[Rule, ...]:\n"
+        "    \"\"\"Return the built-in rules with the config's `anomaly_rules` applied.\"\"\"\n"
+        "    configured = _config_rules(path.read_text(encoding=\"utf-8\")) if path.exists() else {}\n"
+        "    specs = {name: configured.pop(name, {}) for name in DEFAULT_RULES}\n"
+        "    rules = []\n"
+        "    for name, spec in [*configured.items(), *specs.items()]:\n"
+        "        when, scale = DEFAULT_RULES.get(name, (None, 1.0))\n"
+        "        when = spec.get(\"when\", when)\n"
+        "        if when is None:\n"
+        "            raise ValueError(f\"anomaly rule {name!r} has no `when`\")\n"
+        "        rules.append(parse_rule(name, when, spec.get(\"scale\", scale)))\n"
+        "    return tuple(rules)\n\n"
+        "\n"
+        "class RulePlan:\n"
+        "    \"\"\"The enabled rules with thresholds filled in, grouped by the first value they read.\n\n"
+        "    A payload missing that value skips the whole group with one lookup, and\n"
+        "    `accel_magnitude` is only computed when an enabled rule reads it.\n"
+        "    \"\"\"\n\n"
+        "    def __init__(\n"
+        "        self, rules: tuple[Rule, ...], thresholds: dict[str, float], enabled: list[str]\n"
+        "    ) -> None:\n"
+        "        enabled_set = frozenset(enabled)\n"
+        "        compiled = []\n"
+        "        for rule in rules:\n"
+        "            if rule.name not in enabled_set:\n"
+        "                continue\n"
+        "            threshold = thresholds.get(rule.name, DEFAULT_THRESHOLDS.get(rule.name))\n"
+        "            conditions = tuple(_resolve(c, rule.name, threshold) for c in rule.conditions)\n"
+        "            compiled.append(Rule(rule.name, conditions, rule.scale))\n"
+        "        self.rules = tuple(compiled)\n"
+        "        self.labels = [\"normal\", *(rule.name for rule in self.rules)]\n"
+        "        groups: dict[tuple[str, str | None], list] = {}\n"
+        "        for code, rule in enumerate(self.rules, start=1):\n"
+        "            first, *rest = rule.conditions\n"
+        "            groups.setdefault((first.field, first.stat), []).append(\n"
+        "                (code, rule.name, first.at_least, first.threshold, tuple(rest), rule.scale)\n"
+        "            )\n"
+        "        self.groups = tuple(\n"
+        "            (_source(field, stat), field, stat, tuple(members))\n"
+        "            for (field, stat), members in groups.items()\n"
+        "        )\n\n"
+        "    def evaluate(self, payload: dict, window=None) -> dict[str, float]:\n"
+        "        \"\"\"Return {anomaly: score} for every firing rule, least severe first.\"\"\"\n"
+        "        fired = []\n"
+        "        for source, field, stat, members in self.groups:\n"
+        "            if source is _PAYLOAD:\n"
+        "                value = payload.get(field)\n"
+        "            else:\n"
+        "                value = _read(field, stat, payload, window)\n"
+        "            if value is None:\n"
+        "                continue\n"
+        "            for code, name, at_least, threshold, rest, scale in members:\n"
+        "                excess = value - threshold if at_least else threshold - value\n"
+        "                if excess < 0 or rest and not _all_hold(rest, payload, window):\n"
+        "                    continue\n"
+        "                fired.append((code, name, 1.0 if scale <= 0 else min(excess / scale, 1.0)))\n"
+        "        if len(fired) > 1:\n"
+        "            fired.sort()\n"
+        "        return {name: score for _, name, score in fired}\n\n"
+        "    def evaluate_batch(self, columns: dict) -> tuple:\n"
+        "        \"\"\"Vectorized `evaluate` over NaN-padded columns, without a window.\n\n"
+        "        Returns (codes indexing `labels`, the highest score per row); rules on\n"
+        "        window statistics or on fields missing from `columns` never fire.\n"
+        "        \"\"\"\n"
+        "        size = len(next(iter(columns.values())))\n"
+        "        codes = np.zeros(size, dtype=np.int8)\n"
+        "        scores = np.zeros(size, dtype=np.float64)\n"
+        "        columns = dict(columns)\n"
+        "        axes = [columns[name] for name in _ACCEL_AXES if name in columns]\n"
+        "        if axes and \"accel_magnitude\" not in columns:\n"
+        "            # fmax skips NaN, so only rows without any axis stay NaN.\n"
+        "            magnitude = np.abs(axes[0])\n"
+        "            for axis in axes[1:]:\n"
+        "                magnitude = np.fmax(magnitude, np.abs(axis))\n"
+        "            columns[\"accel_magnitude\"] = magnitude\n"
+        "        with np.errstate(invalid=\"ignore\"):\n"
+        "            for code, rule in enumerate(self.rules, start=1):\n"
+        "                if any(c.stat is not None or c.field not in columns for c in rule.conditions):\n"
+        "                    continue\n"
+        "                mask = np.ones(size, dtype=bool)\n"
+        "                for condition in rule.conditions:\n"
+        "                    values = columns[condition.field]\n"
+        "                    if condition.at_least:\n"
+        "                        mask &= values >= condition.threshold\n"
+        "                    else:\n"
+        "                        mask &= values <= condition.threshold\n"
+        "                if not mask.any():\n"
+        "                    continue\n"
+        "                first = rule.conditions[0]\n"
+        "                if rule.scale <= 0:\n"
+        "                    rule_scores = 1.0\n"
+        "                else:\n"
+        "                    excess = first.excess(columns[first.field][mask])\n"
+        "                    rule_scores = np.minimum(excess / rule.scale, 1.0)\n"
+        "                codes[mask] = code\n"
+        "                scores[mask] = np.maximum(scores[mask], rule_scores)\n"
+        "        return codes, scores\n\n"
+        "\n"
+        "def _resolve(condition: Condition, name: str, threshold: float | None) -> Condition:\n"
+        "    if condition.threshold is not None:\n"
+        "        return condition\n"
+        "    if threshold is None:\n"
+        "        raise ValueError(f\"anomaly {name!r} has no trained threshold; write a number instead\")\n"
+        "    return Condition(condition.field, condition.stat, condition.at_least, float(threshold))\n\n"
+        "\n"
+        "def _source(field: str, stat: str | None) -> str:\n"
+        "    if stat is not None:\n"
+        "        return _WINDOW\n"
+        "    return _ACCEL if field == \"accel_magnitude\" else _PAYLOAD\n\n"
+        "\n"
+        "def _all_hold(conditions: tuple[Condition, ...], payload: dict, window) -> bool:\n"
+        "    for condition in conditions:\n"
+        "        value = _read(condition.field, condition.stat, payload, window)\n"
+        "        if value is None or not condition.holds(value):\n"
+        "            return False\n"
+        "    return True\n\n"
+        "\n"
+        "def _read(field: str, stat: str | None, payload: dict, window):\n"
+        "    if stat is not None:\n"
+        "        stats = window.get(field) if window is not None else None\n"
+        "        return getattr(stats, stat) if stats is not None and stats.full else None\n"
+        "    if field != \"accel_magnitude\":\n"
+        "        return payload.get(field)\n"
+        "    magnitude = None\n"
+        "    for name in _ACCEL_AXES:\n"
+        "        axis = payload.get(name)\n"
+        "        if axis is not None and (magnitude is None or abs(axis) > magnitude):\n"
+        "            magnitude = abs(axis)\n"
+        "    return magnitude\n",
+        encoding="utf-8",
+    )
+
+    files.write_text(
+        models_dir / "registry.py",
+        "\"\"\"Process-wide model cache with hot reload of new model file drops.\"\"\"\n\n"
         "from __future__ import annotations\n\n"
+        "import os\n"
+        "import threading\n"
+        "import time\n"
+        "from dataclasses import dataclass\n"
+        "from pathlib import Path\n"
+        "from typing import Any, Callable\n\n"
+        "\n"
+        "@dataclass\n"
+        "class _Entry:\n"
+        "    paths: tuple[Path, ...]\n"
+        "    loader: Callable[[], Any]\n"
+        "    model: Any = None\n"
+        "    signature: tuple | None = None\n"
+        "    next_check: float = 0.0\n\n"
+        "\n"
+        "def _signature(path: Path) -> tuple[int, int] | None:\n"
+        "    try:\n"
+        "        stat = os.stat(path)\n"
+        "    except OSError:\n"
+        "        return None\n"
+        "    return stat.st_mtime_ns, stat.st_size\n\n"
+        "\n"
+        "def _signatures(paths: tuple[Path, ...]) -> tuple:\n"
+        "    return tuple(_signature(path) for path in paths)\n\n"
+        "\n"
+        "class ModelRegistry:\n"
+        "    \"\"\"Load each model once and reload it when its file changes on disk.\n\n"
+        "    The file, and any `watch` paths its loader also reads (such as a legacy\n"
+        "    `.pkl` it converts), are stat-ed at most once per `check_interval` seconds.\n"
+        "    A reload only replaces the cached model after the loader returns, so a\n"
+        "    half-written drop keeps serving the previous model until the next check.\n"
+        "    \"\"\"\n\n"
+        "    def __init__(self, check_interval: float = 1.0) -> None:\n"
+        "        self.check_interval = check_interval\n"
+        "        self.loads = 0\n"
+        "        self.reloads = 0\n"
+        "        self.failures = 0\n"
+        "        self._entries: dict[str, _Entry] = {}\n"
+        "        self._lock = threading.Lock()\n\n"
+        "    def get(\n"
+        "        self,\n"
+        "        name: str,\n"
+        "        path: Path,\n"
+        "        loader: Callable[[], Any],\n"
+        "        watch: tuple[Path, ...] = (),\n"
+        "    ) -> Any:\n"
+        "        entry = self._entries.get(name)\n"
+        "        if entry is not None and time.monotonic() < entry.next_check:\n"
+        "            return entry.model\n"
+        "        with self._lock:\n"
+        "            entry = self._entries.get(name)\n"
+        "            if entry is None:\n"
+        "                entry = _Entry(paths=(path, *watch), loader=loader)\n"
+        "                self._refresh(entry)\n"
+        "                self._entries[name] = entry\n"
+        "            elif time.monotonic() >= entry.next_check:\n"
+        "                self._refresh(entry)\n"
+        "            return entry.model\n\n"
+        "    def _refresh(self, entry: _Entry) -> None:\n"
+        "        entry.next_check = time.monotonic() + self.check_interval\n"
+        "        signature = _signatures(entry.paths)\n"
+        "        if entry.model is not None and signature == entry.signature:\n"
+        "            return\n"
+        "        try:\n"
+        "            model = entry.loader()\n"
+        "        except Exception:\n"
+        "            if entry.model is None:\n"
+        "                raise\n"
+        "            self.failures += 1\n"
+        "            return\n"
+        "        if entry.model is None:\n"
+        "            self.loads += 1\n"
+        "        else:\n"
+        "            self.reloads += 1\n"
+        "        entry.model = model\n"
+        "        entry.signature = signature\n\n"
+        "    def stats(self) -> dict[str, int]:\n"
+        "        return {\n"
+        "            \"loads\": self.loads,\n"
+        "            \"reloads\": self.reloads,\n"
+        "            \"failures\": self.failures,\n"
+        "        }\n\n"
+        "\n"
+        "registry = ModelRegistry()\n",
+        encoding="utf-8",
+    )
+
+    files.write_text(
+        pipelines_dir / "inference.py",
+        "from __future__ import annotations\n\n"
+        "try:\n"
+        "    import numpy as np\n"
+        "except ImportError:  # numpy is only needed for run_inference_batch\n"
+        "    np = None\n\n"
+        "from models.activity_model import MODEL_PATH as ACTIVITY_MODEL_PATH\n"
         "from models.activity_model import load_activity_model\n"
-        "from models.anomaly_model import load_anomaly_model\n\n"
+        "from models.anomaly_model import MODEL_PATH as ANOMALY_MODEL_PATH\n"
+        "from models.anomaly_model import load_anomaly_model\n"
+        "from models.registry import registry\n\n"
+        "# load_model_artifact converts a legacy .pkl dropped next to the .altm; watch it too.\n"
+        "ACTIVITY_WATCH = (ACTIVITY_MODEL_PATH.with_suffix(\".pkl\"),)\n"
+        "ANOMALY_WATCH = (ANOMALY_MODEL_PATH.with_suffix(\".pkl\"),)\n\n"
+        "BATCH_FIELDS = [\n"
+        "    \"accel_x\",\n"
+        "    \"accel_y\",\n"
+        "    \"accel_z\",\n"
+        "    \"heart_rate\",\n"
+        "    \"body_temperature\",\n"
+        "    \"eda\",\n"
+        "    \"fall_detected\",\n"
+        "]\n\n"
         "\n"
         "def _accel_magnitude(payload: dict) -> float:\n"
         "    return max(\n"
@@ -278,21 +867,83 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         "        abs(payload.get(\"accel_z\", 0.0)),\n"
         "    )\n\n"
         "\n"
-        "def run_inference(payload: dict, activities: list[str], anomalies: list[str]) -> dict:\n"
-        "    activity_model = load_activity_model()\n"
-        "    anomaly_model = load_anomaly_model()\n"
-        "    activity = activity_model.predict(_accel_magnitude(payload), activities)\n"
-        "    anomaly_result = anomaly_model.predict(payload, anomalies)\n"
+        "def run_inference(\n"
+        "    payload: dict,\n"
+        "    activities: list[str],\n"
+        "    anomalies: list[str],\n"
+        "    window=None,\n"
+        ") -> dict:\n"
+        "    \"\"\"Score one payload; `altrus run` passes the device's sliding `window`.\"\"\"\n"
+        "    activity_model = registry.get(\n"
+        "        \"activity\", ACTIVITY_MODEL_PATH, load_activity_model, ACTIVITY_WATCH\n"
+        "    )\n"
+        "    anomaly_model = registry.get(\n"
+        "        \"anomaly\", ANOMALY_MODEL_PATH, load_anomaly_model, ANOMALY_WATCH\n"
+        "    )\n"
+        "    activity = activity_model.predict(_accel_magnitude(payload), activities, window)\n"
+        "    anomaly_result = anomaly_model.predict(payload, anomalies, window)\n"
         "    return {\n"
         "        \"activity\": activity,\n"
         "        \"anomaly\": anomaly_result[\"anomaly\"],\n"
         "        \"anomaly_type\": anomaly_result[\"anomaly_type\"],\n"
         "        \"score\": anomaly_result[\"score\"],\n"
-        "    }\n",
+        "        \"anomalies\": anomaly_result.get(\"anomalies\", {}),\n"
+        "    }\n\n"
+        "\n"
+        "def to_batch(payloads: list[dict]) -> dict:\n"
+        "    \"\"\"Convert payload dicts to the columnar layout `run_inference_batch` expects.\"\"\"\n"
+        "    return {\n"
+        "        field: np.array(\n"
+        "            [payload.get(field, np.nan) for payload in payloads], dtype=np.float64\n"
+        "        )\n"
+        "        for field in BATCH_FIELDS\n"
+        "    }\n\n"
+        "\n"
+        "def run_inference_batch(batch: dict, activities: list[str], anomalies: list[str]) -> dict:\n"
+        "    \"\"\"Score a columnar batch in one vectorized pass.\n\n"
+        "    `batch` maps each of `BATCH_FIELDS` to an equal-length array with NaN for\n"
+        "    missing readings; absent fields count as missing. Activities and anomaly\n"
+        "    types are returned as integer codes indexing the matching `*_labels` list.\n"
+        "    \"\"\"\n"
+        "    if np is None:\n"
+        "        raise RuntimeError(\"run_inference_batch requires numpy (pip install numpy).\")\n"
+        "    size = len(next(iter(batch.values()))) if batch else 0\n"
+        "    columns = {\n"
+        "        field: np.asarray(batch[field], dtype=np.float64)\n"
+        "        if field in batch\n"
+        "        else np.full(size, np.nan)\n"
+        "        for field in BATCH_FIELDS\n"
+        "    }\n"
+        "    activity_model = registry.get(\n"
+        "        \"activity\", ACTIVITY_MODEL_PATH, load_activity_model, ACTIVITY_WATCH\n"
+        "    )\n"
+        "    anomaly_model = registry.get(\n"
+        "        \"anomaly\", ANOMALY_MODEL_PATH, load_anomaly_model, ANOMALY_WATCH\n"
+        "    )\n"
+        "    magnitude = np.maximum(\n"
+        "        np.maximum(\n"
+        "            np.abs(np.nan_to_num(columns[\"accel_x\"])),\n"
+        "            np.abs(np.nan_to_num(columns[\"accel_y\"])),\n"
+        "        ),\n"
+        "        np.abs(np.nan_to_num(columns[\"accel_z\"])),\n"
+        "    )\n"
+        "    anomaly_result = anomaly_model.predict_batch(columns, anomalies)\n"
+        "    return {\n"
+        "        \"activity\": activity_model.predict_batch(magnitude, activities),\n"
+        "        \"activity_labels\": activity_model.labels(activities),\n"
+        "        \"anomaly\": anomaly_result[\"anomaly\"],\n"
+        "        \"anomaly_type\": anomaly_result[\"anomaly_type\"],\n"
+        "        \"anomaly_labels\": anomaly_result[\"anomaly_labels\"],\n"
+        "        \"score\": anomaly_result[\"score\"],\n"
+        "    }\n\n"
+        "\n"
+        "def model_stats() -> dict:\n"
+        "    return registry.stats()\n",
         encoding="utf-8",
     )
 
-    (scripts_dir / "run_inference.py").write_text(
+    files.write_text(
+        scripts_dir / "run_inference.py",
         "from pipelines.inference import run_inference\n\n"
         "\n"
         "def main() -> None:\n"
@@ -307,7 +958,8 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (scripts_dir / "run_live.py").write_text(
+    files.write_text(
+        scripts_dir / "run_live.py",
         "from __future__ import annotations\n\n"
         "import time\n\n"
         "from pipelines.inference import run_inference\n"
@@ -333,7 +985,8 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (simulated_dir / "simulator.py").write_text(
+    files.write_text(
+        simulated_dir / "simulator.py",
         "from __future__ import annotations\n\n"
         "import random\n\n"
         "\n"
@@ -349,18 +1002,23 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (tests_dir / "run_simulation.py").write_text(
+    files.write_text(
+        tests_dir / "run_simulation.py",
         "from __future__ import annotations\n\n"
         "import json\n"
         "import socket\n"
+        "import struct\n"
         "import sys\n"
         "import time\n\n"
-        "from sensors.simulated.simulator import generate_sample\n\n"
+        "from sensors.simulated.simulator import generate_sample\n"
+        "from sensors.wire import encode_sample\n\n"
         "\n"
-        "def _parse_args() -> tuple[str, str, int]:\n"
+        "def _parse_args() -> tuple[str, str, int, str, str]:\n"
         "    protocol = \"udp\"\n"
         "    host = \"127.0.0.1\"\n"
         "    port = 5055\n"
+        "    framing = \"line\"\n"
+        "    wire_format = \"json\"\n"
         "    for arg in sys.argv[1:]:\n"
         "        if arg.startswith(\"--protocol=\"):\n"
         "            protocol = arg.split(\"=\", 1)[1]\n"
@@ -368,28 +1026,46 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         "            host = arg.split(\"=\", 1)[1]\n"
         "        if arg.startswith(\"--port=\"):\n"
         "            port = int(arg.split(\"=\", 1)[1])\n"
-        "    return protocol, host, port\n\n"
+        "        if arg.startswith(\"--framing=\"):\n"
+        "            framing = arg.split(\"=\", 1)[1]\n"
+        "        if arg.startswith(\"--format=\"):\n"
+        "            wire_format = arg.split(\"=\", 1)[1]\n"
+        "    return protocol, host, port, framing, wire_format\n\n"
+        "\n"
+        "def _encode(sample: dict, wire_format: str, sequence: int) -> bytes:\n"
+        "    if wire_format == \"binary\":\n"
+        "        return encode_sample(sample, sequence=sequence)\n"
+        "    return json.dumps(sample).encode(\"utf-8\")\n\n"
+        "\n"
+        "def _frame(message: bytes, framing: str) -> bytes:\n"
+        "    if framing == \"length\":\n"
+        "        return struct.pack(\">I\", len(message)) + message\n"
+        "    return message + b\"\\n\"\n\n"
         "\n"
         "def main() -> None:\n"
-        "    protocol, host, port = _parse_args()\n"
+        "    protocol, host, port, framing, wire_format = _parse_args()\n"
+        "    if protocol == \"tcp\" and wire_format == \"binary\" and framing != \"length\":\n"
+        "        raise SystemExit(\n"
+        "            \"Binary samples over TCP need --framing=length (and altrus run --framing length).\"\n"
+        "        )\n"
         "    print(f\"Sending {protocol.upper()} samples to {host}:{port}...\")\n"
         "    if protocol == \"tcp\":\n"
         "        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:\n"
         "            sock.connect((host, port))\n"
-        "            for _ in range(5):\n"
+        "            for sequence in range(5):\n"
         "                sample = generate_sample()\n"
         "                sample[\"heart_rate\"] = round(60 + abs(sample[\"accel_x\"]) * 20, 2)\n"
         "                sample[\"body_temperature\"] = round(36.5 + abs(sample[\"accel_y\"]) * 0.5, 2)\n"
-        "                message = json.dumps(sample).encode(\"utf-8\") + b\"\\n\"\n"
+        "                message = _frame(_encode(sample, wire_format, sequence), framing)\n"
         "                sock.sendall(message)\n"
         "                time.sleep(0.5)\n"
         "        return\n"
         "    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:\n"
-        "        for _ in range(5):\n"
+        "        for sequence in range(5):\n"
         "            sample = generate_sample()\n"
         "            sample[\"heart_rate\"] = round(60 + abs(sample[\"accel_x\"]) * 20, 2)\n"
         "            sample[\"body_temperature\"] = round(36.5 + abs(sample[\"accel_y\"]) * 0.5, 2)\n"
-        "            message = json.dumps(sample).encode(\"utf-8\")\n"
+        "            message = _encode(sample, wire_format, sequence)\n"
         "            sock.sendto(message, (host, port))\n"
         "            time.sleep(0.5)\n\n"
         "\n"
@@ -398,24 +1074,309 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (simulations_dir / "__init__.py").write_text(
+    files.write_text(
+        benchmarks_dir / "run_benchmarks.py",
+        "\"\"\"Micro-benchmarks for the project's inference path.\n\n"
+        "Run from the project root:\n\n"
+        "    python -m benchmarks.run_benchmarks             # measure and save benchmarks/baseline.json\n"
+        "    python -m benchmarks.run_benchmarks --compare   # fail if a case regressed\n"
+        "    python -m benchmarks.run_benchmarks --budget 50 # fail if run_inference > 50 us\n\n"
+        "Every case reports the best per-call time over several timeit repeats. Cases\n"
+        "whose model cannot be loaded (for example a custom model without its `.altm`)\n"
+        "are reported as skipped.\n"
+        "\"\"\"\n\n"
+        "from __future__ import annotations\n\n"
+        "import argparse\n"
+        "import json\n"
+        "import platform\n"
+        "import sys\n"
+        "import timeit\n"
+        "from datetime import datetime, timezone\n"
+        "from pathlib import Path\n"
+        "from typing import Callable\n\n"
+        "from models.activity_model import load_activity_model\n"
+        "from models.anomaly_model import load_anomaly_model\n"
+        "from pipelines.inference import run_inference\n"
+        "from sensors.wire import encode_sample\n\n"
+        "try:\n"
+        "    from altrus_cli.decoder import PayloadDecoder\n"
+        "    from altrus_cli.wire import decode_sample\n"
+        "    from altrus_cli.windows import WindowStore\n"
+        "except ImportError:  # benchmarks the project code alone without the altrus CLI\n"
+        "    PayloadDecoder = decode_sample = WindowStore = None\n\n"
+        "PROJECT_ROOT = Path(__file__).resolve().parents[1]\n"
+        "BASELINE_PATH = Path(__file__).with_name(\"baseline.json\")\n"
+        "DEFAULT_ACTIVITIES = [\"sleep\", \"rest\", \"walk\", \"run\"]\n"
+        "DEFAULT_ANOMALIES = [\"tachycardia\", \"bradycardia\", \"fever\", \"heart_attack\", \"cardiac_arrest\"]\n\n"
+        "PAYLOADS = {\n"
+        "    \"accel_only\": {\"accel_x\": 0.31, \"accel_y\": -0.12, \"accel_z\": 0.98},\n"
+        "    \"typical\": {\n"
+        "        \"device_id\": 7,\n"
+        "        \"sequence\": 1024,\n"
+        "        \"timestamp\": 1700000000.0,\n"
+        "        \"accel_x\": 0.31,\n"
+        "        \"accel_y\": -0.12,\n"
+        "        \"accel_z\": 0.98,\n"
+        "        \"heart_rate\": 72.0,\n"
+        "        \"body_temperature\": 36.6,\n"
+        "    },\n"
+        "    \"anomalous\": {\n"
+        "        \"device_id\": 7,\n"
+        "        \"sequence\": 1025,\n"
+        "        \"timestamp\": 1700000000.1,\n"
+        "        \"accel_x\": 3.9,\n"
+        "        \"accel_y\": -3.2,\n"
+        "        \"accel_z\": 2.7,\n"
+        "        \"heart_rate\": 168.0,\n"
+        "        \"body_temperature\": 39.1,\n"
+        "    },\n"
+        "    \"all_fields\": {\n"
+        "        \"device_id\": 7,\n"
+        "        \"sequence\": 1026,\n"
+        "        \"timestamp\": 1700000000.2,\n"
+        "        \"accel_x\": 0.31,\n"
+        "        \"accel_y\": -0.12,\n"
+        "        \"accel_z\": 0.98,\n"
+        "        \"heart_rate\": 72.0,\n"
+        "        \"body_temperature\": 36.6,\n"
+        "        \"gyro_x\": 0.01,\n"
+        "        \"gyro_y\": -0.02,\n"
+        "        \"gyro_z\": 0.03,\n"
+        "        \"spo2\": 97.0,\n"
+        "        \"eda\": 2.1,\n"
+        "        \"ppg\": 0.54,\n"
+        "        \"ecg\": 0.12,\n"
+        "        \"pressure\": 1013.2,\n"
+        "        \"fall_detected\": 0.0,\n"
+        "    },\n"
+        "}\n\n"
+        "\n"
+        "def _config_list(section: str) -> list[str]:\n"
+        "    path = PROJECT_ROOT / \"config\" / \"wristband_config.yaml\"\n"
+        "    if not path.exists():\n"
+        "        return []\n"
+        "    values = []\n"
+        "    current = None\n"
+        "    for line in path.read_text(encoding=\"utf-8\").splitlines():\n"
+        "        stripped = line.strip()\n"
+        "        if not stripped.startswith(\"-\") and stripped.endswith(\":\"):\n"
+        "            current = stripped[:-1]\n"
+        "        elif stripped.startswith(\"-\") and current == section:\n"
+        "            values.append(stripped.lstrip(\"-\").strip())\n"
+        "    return values\n\n"
+        "\n"
+        "def _accel_magnitude(payload: dict) -> float:\n"
+        "    return max(\n"
+        "        abs(payload.get(\"accel_x\", 0.0)),\n"
+        "        abs(payload.get(\"accel_y\", 0.0)),\n"
+        "        abs(payload.get(\"accel_z\", 0.0)),\n"
+        "    )\n\n"
+        "\n"
+        "def _cases() -> dict[str, Callable[[], object]]:\n"
+        "    activities = _config_list(\"activities\") or DEFAULT_ACTIVITIES\n"
+        "    anomalies = _config_list(\"anomalies\") or DEFAULT_ANOMALIES\n"
+        "    cases: dict[str, Callable[[], object]] = {\n"
+        "        \"load/activity_model\": load_activity_model,\n"
+        "        \"load/anomaly_model\": load_anomaly_model,\n"
+        "    }\n"
+        "    try:\n"
+        "        activity_model = load_activity_model()\n"
+        "        anomaly_model = load_anomaly_model()\n"
+        "    except Exception:\n"
+        "        activity_model = anomaly_model = None\n"
+        "    decode = None\n"
+        "    if PayloadDecoder is not None:\n"
+        "        # The schema `altrus run` decodes against: the configured sensors' fields.\n"
+        "        decode = PayloadDecoder(_config_list(\"sensors\")).decode\n"
+        "    windows = None\n"
+        "    if WindowStore is not None:\n"
+        "        windows = WindowStore()\n"
+        "        for _ in range(windows.size):\n"
+        "            windows.update(PAYLOADS[\"typical\"])\n"
+        "    for shape, payload in PAYLOADS.items():\n"
+        "        magnitude = _accel_magnitude(payload)\n"
+        "        raw_json = json.dumps(payload).encode(\"utf-8\")\n"
+        "        cases[f\"decode/json.loads/{shape}\"] = lambda raw=raw_json: json.loads(raw)\n"
+        "        if decode is not None:\n"
+        "            cases[f\"decode/altrus/{shape}\"] = lambda raw=raw_json: decode(raw)\n"
+        "            raw_binary = encode_sample(payload, 7, 1, 1700000000.0)\n"
+        "            cases[f\"decode/binary/{shape}\"] = lambda raw=raw_binary: decode_sample(raw)\n"
+        "        if activity_model is not None:\n"
+        "            cases[f\"activity.predict/{shape}\"] = lambda magnitude=magnitude: (\n"
+        "                activity_model.predict(magnitude, activities)\n"
+        "            )\n"
+        "            cases[f\"anomaly.predict/{shape}\"] = lambda payload=payload: (\n"
+        "                anomaly_model.predict(payload, anomalies)\n"
+        "            )\n"
+        "        cases[f\"run_inference/{shape}\"] = lambda payload=payload: (\n"
+        "            run_inference(payload, activities, anomalies)\n"
+        "        )\n"
+        "        if windows is not None:\n"
+        "            window = windows.update(payload)\n"
+        "            cases[f\"run_inference+window/{shape}\"] = lambda payload=payload, window=window: (\n"
+        "                run_inference(payload, activities, anomalies, window)\n"
+        "            )\n"
+        "    return cases\n\n"
+        "\n"
+        "def _measure(function: Callable[[], object], repeat: int, min_time: float) -> float:\n"
+        "    \"\"\"Return the best per-call time in microseconds.\"\"\"\n"
+        "    timer = timeit.Timer(function)\n"
+        "    number = 1\n"
+        "    while timer.timeit(number) < min_time:\n"
+        "        number *= 2\n"
+        "    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6\n\n"
+        "\n"
+        "def run(repeat: int, min_time: float, selected: str | None) -> dict:\n"
+        "    results = {}\n"
+        "    for name, function in _cases().items():\n"
+        "        if selected and selected not in name:\n"
+        "            continue\n"
+        "        try:\n"
+        "            function()\n"
+        "        except Exception as exc:\n"
+        "            results[name] = {\"skipped\": f\"{type(exc).__name__}: {exc}\"}\n"
+        "            print(f\"  {name:<44} skipped ({type(exc).__name__})\")\n"
+        "            continue\n"
+        "        micros = _measure(function, repeat, min_time)\n"
+        "        results[name] = {\"us_per_call\": round(micros, 4)}\n"
+        "        print(f\"  {name:<44} {micros:10.3f} us\")\n"
+        "    return results\n\n"
+        "\n"
+        "def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:\n"
+        "    regressions = []\n"
+        "    print(f\"\\n{'case':<44} {'baseline':>10} {'current':>10} {'change':>8}\")\n"
+        "    for name, current in results.items():\n"
+        "        before = baseline.get(\"results\", {}).get(name, {})\n"
+        "        if \"us_per_call\" not in current or \"us_per_call\" not in before:\n"
+        "            continue\n"
+        "        change = (current[\"us_per_call\"] / before[\"us_per_call\"] - 1) * 100\n"
+        "        flag = \"\"\n"
+        "        if change > max_regression:\n"
+        "            flag = \"  REGRESSION\"\n"
+        "            regressions.append(name)\n"
+        "        print(\n"
+        "            f\"{name:<44} {before['us_per_call']:10.3f} {current['us_per_call']:10.3f} \"\n"
+        "            f\"{change:+7.1f}%{flag}\"\n"
+        "        )\n"
+        "    return regressions\n\n"
+        "\n"
+        "def _parse_args() -> argparse.Namespace:\n"
+        "    parser = argparse.ArgumentParser(description=\"Benchmark the project's inference path.\")\n"
+        "    parser.add_argument(\n"
+        "        \"--compare\",\n"
+        "        action=\"store_true\",\n"
+        "        help=\"Compare against the baseline instead of overwriting it\",\n"
+        "    )\n"
+        "    parser.add_argument(\n"
+        "        \"--max-regression\",\n"
+        "        type=float,\n"
+        "        default=20.0,\n"
+        "        help=\"Percent slowdown per case that fails --compare\",\n"
+        "    )\n"
+        "    parser.add_argument(\"--baseline\", default=str(BASELINE_PATH), help=\"Baseline JSON file\")\n"
+        "    parser.add_argument(\"--repeat\", type=int, default=7, help=\"timeit repeats per case\")\n"
+        "    parser.add_argument(\n"
+        "        \"--min-time\",\n"
+        "        type=float,\n"
+        "        default=0.05,\n"
+        "        help=\"Minimum seconds per repeat; calls per repeat grow until it is reached\",\n"
+        "    )\n"
+        "    parser.add_argument(\n"
+        "        \"--budget\",\n"
+        "        type=float,\n"
+        "        help=\"Fail if any run_inference case takes longer than this many microseconds\",\n"
+        "    )\n"
+        "    parser.add_argument(\"--only\", help=\"Run only cases whose name contains this text\")\n"
+        "    return parser.parse_args()\n\n"
+        "\n"
+        "def main() -> None:\n"
+        "    args = _parse_args()\n"
+        "    baseline_path = Path(args.baseline)\n"
+        "    print(f\"Benchmarking inference in {PROJECT_ROOT} (Python {platform.python_version()})\")\n"
+        "    results = run(args.repeat, args.min_time, args.only)\n"
+        "    report = {\n"
+        "        \"created_at\": datetime.now(timezone.utc).isoformat(timespec=\"seconds\"),\n"
+        "        \"python\": platform.python_version(),\n"
+        "        \"platform\": platform.platform(),\n"
+        "        \"results\": results,\n"
+        "    }\n"
+        "    over_budget = []\n"
+        "    if args.budget is not None:\n"
+        "        over_budget = [\n"
+        "            name\n"
+        "            for name, result in results.items()\n"
+        "            if name.startswith(\"run_inference\") and result.get(\"us_per_call\", 0.0) > args.budget\n"
+        "        ]\n"
+        "        for name in over_budget:\n"
+        "            print(f\"{name} takes {results[name]['us_per_call']:.3f} us, over the budget\")\n"
+        "    if not args.compare:\n"
+        "        if args.only and baseline_path.exists():\n"
+        "            previous = json.loads(baseline_path.read_text(encoding=\"utf-8\"))\n"
+        "            report[\"results\"] = {**previous.get(\"results\", {}), **results}\n"
+        "        baseline_path.write_text(json.dumps(report, indent=2) + \"\\n\", encoding=\"utf-8\")\n"
+        "        print(f\"\\nBaseline written to {baseline_path}\")\n"
+        "        if over_budget:\n"
+        "            sys.exit(1)\n"
+        "        return\n"
+        "    if not baseline_path.exists():\n"
+        "        raise SystemExit(f\"No baseline at {baseline_path}; run without --compare first.\")\n"
+        "    baseline = json.loads(baseline_path.read_text(encoding=\"utf-8\"))\n"
+        "    if baseline.get(\"platform\") != report[\"platform\"] or baseline.get(\"python\") != report[\"python\"]:\n"
+        "        print(\n"
+        "            f\"\\nNote: the baseline was recorded on {baseline.get('platform')} with Python \"\n"
+        "            f\"{baseline.get('python')}; timings may not be comparable.\"\n"
+        "        )\n"
+        "    regressions = compare(results, baseline, args.max_regression)\n"
+        "    if regressions:\n"
+        "        print(f\"\\n{len(regressions)} case(s) regressed by more than {args.max_regression:g}%.\")\n"
+        "    else:\n"
+        "        print(f\"\\nNo case regressed by more than {args.max_regression:g}%.\")\n"
+        "    if regressions or over_budget:\n"
+        "        sys.exit(1)\n\n"
+        "\n"
+        "if __name__ == \"__main__\":\n"
+        "    main()\n",
+        encoding="utf-8",
+    )
+
+    files.write_text(
+        simulations_dir / "__init__.py",
         "\"\"\"Manual anomaly simulation runners.\"\"\"\n",
         encoding="utf-8",
     )
 
-    (simulations_dir / "base_simulation.py").write_text(
+    files.write_text(
+        simulations_dir / "base_simulation.py",
         "from __future__ import annotations\n\n"
         "import random\n"
         "import json\n"
         "import socket\n"
+        "import sys\n"
         "import time\n"
         "from typing import Callable\n\n"
+        "from sensors.wire import encode_sample\n\n"
         "\n"
         "def jitter(value: float, spread: float) -> float:\n"
         "    return round(value + random.uniform(-spread, spread), 2)\n\n"
         "\n"
-        "def run_simulation(payload_fn: Callable[[int], dict], host: str = \"127.0.0.1\", port: int = 5055) -> None:\n"
-        "    \"\"\"Send baseline data for 5s, then anomaly data for 5s.\"\"\"\n"
+        "def _format_from_argv() -> str:\n"
+        "    for arg in sys.argv[1:]:\n"
+        "        if arg.startswith(\"--format=\"):\n"
+        "            return arg.split(\"=\", 1)[1]\n"
+        "    return \"json\"\n\n"
+        "\n"
+        "def run_simulation(\n"
+        "    payload_fn: Callable[[int], dict],\n"
+        "    host: str = \"127.0.0.1\",\n"
+        "    port: int = 5055,\n"
+        "    wire_format: str | None = None,\n"
+        ") -> None:\n"
+        "    \"\"\"Send baseline data for 5s, then anomaly data for 5s.\n\n"
+        "    `wire_format` is \"json\" or \"binary\"; it defaults to `--format=` on the\n"
+        "    command line.\n"
+        "    \"\"\"\n"
+        "    wire_format = wire_format or _format_from_argv()\n"
+        "    sequence = 0\n"
         "    start = time.time()\n"
         "    print(f\"Sending data to {host}:{port} (first 5s normal, next 5s anomaly)...\")\n"
         "    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:\n"
@@ -423,14 +1384,20 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         "            elapsed = time.time() - start\n"
         "            phase = 0 if elapsed < 5 else 1\n"
         "            payload = payload_fn(phase)\n"
-        "            sock.sendto(json.dumps(payload).encode(\"utf-8\"), (host, port))\n"
+        "            if wire_format == \"binary\":\n"
+        "                message = encode_sample(payload, sequence=sequence)\n"
+        "            else:\n"
+        "                message = json.dumps(payload).encode(\"utf-8\")\n"
+        "            sock.sendto(message, (host, port))\n"
+        "            sequence += 1\n"
         "            time.sleep(0.5)\n"
         "            if elapsed >= 10:\n"
         "                break\n",
         encoding="utf-8",
     )
 
-    (simulations_dir / "run_tachycardia.py").write_text(
+    files.write_text(
+        simulations_dir / "run_tachycardia.py",
         "from simulations.base_simulation import jitter, run_simulation\n\n"
         "\n"
         "def _payload(phase: int) -> dict:\n"
@@ -447,7 +1414,8 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (simulations_dir / "run_bradycardia.py").write_text(
+    files.write_text(
+        simulations_dir / "run_bradycardia.py",
         "from simulations.base_simulation import jitter, run_simulation\n\n"
         "\n"
         "def _payload(phase: int) -> dict:\n"
@@ -464,7 +1432,8 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (simulations_dir / "run_fever.py").write_text(
+    files.write_text(
+        simulations_dir / "run_fever.py",
         "from simulations.base_simulation import jitter, run_simulation\n\n"
         "\n"
         "def _payload(phase: int) -> dict:\n"
@@ -481,7 +1450,8 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (simulations_dir / "run_heart_attack.py").write_text(
+    files.write_text(
+        simulations_dir / "run_heart_attack.py",
         "from simulations.base_simulation import jitter, run_simulation\n\n"
         "\n"
         "def _payload(phase: int) -> dict:\n"
@@ -499,7 +1469,8 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (simulations_dir / "run_cardiac_arrest.py").write_text(
+    files.write_text(
+        simulations_dir / "run_cardiac_arrest.py",
         "from simulations.base_simulation import jitter, run_simulation\n\n"
         "\n"
         "def _payload(phase: int) -> dict:\n"
@@ -516,17 +1487,32 @@ def create_project(config: ProjectConfig, output_dir: Path) -> Path:
         encoding="utf-8",
     )
 
-    (simulated_dir / "README.md").write_text(
+    files.write_text(sensors_dir / "wire.py", inspect.getsource(wire), encoding="utf-8")
+
+    files.write_text(
+        simulated_dir / "README.md",
         "# Simulated Sensors\n\n"
         "Use this folder to extend simulated sensor generation for testing.\n",
         encoding="utf-8",
     )
 
     for environment in config.environments:
-        (env_dir / f"{environment}.md").write_text(
+        files.write_text(
+            env_dir / f"{environment}.md",
             f"# {environment.replace('_', ' ').title()} Setup\n\n"
+            f"`altrus run` tunes itself with the runtime profile in `{environment}.yaml` "
+            "when this is the first environment in config/wristband_config.yaml, or "
+            f"with `altrus run --profile-env {environment}`. Options given on the "
+            "command line override the profile.\n\n"
             "Document environment-specific setup steps here.\n",
             encoding="utf-8",
         )
+        # Environments without a built-in profile start from the linux one.
+        profile = ENVIRONMENT_PROFILES.get(environment, ENVIRONMENT_PROFILES["linux"])
+        files.write_text(
+            profile_path(project_dir, environment),
+            profile_yaml(environment, profile),
+            encoding="utf-8",
+        )
 
-    return project_dir
+    return files.finish()
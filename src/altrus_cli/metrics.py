@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+STAGES = ("receive", "decode", "window", "inference", "output")
+# Upper bounds in seconds, 1us to 1s in 1-2.5-5 steps.
+DEFAULT_BUCKETS = (
+    1e-6,
+    2.5e-6,
+    5e-6,
+    1e-5,
+    2.5e-5,
+    5e-5,
+    1e-4,
+    2.5e-4,
+    5e-4,
+    1e-3,
+    2.5e-3,
+    5e-3,
+    1e-2,
+    2.5e-2,
+    5e-2,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket histogram whose `observe` is a bisect and two adds.
+
+    There is no lock: each histogram is written only by the thread running the
+    receive loop, and a scrape that races a write sees counts at most one
+    observation apart, which Prometheus tolerates.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class ScannerMetrics:
+    """Per-stage latency histograms and counters for one scanner process.
+
+    `receive` times each socket read after the socket became readable (one
+    read may return many frames); the other stages are timed once per frame.
+    Values registered with `register` are read only when rendering.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.stages = {stage: Histogram(buckets) for stage in STAGES}
+        self.frames = 0
+        self.decode_errors = 0
+        self.predictions = 0
+        self.anomalies = 0
+        self._readings: list[tuple[str, str, str, Callable[[], float]]] = []
+        for name, help_text, attribute in (
+            ("altrus_frames_total", "Frames handed to the payload handler.", "frames"),
+            ("altrus_decode_errors_total", "Frames that did not decode.", "decode_errors"),
+            ("altrus_predictions_total", "Payloads scored by run_inference.", "predictions"),
+            ("altrus_anomalies_total", "Predictions flagged as anomalies.", "anomalies"),
+        ):
+            self.register(name, "counter", help_text, partial(getattr, self, attribute))
+
+    def register(
+        self, name: str, kind: str, help_text: str, read: Callable[[], float]
+    ) -> None:
+        """Expose `read()` as a `kind` ("counter" or "gauge") metric called `name`."""
+        self._readings.append((name, kind, help_text, read))
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP altrus_stage_duration_seconds Time spent in each scanner stage.",
+            "# TYPE altrus_stage_duration_seconds histogram",
+        ]
+        name = "altrus_stage_duration_seconds"
+        for stage, histogram in self.stages.items():
+            label = f'stage="{stage}"'
+            counts = list(histogram.counts)
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label}}} {histogram.sum!r}")
+            lines.append(f"{name}_count{{{label}}} {cumulative}")
+        for name, kind, help_text, read in self._readings:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: ScannerMetrics
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", _CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def serve_metrics(metrics: ScannerMetrics, host: str, port: int) -> ThreadingHTTPServer:
+    """Serve `metrics` at http://host:port/metrics from a daemon thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="altrus-metrics", daemon=True).start()
+    return server
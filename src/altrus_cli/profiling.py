@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+PROFILERS = ("cprofile", "sampling")
+DEFAULT_PROFILE_SECONDS = 30.0
+DEFAULT_SAMPLE_INTERVAL = 0.005
+_TRACEBACK_FRAMES = 25
+_TOP_STATS = 25
+
+
+class SamplingProfiler:
+    """Sample one thread's Python stack from a background thread.
+
+    Stacks are counted in the collapsed format flame graph tools read
+    (`outer;inner;leaf count`). The profiled thread runs unmodified; the cost
+    is the sampler taking the GIL every `interval` seconds.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def enable(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="altrus-sampler", daemon=True)
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def dump(self, path: Path) -> None:
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                filename = Path(code.co_filename).name
+                names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+class ScannerProfiler:
+    """Profile a running scanner on demand and write the results to `output_dir`.
+
+    SIGUSR1 starts a profile of the receive loop (which runs in the main
+    thread) and a second SIGUSR1, or `seconds` elapsing, stops it. cProfile
+    writes `profile-*.pstats`; the sampling profiler writes
+    `profile-*.collapsed`. SIGUSR2 starts tracemalloc on first use and after
+    that writes a snapshot plus a top-allocations diff against the first
+    snapshot. Nothing is hooked into the receive loop while no profile runs.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        profiler: str = "cprofile",
+        seconds: float = DEFAULT_PROFILE_SECONDS,
+        memory_interval: float = 0.0,
+    ) -> None:
+        if profiler not in PROFILERS:
+            raise ValueError(f"unknown profiler {profiler!r}")
+        self.output_dir = output_dir
+        self.profiler = profiler
+        self.seconds = seconds
+        self.memory_interval = memory_interval
+        self._active: cProfile.Profile | SamplingProfiler | None = None
+        self._started_at = 0.0
+        self._baseline: tracemalloc.Snapshot | None = None
+        # Reentrant: SIGUSR2 may arrive while the main thread is taking a snapshot.
+        self._memory_lock = threading.RLock()
+        self._stop_memory = threading.Event()
+
+    def install(self) -> None:
+        """Register the signal handlers; a no-op where SIGUSR1 does not exist."""
+        if not hasattr(signal, "SIGUSR1"):
+            return
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.toggle())
+        signal.signal(signal.SIGUSR2, lambda signum, frame: self.snapshot_memory())
+        signal.signal(signal.SIGALRM, lambda signum, frame: self.stop())
+        print(
+            f"Profiling: kill -USR1 {os.getpid()} to profile for {self.seconds:g}s, "
+            f"kill -USR2 {os.getpid()} for a memory snapshot."
+        )
+
+    def start_memory_tracing(self) -> None:
+        """Start tracemalloc now and write a snapshot every `memory_interval` seconds."""
+        self.snapshot_memory()
+        if self.memory_interval > 0:
+            threading.Thread(target=self._snapshot_periodically, daemon=True).start()
+
+    def toggle(self) -> None:
+        if self._active is None:
+            self.start()
+        else:
+            self.stop()
+
+    def start(self) -> None:
+        """Start profiling; must be called from the main thread."""
+        if self._active is not None:
+            return
+        if self.profiler == "cprofile":
+            self._active = cProfile.Profile()
+        else:
+            self._active = SamplingProfiler(threading.main_thread().ident)
+        self._started_at = time.monotonic()
+        self._active.enable()
+        if self.seconds > 0 and hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        print(f"[profile] {self.profiler} profiler started")
+
+    def stop(self) -> None:
+        if self._active is None:
+            return
+        active, self._active = self._active, None
+        active.disable()
+        if hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        elapsed = time.monotonic() - self._started_at
+        path = self._path("profile", "pstats" if self.profiler == "cprofile" else "collapsed")
+        if isinstance(active, SamplingProfiler):
+            active.dump(path)
+            samples = sum(active.stacks.values())
+            print(f"[profile] {samples} samples over {elapsed:.1f}s written to {path}")
+            return
+        active.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(active, stream=summary).sort_stats("cumulative").print_stats(15)
+        print(f"[profile] {elapsed:.1f}s profile written to {path}")
+        print(summary.getvalue().rstrip())
+
+    def snapshot_memory(self) -> None:
+        with self._memory_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(_TRACEBACK_FRAMES)
+                self._baseline = _take_snapshot()
+                print("[memory] tracemalloc started; later snapshots are diffed against now")
+                return
+            snapshot = _take_snapshot()
+            path = self._path("memory", "tracemalloc")
+            snapshot.dump(str(path))
+            report = path.with_suffix(".txt")
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"traced memory: current={current} bytes peak={peak} bytes", ""]
+            lines.extend(
+                str(stat)
+                for stat in snapshot.compare_to(self._baseline, "lineno")[:_TOP_STATS]
+            )
+            report.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            print(
+                f"[memory] current={current / 1e6:.1f}MB peak={peak / 1e6:.1f}MB "
+                f"written to {report}"
+            )
+
+    def close(self) -> None:
+        self.stop()
+        self._stop_memory.set()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _snapshot_periodically(self) -> None:
+        while not self._stop_memory.wait(self.memory_interval):
+            self.snapshot_memory()
+
+    def _path(self, prefix: str, suffix: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return self.output_dir / f"{prefix}-{stamp}-{os.getpid()}.{suffix}"
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
@@ -1,18 +1,65 @@
 from __future__ import annotations
 
+import inspect
 import json
+import os
+import select
 import socket
 import sys
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable
+
+from altrus_cli.async_engine import run_asyncio_engine
+from altrus_cli.decoder import PayloadDecoder, schema_fields
+from altrus_cli.environments import (
+    ENVIRONMENT_PROFILES,
+    RuntimeProfile,
+    load_profile,
+    profile_path,
+)
+from altrus_cli.framing import DEFAULT_MAX_FRAME_SIZE, FrameBuffer, FrameTooLarge
+from altrus_cli.metrics import ScannerMetrics, serve_metrics
+from altrus_cli.profiling import DEFAULT_PROFILE_SECONDS, ScannerProfiler
+from altrus_cli.sinks import (
+    DEFAULT_KEEP_FILES,
+    DEFAULT_MAX_FILE_AGE,
+    DEFAULT_MAX_FILE_BYTES,
+    BackgroundSink,
+    RotatingFileWriter,
+    TerminalSink,
+)
+from altrus_cli.udp import (
+    DEFAULT_BATCH_SIZE,
+    UdpReceiver,
+    kernel_drops,
+    set_receive_buffer,
+    split_datagram,
+)
+from altrus_cli.windows import (
+    DEFAULT_MAX_DEVICES,
+    DEFAULT_WINDOW_SIZE,
+    WINDOW_DTYPES,
+    WindowStore,
+    max_devices_for,
+)
+from altrus_cli.wire import WireError, decode_sample, is_binary
 
 
 @dataclass
 class RuntimeConfig:
     activities: list[str]
     anomalies: list[str]
+    sensors: list[str] = field(default_factory=list)
+    environments: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ScannerCounters:
+    samples: int = 0
+    anomalies: int = 0
 
 
 DEFAULT_ACTIVITIES = ["sleep", "rest", "walk", "run"]
@@ -25,29 +72,14 @@ DEFAULT_ANOMALIES = [
 ]
 
 
-def _format_payload(payload: dict) -> str:
-    parts = []
-    if "heart_rate" in payload:
-        parts.append(f"hr={payload['heart_rate']}")
-    if "body_temperature" in payload:
-        parts.append(f"temp={payload['body_temperature']}")
-    if all(key in payload for key in ("accel_x", "accel_y", "accel_z")):
-        parts.append(
-            "acc=({:.2f},{:.2f},{:.2f})".format(
-                payload["accel_x"], payload["accel_y"], payload["accel_z"]
-            )
-        )
-    if not parts:
-        parts.append(f"payload={payload}")
-    return " ".join(parts)
-
-
 def _load_config(path: Path) -> RuntimeConfig:
     if not path.exists():
-        return RuntimeConfig(activities=DEFAULT_ACTIVITIES)
+        return RuntimeConfig(activities=DEFAULT_ACTIVITIES, anomalies=DEFAULT_ANOMALIES)
 
     activities: list[str] = []
     anomalies: list[str] = []
+    sensors: list[str] = []
+    environments: list[str] = []
     current_key: str | None = None
     for line in path.read_text(encoding="utf-8").splitlines():
         stripped = line.strip()
@@ -60,94 +92,559 @@ def _load_config(path: Path) -> RuntimeConfig:
             activities.append(stripped.lstrip("-").strip())
         if stripped.startswith("-") and current_key == "anomalies":
             anomalies.append(stripped.lstrip("-").strip())
+        if stripped.startswith("-") and current_key == "sensors":
+            sensors.append(stripped.lstrip("-").strip())
+        if stripped.startswith("-") and current_key == "environments":
+            environments.append(stripped.lstrip("-").strip())
 
     return RuntimeConfig(
         activities=activities or DEFAULT_ACTIVITIES,
         anomalies=anomalies or DEFAULT_ANOMALIES,
+        sensors=sensors,
+        environments=environments,
+    )
+
+
+def load_environment_profile(
+    project_root: Path, environment: str | None = None
+) -> tuple[str, RuntimeProfile] | None:
+    """Return the runtime profile `altrus run` uses and the environment it belongs to.
+
+    Without `environment`, the first one listed in the project's config is
+    used, and None is returned when there is none or it has no profile.
+    `environments/<name>.yaml` wins over the built-in profile of that name.
+    """
+    requested = environment
+    if environment is None:
+        configured = _load_config(project_root / "config" / "wristband_config.yaml")
+        if not configured.environments:
+            return None
+        environment = configured.environments[0]
+    path = profile_path(project_root, environment)
+    builtin = ENVIRONMENT_PROFILES.get(environment)
+    if path.exists():
+        return environment, load_profile(path, builtin)
+    if builtin is not None:
+        return environment, builtin
+    if requested is None:
+        return None
+    raise ValueError(
+        f"no runtime profile for {environment!r}: create {path} "
+        f"or use one of {', '.join(ENVIRONMENT_PROFILES)}"
     )
 
 
-def _run_with_udp(host: str, port: int, handle_payload: callable) -> None:
+class ConfigWatcher:
+    """Pick up edits to the `activities` and `anomalies` lists without a restart.
+
+    A daemon thread stats the config file every `interval` seconds and swaps
+    new lists into `config`, so the receive loop never touches the file system.
+    """
+
+    def __init__(self, path: Path, config: RuntimeConfig, interval: float = 1.0) -> None:
+        self.path = path
+        self.config = config
+        self.interval = interval
+        self._signature = _file_signature(path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="altrus-config", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            signature = _file_signature(self.path)
+            if signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                reloaded = _load_config(self.path)
+            except (OSError, UnicodeDecodeError) as exc:
+                print(f"[config] could not reload {self.path}: {exc}")
+                continue
+            config = self.config
+            if (
+                reloaded.activities == config.activities
+                and reloaded.anomalies == config.anomalies
+            ):
+                continue
+            # Swap whole lists so a frame being scored keeps a consistent copy.
+            config.activities = reloaded.activities
+            config.anomalies = reloaded.anomalies
+            print(f"[config] reloaded: anomalies={', '.join(config.anomalies)}")
+
+
+def _file_signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _enable_reuse_port(sock: socket.socket) -> None:
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise OSError("SO_REUSEPORT is not supported on this platform")
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+
+def _run_with_udp(
+    host: str,
+    port: int,
+    handle_payload: callable,
+    receive_buffer: int | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    stats_interval: float = 5.0,
+    reuse_port: bool = False,
+    observe_receive: Callable[[float], None] | None = None,
+) -> None:
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        if reuse_port:
+            _enable_reuse_port(sock)
+        if receive_buffer:
+            set_receive_buffer(sock, receive_buffer)
         sock.bind((host, port))
-        sock.settimeout(1.0)
+        receiver = UdpReceiver(sock, batch_size, observe=observe_receive)
+        rcvbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        datagrams = 0
+        samples = 0
+        last_report = time.monotonic()
+        last_samples = 0
+        last_drops = None
         while True:
-            try:
-                data, _ = sock.recvfrom(4096)
-            except socket.timeout:
-                continue
-            handle_payload(data)
+            for datagram in receiver.receive(timeout=1.0):
+                datagrams += 1
+                for frame in split_datagram(datagram):
+                    samples += 1
+                    handle_payload(frame)
+            now = time.monotonic()
+            if stats_interval > 0 and now - last_report >= stats_interval:
+                drops = kernel_drops(sock.getsockname()[1])
+                if samples != last_samples or drops != last_drops:
+                    print(
+                        f"[udp] datagrams={datagrams} samples={samples} "
+                        f"samples/sec={(samples - last_samples) / (now - last_report):.1f} "
+                        f"kernel_drops={'n/a' if drops is None else drops} "
+                        f"rcvbuf={rcvbuf} recv={receiver.method}"
+                    )
+                last_report = now
+                last_samples = samples
+                last_drops = drops
 
 
-def _run_with_tcp(host: str, port: int, handle_payload: callable) -> None:
+def _run_with_tcp(
+    host: str,
+    port: int,
+    handle_payload: callable,
+    framing: str = "line",
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    reuse_port: bool = False,
+    observe_receive: Callable[[float], None] | None = None,
+) -> None:
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        if reuse_port:
+            _enable_reuse_port(sock)
         sock.bind((host, port))
         sock.listen(1)
         sock.settimeout(1.0)
         while True:
             try:
-                conn, _ = sock.accept()
+                conn, address = sock.accept()
             except socket.timeout:
                 continue
             with conn:
                 conn.settimeout(1.0)
-                buffer = b""
+                frames = FrameBuffer(framing, max_frame_size)
                 while True:
                     try:
-                        chunk = conn.recv(4096)
+                        if observe_receive is None:
+                            received = frames.recv_into(conn)
+                        else:
+                            # Wait first so the timing covers only the read itself.
+                            if not select.select([conn], [], [], 1.0)[0]:
+                                continue
+                            started = time.perf_counter()
+                            received = frames.recv_into(conn)
+                            observe_receive(time.perf_counter() - started)
                     except socket.timeout:
                         continue
-                    if not chunk:
+                    if not received:
+                        break
+                    try:
+                        for frame in frames.frames():
+                            handle_payload(frame)
+                    except FrameTooLarge as exc:
+                        print(f"Closing connection from {address[0]}: {exc}")
                         break
-                    buffer += chunk
-                    while b"\n" in buffer:
-                        line, buffer = buffer.split(b"\n", 1)
-                        handle_payload(line)
 
 
-def run_scanner(
+@dataclass
+class StageTimes:
+    """Seconds spent in each step of payload handling, for replay reports."""
+
+    decode: float = 0.0
+    window: float = 0.0
+    inference: float = 0.0
+    sinks: float = 0.0
+
+
+@dataclass
+class PayloadPipeline:
+    handle_payload: Callable[[bytes], None]
+    sinks: list
+    file_sink: BackgroundSink | None = None
+    model_stats: Callable[[], dict] | None = None
+    config_watcher: ConfigWatcher | None = None
+
+    def print_model_stats(self) -> None:
+        if self.model_stats is not None:
+            stats = self.model_stats()
+            print(
+                f"Models: loads={stats['loads']} reloads={stats['reloads']} "
+                f"failed_reloads={stats['failures']}"
+            )
+
+    def close(self) -> None:
+        if self.config_watcher is not None:
+            self.config_watcher.close()
+        for sink in self.sinks:
+            sink.close()
+        if self.file_sink is not None:
+            print(self.file_sink.format())
+
+
+def build_pipeline(
     project_root: Path,
-    protocol: str,
-    host: str,
-    port: int,
     output_interval: float,
-) -> None:
+    stats_interval: float = 5.0,
+    counters: ScannerCounters | None = None,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    window_dtype: str = "float64",
+    state_memory: int | None = None,
+    decoder: str = "auto",
+    sink_format: str = "ndjson",
+    sink_max_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    sink_max_age: float = DEFAULT_MAX_FILE_AGE,
+    sink_keep: int = DEFAULT_KEEP_FILES,
+    stage_times: StageTimes | None = None,
+    extra_sinks: list | None = None,
+    metrics: ScannerMetrics | None = None,
+    watch_config: bool = False,
+) -> PayloadPipeline:
+    """Load the project's models and return the frame handler the engines call.
+
+    Pass `stage_times` to accumulate per-stage timings, or `metrics` to record
+    per-stage histograms; both variants cost a few clock reads per frame, so
+    the live scanner uses them only when asked. With `watch_config`, edits to
+    the config's anomaly and activity lists apply to the following frames.
+    `state_memory` (bytes) bounds how many devices keep a sliding window.
+    """
     if str(project_root) not in sys.path:
         sys.path.insert(0, str(project_root))
-    from pipelines.inference import run_inference
+    import pipelines.inference as inference
 
-    config = _load_config(project_root / "config" / "wristband_config.yaml")
+    run_inference = inference.run_inference
+    model_stats = getattr(inference, "model_stats", None)
 
-    last_output = 0.0
+    config_path = project_root / "config" / "wristband_config.yaml"
+    config = _load_config(config_path)
+    config_watcher = None
+    if watch_config:
+        config_watcher = ConfigWatcher(config_path, config)
+        config_watcher.start()
 
-    def handle_payload(raw: bytes) -> None:
-        nonlocal last_output
+    decode_json = None
+    if decoder != "generic":
+        decode_json = PayloadDecoder(config.sensors, decoder).decode
+
+    windows = None
+    if window_size > 0:
+        if "window" in inspect.signature(run_inference).parameters:
+            typecode = WINDOW_DTYPES[window_dtype]
+            max_devices = DEFAULT_MAX_DEVICES
+            if state_memory is not None:
+                max_devices = max_devices_for(state_memory, window_size, typecode)
+            windows = WindowStore(window_size, max_devices, typecode)
+        else:
+            print("This project's run_inference takes no window; using per-sample inference.")
+
+    if counters is None:
+        counters = ScannerCounters()
+
+    file_sink = None
+    sinks = [TerminalSink(output_interval)]
+    if sink_format != "none":
+        file_sink = BackgroundSink(
+            RotatingFileWriter(
+                project_root / "data",
+                sink_format,
+                columns=schema_fields(config.sensors),
+                max_bytes=sink_max_bytes,
+                max_age=sink_max_age,
+                keep=sink_keep,
+            ),
+            report_interval=stats_interval,
+        )
+        sinks.append(file_sink)
+    sinks.extend(extra_sinks or ())
+
+    if metrics is not None:
+        if windows is not None:
+            metrics.register(
+                "altrus_window_devices",
+                "gauge",
+                "Devices with a sliding window.",
+                windows.__len__,
+            )
+        if file_sink is not None:
+            metrics.register(
+                "altrus_sink_pending",
+                "gauge",
+                "Predictions queued for the file sink.",
+                lambda: file_sink.pending,
+            )
+            metrics.register(
+                "altrus_sink_dropped_total",
+                "counter",
+                "Predictions the file sink dropped.",
+                lambda: file_sink.dropped,
+            )
+
+    def decode(raw: bytes) -> dict | None:
+        if is_binary(raw):
+            try:
+                return decode_sample(raw)
+            except WireError:
+                return None
+        if decode_json is not None:
+            return decode_json(raw)
         try:
             payload = json.loads(raw.decode("utf-8"))
-        except json.JSONDecodeError:
+        except ValueError:
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def handle_payload(raw: bytes) -> None:
+        payload = decode(raw)
+        if payload is None:
             return
-        if not isinstance(payload, dict):
+        if windows is None:
+            prediction = run_inference(payload, config.activities, config.anomalies)
+        else:
+            prediction = run_inference(
+                payload,
+                config.activities,
+                config.anomalies,
+                window=windows.update(payload),
+            )
+        counters.samples += 1
+        if prediction["anomaly"]:
+            counters.anomalies += 1
+        received_at = time.time()
+        for sink in sinks:
+            sink.write(received_at, payload, prediction)
+
+    def handle_payload_timed(raw: bytes) -> None:
+        clock = time.perf_counter
+        started = clock()
+        payload = decode(raw)
+        decoded = clock()
+        stage_times.decode += decoded - started
+        if payload is None:
             return
-        prediction = run_inference(payload, config.activities, config.anomalies)
-        now = time.time()
-        if now - last_output >= output_interval:
-            status = "ANOMALY" if prediction["anomaly"] else "normal"
-            summary = _format_payload(payload)
-            print(
-                f"{summary} -> {status} "
-                f"activity={prediction['activity']} "
-                f"type={prediction['anomaly_type']} (score={prediction['score']})"
+        window = None if windows is None else windows.update(payload)
+        windowed = clock()
+        stage_times.window += windowed - decoded
+        if windows is None:
+            prediction = run_inference(payload, config.activities, config.anomalies)
+        else:
+            prediction = run_inference(
+                payload, config.activities, config.anomalies, window=window
+            )
+        predicted = clock()
+        stage_times.inference += predicted - windowed
+        counters.samples += 1
+        if prediction["anomaly"]:
+            counters.anomalies += 1
+        received_at = time.time()
+        for sink in sinks:
+            sink.write(received_at, payload, prediction)
+        stage_times.sinks += clock() - predicted
+
+    def handle_payload_metered(raw: bytes) -> None:
+        clock = time.perf_counter
+        started = clock()
+        metrics.frames += 1
+        payload = decode(raw)
+        decoded = clock()
+        observe_decode(decoded - started)
+        if payload is None:
+            metrics.decode_errors += 1
+            return
+        if windows is None:
+            windowed = decoded
+            prediction = run_inference(payload, config.activities, config.anomalies)
+        else:
+            window = windows.update(payload)
+            windowed = clock()
+            observe_window(windowed - decoded)
+            prediction = run_inference(
+                payload, config.activities, config.anomalies, window=window
             )
-            last_output = now
+        predicted = clock()
+        observe_inference(predicted - windowed)
+        counters.samples += 1
+        metrics.predictions += 1
+        if prediction["anomaly"]:
+            counters.anomalies += 1
+            metrics.anomalies += 1
+        received_at = time.time()
+        for sink in sinks:
+            sink.write(received_at, payload, prediction)
+        observe_output(clock() - predicted)
+
+    if stage_times is not None:
+        handler = handle_payload_timed
+    elif metrics is not None:
+        observe_decode = metrics.stages["decode"].observe
+        observe_window = metrics.stages["window"].observe
+        observe_inference = metrics.stages["inference"].observe
+        observe_output = metrics.stages["output"].observe
+        handler = handle_payload_metered
+    else:
+        handler = handle_payload
+
+    return PayloadPipeline(
+        handle_payload=handler,
+        sinks=sinks,
+        file_sink=file_sink,
+        model_stats=model_stats,
+        config_watcher=config_watcher,
+    )
+
+
+def run_scanner(
+    project_root: Path,
+    protocol: str,
+    host: str,
+    port: int,
+    output_interval: float,
+    engine: str = "blocking",
+    stats_interval: float = 5.0,
+    framing: str = "line",
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    receive_buffer: int | None = None,
+    udp_batch: int = DEFAULT_BATCH_SIZE,
+    reuse_port: bool = False,
+    counters: ScannerCounters | None = None,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    window_dtype: str = "float64",
+    state_memory: int | None = None,
+    decoder: str = "auto",
+    sink_format: str = "ndjson",
+    sink_max_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    sink_max_age: float = DEFAULT_MAX_FILE_AGE,
+    sink_keep: int = DEFAULT_KEEP_FILES,
+    extra_sinks: list | None = None,
+    metrics_host: str = "127.0.0.1",
+    metrics_port: int | None = None,
+    profile: bool = False,
+    profiler: str = "cprofile",
+    profile_seconds: float = DEFAULT_PROFILE_SECONDS,
+    trace_memory: float | None = None,
+) -> None:
+    metrics = None
+    metrics_server = None
+    if metrics_port is not None:
+        metrics = ScannerMetrics()
+        metrics_server = serve_metrics(metrics, metrics_host, metrics_port)
+        print(f"Serving metrics at http://{metrics_host}:{metrics_port}/metrics")
+    observe_receive = None if metrics is None else metrics.stages["receive"].observe
+
+    pipeline = build_pipeline(
+        project_root,
+        output_interval,
+        stats_interval=stats_interval,
+        counters=counters,
+        window_size=window_size,
+        window_dtype=window_dtype,
+        state_memory=state_memory,
+        decoder=decoder,
+        sink_format=sink_format,
+        sink_max_bytes=sink_max_bytes,
+        sink_max_age=sink_max_age,
+        sink_keep=sink_keep,
+        extra_sinks=extra_sinks,
+        metrics=metrics,
+        watch_config=True,
+    )
+    handle_payload = pipeline.handle_payload
 
-    print(
-        f"Listening for {protocol.upper()} sensor data on {host}:{port}. "
-        "Press Ctrl+C to stop."
+    if engine == "asyncio":
+        print(
+            f"Listening for TCP and UDP sensor data on {host}:{port} (asyncio engine). "
+            "Press Ctrl+C to stop."
+        )
+    else:
+        print(
+            f"Listening for {protocol.upper()} sensor data on {host}:{port}. "
+            "Press Ctrl+C to stop."
+        )
+    profiling = ScannerProfiler(
+        project_root / "data",
+        profiler,
+        seconds=profile_seconds,
+        memory_interval=trace_memory or 0.0,
     )
+    profiling.install()
+    if trace_memory is not None:
+        profiling.start_memory_tracing()
+    if profile:
+        profiling.start()
     try:
-        if protocol == "udp":
-            _run_with_udp(host, port, handle_payload)
+        if engine == "asyncio":
+            run_asyncio_engine(
+                host,
+                port,
+                handle_payload,
+                report_interval=stats_interval,
+                framing=framing,
+                max_frame_size=max_frame_size,
+                receive_buffer=receive_buffer,
+                reuse_port=reuse_port,
+                observe_receive=observe_receive,
+            )
+        elif protocol == "udp":
+            _run_with_udp(
+                host,
+                port,
+                handle_payload,
+                receive_buffer=receive_buffer,
+                batch_size=udp_batch,
+                stats_interval=stats_interval,
+                reuse_port=reuse_port,
+                observe_receive=observe_receive,
+            )
         else:
-            _run_with_tcp(host, port, handle_payload)
+            _run_with_tcp(
+                host,
+                port,
+                handle_payload,
+                framing,
+                max_frame_size,
+                reuse_port=reuse_port,
+                observe_receive=observe_receive,
+            )
     except KeyboardInterrupt:
         print("\nScanner stopped.")
+        pipeline.print_model_stats()
+    finally:
+        profiling.close()
+        pipeline.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+MANIFEST_PATH = Path(".altrus") / "manifest.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class GenerationReport:
+    project_dir: Path
+    created: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        counts = [
+            f"{len(self.created)} created",
+            f"{len(self.updated)} updated",
+            f"{len(self.unchanged)} unchanged",
+        ]
+        if self.skipped:
+            counts.append(f"{len(self.skipped)} modified and kept ({', '.join(self.skipped)})")
+        return ", ".join(counts)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ScaffoldWriter:
+    """Write template outputs into a project, touching only what changed.
+
+    `.altrus/manifest.json` records the SHA-256 of every file as last
+    generated. A file whose content already matches the template is left
+    alone; one still matching its recorded hash is rewritten with the new
+    template; any other existing file was edited by hand (or predates the
+    manifest) and is kept unless `force` is set.
+    """
+
+    def __init__(self, project_dir: Path, force: bool = False) -> None:
+        self.project_dir = project_dir
+        self.force = force
+        self.report = GenerationReport(project_dir)
+        self._manifest_path = project_dir / MANIFEST_PATH
+        self._recorded = self._load_manifest()
+        self._hashes: dict[str, str] = {}
+
+    def _load_manifest(self) -> dict[str, str]:
+        try:
+            data = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return dict(data.get("files", {}))
+
+    def write_text(self, path: Path, text: str, encoding: str = "utf-8") -> None:
+        self.write_bytes(path, text.encode(encoding))
+
+    def write_bytes(self, path: Path, data: bytes) -> None:
+        name = path.relative_to(self.project_dir).as_posix()
+        digest = _digest(data)
+        try:
+            current = _digest(path.read_bytes())
+        except FileNotFoundError:
+            current = None
+        if current == digest:
+            self.report.unchanged.append(name)
+        elif current is None:
+            path.write_bytes(data)
+            self.report.created.append(name)
+        elif current == self._recorded.get(name) or self.force:
+            path.write_bytes(data)
+            self.report.updated.append(name)
+        else:
+            self.report.skipped.append(name)
+            if name in self._recorded:
+                # Keep the last generated hash so the file still counts as edited.
+                self._hashes[name] = self._recorded[name]
+            return
+        self._hashes[name] = digest
+
+    def finish(self) -> GenerationReport:
+        self._manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "files": dict(sorted(self._hashes.items()))}
+        self._manifest_path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+        return self.report
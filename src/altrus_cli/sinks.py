@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+SINK_FORMATS = ("ndjson", "csv", "none")
+DEFAULT_QUEUE_SIZE = 100000
+DEFAULT_MAX_FILE_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_FILE_AGE = 3600.0
+DEFAULT_KEEP_FILES = 24
+
+PREDICTION_FIELDS = ("activity", "anomaly", "anomaly_type", "score")
+
+
+def _reading(value: object, spec: str = "g") -> str:
+    # Null or non-numeric readings reach the terminal as-is instead of failing the format.
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return format(value, spec)
+    return str(value)
+
+
+def _format_payload(payload: dict) -> str:
+    parts = []
+    if "heart_rate" in payload:
+        parts.append(f"hr={_reading(payload['heart_rate'])}")
+    if "body_temperature" in payload:
+        parts.append(f"temp={_reading(payload['body_temperature'])}")
+    if all(key in payload for key in ("accel_x", "accel_y", "accel_z")):
+        axes = ",".join(
+            _reading(payload[key], ".2f") for key in ("accel_x", "accel_y", "accel_z")
+        )
+        parts.append(f"acc=({axes})")
+    if not parts:
+        parts.append(f"payload={payload}")
+    return " ".join(parts)
+
+
+class TerminalSink:
+    """Print at most one prediction summary every `output_interval` seconds."""
+
+    def __init__(self, output_interval: float) -> None:
+        self.output_interval = output_interval
+        self._last_output = 0.0
+
+    def write(self, received_at: float, payload: dict, prediction: dict) -> None:
+        if received_at - self._last_output < self.output_interval:
+            return
+        status = "ANOMALY" if prediction["anomaly"] else "normal"
+        print(
+            f"{_format_payload(payload)} -> {status} "
+            f"activity={prediction['activity']} "
+            f"type={prediction['anomaly_type']} (score={prediction['score']})"
+        )
+        self._last_output = received_at
+
+    def close(self) -> None:
+        pass
+
+
+class RotatingFileWriter:
+    """Append prediction batches to NDJSON or CSV files under `directory`.
+
+    A new file is started once the current one reaches `max_bytes` or is
+    `max_age` seconds old, and only the newest `keep` files of this process
+    are kept. File names carry the start time and the process id, so several
+    scanner workers can share one directory.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        file_format: str = "ndjson",
+        columns: tuple[str, ...] = (),
+        max_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        max_age: float = DEFAULT_MAX_FILE_AGE,
+        keep: int = DEFAULT_KEEP_FILES,
+    ) -> None:
+        if file_format not in ("ndjson", "csv"):
+            raise ValueError(f"unknown sink format {file_format!r}")
+        self.directory = directory
+        self.file_format = file_format
+        self.columns = ("received_at", *columns, *PREDICTION_FIELDS)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep = keep
+        self.rotations = 0
+        self._file = None
+        self._opened_at = 0.0
+        self._size = 0
+        self._files: deque[Path] = deque()
+
+    @property
+    def path(self) -> Path | None:
+        return self._files[-1] if self._files else None
+
+    def write_batch(self, batch: list[tuple[float, dict, dict]]) -> None:
+        now = time.time()
+        if (
+            self._file is None
+            or self._size >= self.max_bytes
+            or now - self._opened_at >= self.max_age
+        ):
+            self._rotate(now)
+        if self.file_format == "csv":
+            data = self._encode_csv(batch)
+        else:
+            data = self._encode_ndjson(batch)
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self, now: float) -> None:
+        if self._file is not None:
+            self._file.close()
+            self.rotations += 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        path = self.directory / f"predictions-{stamp}-{os.getpid()}.{self.file_format}"
+        suffix = 1
+        while path.exists():
+            path = self.directory / (
+                f"predictions-{stamp}-{os.getpid()}-{suffix}.{self.file_format}"
+            )
+            suffix += 1
+        self._file = path.open("wb")
+        self._opened_at = now
+        self._size = 0
+        self._files.append(path)
+        while len(self._files) > self.keep:
+            self._files.popleft().unlink(missing_ok=True)
+        if self.file_format == "csv":
+            header = (",".join(self.columns) + "\n").encode("utf-8")
+            self._file.write(header)
+            self._size += len(header)
+
+    def _encode_ndjson(self, batch: list[tuple[float, dict, dict]]) -> bytes:
+        dumps = orjson.dumps if orjson is not None else _json_dumps
+        lines = []
+        for received_at, payload, prediction in batch:
+            record = {"received_at": received_at}
+            record.update(payload)
+            for name in PREDICTION_FIELDS:
+                record[name] = prediction[name]
+            anomalies = prediction.get("anomalies")
+            if anomalies:
+                record["anomalies"] = anomalies
+            lines.append(dumps(record))
+        lines.append(b"")
+        return b"\n".join(lines)
+
+    def _encode_csv(self, batch: list[tuple[float, dict, dict]]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        payload_columns = self.columns[1 : -len(PREDICTION_FIELDS)]
+        for received_at, payload, prediction in batch:
+            writer.writerow(
+                (
+                    received_at,
+                    *[payload.get(name, "") for name in payload_columns],
+                    *[prediction[name] for name in PREDICTION_FIELDS],
+                )
+            )
+        return buffer.getvalue().encode("utf-8")
+
+
+def _json_dumps(record: dict) -> bytes:
+    return json.dumps(record, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class BackgroundSink:
+    """Hand predictions to a writer thread without blocking the receive loop.
+
+    `write` only appends to a bounded in-memory queue; when the queue is full
+    the prediction is dropped and counted instead. The writer thread drains
+    the queue in batches of up to `batch_size` at least every `flush_interval`
+    seconds. `lag` is how old the oldest record of the last batch was when it
+    reached the file.
+    """
+
+    def __init__(
+        self,
+        writer: RotatingFileWriter,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = 1024,
+        flush_interval: float = 0.5,
+        report_interval: float = 5.0,
+    ) -> None:
+        self.writer = writer
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.report_interval = report_interval
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        # deque.append and popleft are atomic, so producer and writer share it
+        # without a lock.
+        self._queue: deque = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="altrus-sink", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def write(self, received_at: float, payload: dict, prediction: dict) -> None:
+        queue = self._queue
+        if len(queue) >= self.queue_size:
+            self.dropped += 1
+            return
+        queue.append((received_at, payload, prediction))
+        if len(queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self.writer.close()
+
+    def format(self) -> str:
+        return (
+            f"[sink] written={self.written} dropped={self.dropped} "
+            f"pending={self.pending} lag={self.lag:.3f}s max_lag={self.max_lag:.3f}s "
+            f"errors={self.errors} file={self.writer.path}"
+        )
+
+    def _run(self) -> None:
+        last_report = time.monotonic()
+        reported = (0, 0)
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            stopping = self._stopping
+            while self._queue:
+                self._flush()
+            now = time.monotonic()
+            if self.report_interval > 0 and now - last_report >= self.report_interval:
+                if (self.written, self.dropped) != reported:
+                    print(self.format())
+                    reported = (self.written, self.dropped)
+                last_report = now
+            if stopping:
+                return
+
+    def _flush(self) -> None:
+        queue = self._queue
+        batch = [queue.popleft() for _ in range(min(len(queue), self.batch_size))]
+        try:
+            self.writer.write_batch(batch)
+        except (OSError, TypeError, ValueError) as exc:
+            self.errors += 1
+            self.dropped += len(batch)
+            print(f"[sink] write failed, dropped {len(batch)} predictions: {exc}")
+            return
+        self.written += len(batch)
+        self.lag = time.time() - batch[0][0]
+        self.max_lag = max(self.max_lag, self.lag)
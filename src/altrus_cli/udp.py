@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import ctypes
+import errno
+import select
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from altrus_cli.wire import is_binary, split_binary
+
+MAX_DATAGRAM_SIZE = 65535
+DEFAULT_BATCH_SIZE = 64
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_recvmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        function = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    function.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+        ctypes.c_void_p,
+    ]
+    function.restype = ctypes.c_int
+    return function
+
+
+_recvmmsg = _load_recvmmsg()
+
+
+class UdpReceiver:
+    """Receive datagrams in batches into a preallocated buffer pool.
+
+    On Linux a single `recvmmsg` call fills up to `batch_size` buffers; other
+    platforms drain the socket with `recvfrom_into` after each wakeup. The
+    memoryviews returned by `receive` point into the pool and are only valid
+    until the next call. `observe`, if given, is called with the seconds each
+    read took, not counting the wait for the socket to become readable.
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        buffer_size: int = MAX_DATAGRAM_SIZE,
+        use_recvmmsg: bool = True,
+        observe: Callable[[float], None] | None = None,
+    ) -> None:
+        self._sock = sock
+        self._observe = observe
+        # Readiness comes from select(), so reads must never block.
+        sock.setblocking(False)
+        self._buffers = [bytearray(buffer_size) for _ in range(batch_size)]
+        self._views = [memoryview(buffer) for buffer in self._buffers]
+        self._messages = None
+        if use_recvmmsg and _recvmmsg is not None:
+            self._messages = (_MMsgHdr * batch_size)()
+            self._iovecs = (_IOVec * batch_size)()
+            for index, buffer in enumerate(self._buffers):
+                address = ctypes.addressof((ctypes.c_char * buffer_size).from_buffer(buffer))
+                self._iovecs[index].iov_base = address
+                self._iovecs[index].iov_len = buffer_size
+                self._messages[index].msg_hdr.msg_iov = ctypes.pointer(self._iovecs[index])
+                self._messages[index].msg_hdr.msg_iovlen = 1
+
+    @property
+    def method(self) -> str:
+        return "recvmmsg" if self._messages is not None else "recvfrom_into"
+
+    def receive(self, timeout: float) -> list[memoryview]:
+        readable, _, _ = select.select([self._sock], [], [], timeout)
+        if not readable:
+            return []
+        read = self._receive_mmsg if self._messages is not None else self._receive_drain
+        if self._observe is None:
+            return read()
+        started = time.perf_counter()
+        datagrams = read()
+        self._observe(time.perf_counter() - started)
+        return datagrams
+
+    def _receive_mmsg(self) -> list[memoryview]:
+        count = _recvmmsg(
+            self._sock.fileno(), self._messages, len(self._buffers), 0, None
+        )
+        if count < 0:
+            error = ctypes.get_errno()
+            if error in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(error, "recvmmsg failed")
+        return [self._views[index][: self._messages[index].msg_len] for index in range(count)]
+
+    def _receive_drain(self) -> list[memoryview]:
+        datagrams = []
+        for view in self._views:
+            try:
+                size, _ = self._sock.recvfrom_into(view)
+            except (BlockingIOError, InterruptedError):
+                break
+            datagrams.append(view[:size])
+        return datagrams
+
+
+def split_datagram(data: bytes | memoryview) -> list:
+    """Split a datagram carrying one or many samples into per-sample frames.
+
+    Binary datagrams may hold back-to-back binary samples; JSON datagrams may
+    hold newline-delimited objects (NDJSON).
+    """
+    if is_binary(data):
+        return split_binary(data)
+    data = bytes(data)
+    if b"\n" not in data:
+        return [data]
+    return [line for line in data.split(b"\n") if line.strip()]
+
+
+def set_receive_buffer(sock: socket.socket, size: int) -> int:
+    """Request an SO_RCVBUF of `size` bytes and return what the kernel granted.
+
+    Linux doubles the request for bookkeeping and caps it at
+    net.core.rmem_max, so raise that sysctl for very large buffers.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+
+def kernel_drops(port: int) -> int | None:
+    """Sum the kernel drop counters of UDP sockets bound to `port`.
+
+    Reads /proc/net/udp and /proc/net/udp6; returns None where they do not exist.
+    """
+    total = None
+    for name in ("udp", "udp6"):
+        path = Path("/proc/net") / name
+        try:
+            lines = path.read_text(encoding="ascii").splitlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 13:
+                continue
+            if int(fields[1].rsplit(":", 1)[1], 16) == port:
+                total = (total or 0) + int(fields[-1])
+    return total
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from array import array
+from collections import deque
+
+from altrus_cli.wire import FIELDS
+
+DEFAULT_WINDOW_SIZE = 10
+DEFAULT_MAX_DEVICES = 10000
+# array typecodes for the stored window values.
+WINDOW_DTYPES = {"float64": "d", "float32": "f"}
+
+_SENSOR_CHANNELS = frozenset(name for name in FIELDS if name != "fall_detected")
+# Numeric sensor fields plus the derived magnitude the activity model uses.
+WINDOW_CHANNELS = _SENSOR_CHANNELS | {"accel_magnitude"}
+_ACCEL_AXES = ("accel_x", "accel_y", "accel_z")
+_RESYNC_LAPS = 64
+# Measured with tracemalloc: about 2.3 KB per channel before any values (the two
+# deques dominate), plus the stored value and a share of deque entries per slot.
+_CHANNEL_BYTES = 2400
+_SLOT_BYTES = 8
+
+
+def max_devices_for(memory_bytes: int, size: int, typecode: str = "d") -> int:
+    """Return how many devices' windows fit in about `memory_bytes` (at least one)."""
+    slot = array(typecode).itemsize + _SLOT_BYTES
+    per_device = len(WINDOW_CHANNELS) * (_CHANNEL_BYTES + size * slot)
+    return max(1, memory_bytes // per_device)
+
+
+class RingWindow:
+    """Fixed-size window over one channel with O(1) running statistics.
+
+    Mean and variance use a sliding Welford update; min and max come from
+    monotonic deques, so every `push` is amortized O(1) and memory stays at
+    `size` values no matter how long the device streams.
+    """
+
+    __slots__ = ("size", "count", "mean", "_m2", "_values", "_next", "_mins", "_maxs")
+
+    def __init__(self, size: int, typecode: str = "d") -> None:
+        self.size = size
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._values = array(typecode, bytes(array(typecode).itemsize * size))
+        self._next = 0
+        # (sequence, value) pairs; values increase in _mins and decrease in _maxs.
+        self._mins: deque = deque()
+        self._maxs: deque = deque()
+
+    def push(self, value: float) -> None:
+        slot = self._next % self.size
+        old = self._values[slot]
+        self._values[slot] = value
+        # Read back what was stored (float32 windows round it) so the running
+        # statistics and the min/max deques describe the window contents.
+        value = self._values[slot]
+        if self.count < self.size:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self._m2 += (value - old) * (value - self.mean + old - old_mean)
+        if self._next % (self.size * _RESYNC_LAPS) == _RESYNC_LAPS - 1:
+            self._resync()
+
+        oldest = self._next - self.size
+        mins = self._mins
+        while mins and mins[-1][1] >= value:
+            mins.pop()
+        mins.append((self._next, value))
+        if mins[0][0] <= oldest:
+            mins.popleft()
+        maxs = self._maxs
+        while maxs and maxs[-1][1] <= value:
+            maxs.pop()
+        maxs.append((self._next, value))
+        if maxs[0][0] <= oldest:
+            maxs.popleft()
+        self._next += 1
+
+    def _resync(self) -> None:
+        # Recompute from the stored values now and then so rounding error in
+        # the sliding update cannot build up over a long-running stream.
+        values = self._values[: self.count]
+        self.mean = sum(values) / self.count
+        self._m2 = sum((value - self.mean) ** 2 for value in values)
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    @property
+    def variance(self) -> float:
+        # Rounding in the sliding update can leave a tiny negative remainder.
+        return max(self._m2 / self.count, 0.0) if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return self.variance ** 0.5
+
+    @property
+    def min(self) -> float:
+        return self._mins[0][1] if self._mins else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._maxs[0][1] if self._maxs else 0.0
+
+    def values(self) -> list[float]:
+        """Return the window contents from oldest to newest."""
+        if self.count < self.size:
+            return self._values[: self.count].tolist()
+        slot = self._next % self.size
+        return (self._values[slot:] + self._values[:slot]).tolist()
+
+
+class DeviceWindow:
+    """The per-channel windows of one device, keyed by channel name."""
+
+    __slots__ = ("device_id", "_size", "_typecode", "_channels")
+
+    def __init__(self, device_id: object, size: int, typecode: str = "d") -> None:
+        self.device_id = device_id
+        self._size = size
+        self._typecode = typecode
+        self._channels: dict[str, RingWindow] = {}
+
+    def push(self, channel: str, value: float) -> None:
+        window = self._channels.get(channel)
+        if window is None:
+            window = self._channels[channel] = RingWindow(self._size, self._typecode)
+        window.push(value)
+
+    def __getitem__(self, channel: str) -> RingWindow:
+        return self._channels[channel]
+
+    def __contains__(self, channel: str) -> bool:
+        return channel in self._channels
+
+    def get(self, channel: str, default: RingWindow | None = None) -> RingWindow | None:
+        return self._channels.get(channel, default)
+
+    def channels(self) -> list[str]:
+        return list(self._channels)
+
+
+class WindowStore:
+    """Sliding windows for every device that has sent samples.
+
+    Devices are keyed by the payload's `device_id` (samples without one share
+    a single window). Once `max_devices` are tracked, the device that has been
+    silent the longest is dropped to make room. `typecode` "f" stores the
+    values as float32; the running statistics stay in double precision.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_WINDOW_SIZE,
+        max_devices: int = DEFAULT_MAX_DEVICES,
+        typecode: str = "d",
+    ) -> None:
+        if size < 1:
+            raise ValueError("window size must be at least 1")
+        self.size = size
+        self.max_devices = max_devices
+        self.typecode = typecode
+        self._devices: dict[object, DeviceWindow] = {}
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def update(self, payload: dict) -> DeviceWindow:
+        """Push the numeric sensor fields of `payload` and return its device window."""
+        device_id = payload.get("device_id")
+        if not isinstance(device_id, (int, str)):
+            device_id = None
+        devices = self._devices
+        window = devices.pop(device_id, None)
+        if window is None:
+            window = DeviceWindow(device_id, self.size, self.typecode)
+            if len(devices) >= self.max_devices:
+                del devices[next(iter(devices))]
+        # Re-inserting keeps the dict ordered from least to most recently seen.
+        devices[device_id] = window
+
+        accel = None
+        for name, value in payload.items():
+            if name not in _SENSOR_CHANNELS or isinstance(value, bool):
+                continue
+            if not isinstance(value, (int, float)):
+                continue
+            window.push(name, value)
+            if name in _ACCEL_AXES:
+                accel = max(accel or 0.0, abs(value))
+        if accel is not None:
+            window.push("accel_magnitude", accel)
+        return window
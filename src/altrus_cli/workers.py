@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import io
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from altrus_cli.runtime import ScannerCounters, run_scanner
+
+_MAX_RESTART_DELAY = 30.0
+
+
+class _QueueWriter(io.TextIOBase):
+    """Forward a worker's stdout to the parent one line at a time."""
+
+    def __init__(self, messages: Any, worker_id: int) -> None:
+        self._messages = messages
+        self._worker_id = worker_id
+        self._pending = ""
+        # The prediction sink prints from its own thread, and the profiler's
+        # signal handlers may print while the main thread is inside `write`.
+        self._lock = threading.RLock()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._pending += text
+            while "\n" in self._pending:
+                line, self._pending = self._pending.split("\n", 1)
+                if line:
+                    self._messages.put((self._worker_id, line))
+        return len(text)
+
+
+def _publish_counters(counters: ScannerCounters, shared: Any) -> None:
+    while True:
+        time.sleep(0.5)
+        shared[0] = counters.samples
+        shared[1] = counters.anomalies
+
+
+def _worker_main(
+    worker_id: int,
+    messages: Any,
+    shared: Any,
+    scanner_options: dict,
+) -> None:
+    sys.stdout = _QueueWriter(messages, worker_id)
+    # Keep counting from where a crashed predecessor stopped.
+    counters = ScannerCounters(samples=shared[0], anomalies=shared[1])
+    threading.Thread(target=_publish_counters, args=(counters, shared), daemon=True).start()
+    if scanner_options.get("metrics_port") is not None:
+        scanner_options = {
+            **scanner_options,
+            "metrics_port": scanner_options["metrics_port"] + worker_id,
+        }
+    try:
+        run_scanner(reuse_port=True, counters=counters, **scanner_options)
+    finally:
+        shared[0] = counters.samples
+        shared[1] = counters.anomalies
+
+
+@dataclass
+class _WorkerSlot:
+    worker_id: int
+    shared: Any
+    process: Any = None
+    started_at: float = 0.0
+    restart_at: float | None = None
+    restart_delay: float = 1.0
+    restarts: int = 0
+    reported_samples: int = 0
+
+
+def _drain(messages: Any, timeout: float, limit: int = 1000) -> None:
+    try:
+        worker_id, line = messages.get(timeout=timeout)
+    except queue.Empty:
+        return
+    for _ in range(limit):
+        print(f"[w{worker_id}] {line}")
+        try:
+            worker_id, line = messages.get_nowait()
+        except queue.Empty:
+            return
+
+
+def _report(slots: list[_WorkerSlot], elapsed: float) -> None:
+    rates = []
+    for slot in slots:
+        samples = slot.shared[0]
+        rates.append((samples - slot.reported_samples) / elapsed)
+        slot.reported_samples = samples
+    alive = sum(1 for slot in slots if slot.process.is_alive())
+    per_worker = " ".join(f"w{slot.worker_id}={rate:.0f}" for slot, rate in zip(slots, rates))
+    print(
+        f"[workers] alive={alive}/{len(slots)} samples/sec={sum(rates):.1f} "
+        f"({per_worker}) restarts={sum(slot.restarts for slot in slots)}"
+    )
+
+
+def run_workers(workers: int, stats_interval: float = 5.0, **scanner_options: Any) -> None:
+    """Run `workers` scanner processes that share one port via SO_REUSEPORT.
+
+    The kernel spreads UDP flows and TCP connections across the workers by
+    source address, so each wristband keeps landing on the same process. The
+    parent restarts crashed workers with exponential backoff, prefixes their
+    output with the worker id and prints combined throughput.
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise SystemExit("--workers needs SO_REUSEPORT, which this platform does not support.")
+
+    context = multiprocessing.get_context()
+    messages = context.Queue()
+    slots = [
+        _WorkerSlot(worker_id=index, shared=context.Array("Q", 2, lock=False))
+        for index in range(workers)
+    ]
+    scanner_options["stats_interval"] = stats_interval
+
+    def start(slot: _WorkerSlot) -> None:
+        slot.process = context.Process(
+            target=_worker_main,
+            args=(slot.worker_id, messages, slot.shared, scanner_options),
+            name=f"altrus-worker-{slot.worker_id}",
+            daemon=True,
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        slot.restart_at = None
+
+    parent_pid = os.getpid()
+
+    def forward_signal(signum: int, frame: Any) -> None:
+        # Forked workers inherit this handler until run_scanner replaces it.
+        if os.getpid() != parent_pid:
+            return
+        for slot in slots:
+            if slot.process is not None and slot.process.is_alive():
+                os.kill(slot.process.pid, signum)
+
+    for name in ("SIGUSR1", "SIGUSR2"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), forward_signal)
+
+    for slot in slots:
+        start(slot)
+    print(f"Started {workers} scanner workers on port {scanner_options['port']}.")
+
+    started_at = time.monotonic()
+    last_report = started_at
+    try:
+        while True:
+            _drain(messages, timeout=0.2)
+            now = time.monotonic()
+            for slot in slots:
+                if slot.process.is_alive():
+                    if now - slot.started_at > _MAX_RESTART_DELAY:
+                        slot.restart_delay = 1.0
+                elif slot.restart_at is None:
+                    print(
+                        f"[workers] worker {slot.worker_id} exited with code "
+                        f"{slot.process.exitcode}; restarting in {slot.restart_delay:.0f}s"
+                    )
+                    slot.restart_at = now + slot.restart_delay
+                    slot.restart_delay = min(slot.restart_delay * 2, _MAX_RESTART_DELAY)
+                elif now >= slot.restart_at:
+                    slot.restarts += 1
+                    start(slot)
+            if stats_interval > 0 and now - last_report >= stats_interval:
+                _report(slots, now - last_report)
+                last_report = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Ctrl+C in a terminal reaches the workers too; forward it when only the
+        # parent was signalled, then give them time to print their summaries.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for slot in slots:
+            slot.process.join(timeout=0.5)
+            if slot.process.is_alive():
+                os.kill(slot.process.pid, signal.SIGINT)
+        for slot in slots:
+            slot.process.join(timeout=5.0)
+            if slot.process.is_alive():
+                slot.process.terminate()
+        _drain(messages, timeout=0.2)
+        elapsed = max(time.monotonic() - started_at, 1e-9)
+        total = sum(slot.shared[0] for slot in slots)
+        print(
+            f"[workers] total samples={total} "
+            f"anomalies={sum(slot.shared[1] for slot in slots)} "
+            f"avg samples/sec={total / elapsed:.1f} "
+            f"restarts={sum(slot.restarts for slot in slots)}"
+        )
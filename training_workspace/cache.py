@@ -0,0 +1,107 @@
+"""On-disk cache of parsed dataset columns, memory-mapped on later runs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from sketches import QuantileSketch
+
+CACHE_FORMAT_VERSION = 2
+COLUMN_NAMES = ("magnitudes", "labels", "subjects", "heart_rates", "temperatures")
+
+
+def source_key(path: Path, start: int = 0, end: int | None = None) -> dict:
+    """Identify a parsed source: the file (path, size, mtime) and the byte range read."""
+    stat = path.stat()
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "path": str(path.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "start": start,
+        "end": end,
+    }
+
+
+def entry_path(cache_dir: Path, key: dict) -> Path:
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+    return cache_dir / f"{Path(key['path']).name}-{digest[:16]}"
+
+
+def load_entry(
+    cache_dir: Path, key: dict
+) -> tuple[dict[str, np.ndarray], dict[str, QuantileSketch]] | None:
+    """Return the memory-mapped columns and sketches cached for `key`, or None."""
+    entry = entry_path(cache_dir, key)
+    try:
+        meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("key") != key:
+            return None
+        columns = {
+            name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in COLUMN_NAMES
+        }
+    except (OSError, ValueError):
+        return None
+    sketches = {
+        name: QuantileSketch.from_dict(item) for name, item in meta["sketches"].items()
+    }
+    return columns, sketches
+
+
+def store_entry(
+    cache_dir: Path,
+    key: dict,
+    columns: dict[str, np.ndarray],
+    sketches: dict[str, QuantileSketch],
+) -> None:
+    """Write an entry under a temporary name and rename it, so readers never see half of it."""
+    entry = entry_path(cache_dir, key)
+    staging = entry.with_name(f"{entry.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for name in COLUMN_NAMES:
+        np.save(staging / f"{name}.npy", columns[name])
+    meta = {
+        "key": key,
+        "rows": len(columns["magnitudes"]),
+        "sketches": {name: sketch.to_dict() for name, sketch in sketches.items()},
+    }
+    (staging / "meta.json").write_text(json.dumps(meta) + "\n", encoding="utf-8")
+    shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(staging, entry)
+    except OSError:
+        # Another process stored the same entry first.
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def prune(cache_dir: Path, keys: list[dict]) -> int:
+    """Delete entries for the sources in `keys` that were cached under an older identity.
+
+    Entries of other sources are kept. Returns the number of entries removed.
+    """
+    if not cache_dir.is_dir():
+        return 0
+    current = {entry_path(cache_dir, key).name for key in keys}
+    paths = {key["path"] for key in keys}
+    removed = 0
+    for entry in cache_dir.iterdir():
+        if entry.name in current or not entry.is_dir():
+            continue
+        try:
+            meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # A leftover staging directory of an interrupted run.
+            stale = ".tmp-" in entry.name
+        else:
+            stale = meta.get("key", {}).get("path") in paths
+        if stale:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+    return removed
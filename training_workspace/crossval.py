@@ -0,0 +1,73 @@
+"""Subject-level k-fold cross-validation over shared memory-mapped columns."""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+
+def subject_groups(subjects: list[np.ndarray]) -> np.ndarray:
+    """Number the subjects of each dataset in turn, so equal ids in two datasets stay apart."""
+    groups = []
+    offset = 0
+    for ids in subjects:
+        unique, inverse = np.unique(ids, return_inverse=True)
+        groups.append(inverse.astype(np.int32) + offset)
+        offset += len(unique)
+    return np.concatenate(groups) if groups else np.empty(0, dtype=np.int32)
+
+
+def assign_folds(groups: np.ndarray, k: int) -> list[np.ndarray]:
+    """Split the subjects into `k` folds of similar row counts.
+
+    Subjects are taken largest first, each into the fold with the fewest rows
+    so far, so the split is deterministic.
+    """
+    sizes = np.bincount(groups)
+    subjects = np.flatnonzero(sizes)
+    if len(subjects) < k:
+        raise ValueError(f"cannot split {len(subjects)} subjects into {k} folds")
+    folds: list[list[int]] = [[] for _ in range(k)]
+    rows = [0] * k
+    for subject in subjects[np.argsort(-sizes[subjects], kind="stable")]:
+        index = rows.index(min(rows))
+        folds[index].append(int(subject))
+        rows[index] += int(sizes[subject])
+    return [np.array(sorted(fold), dtype=np.int32) for fold in folds]
+
+
+def share_columns(directory: Path, columns: dict[str, np.ndarray]) -> None:
+    for name, values in columns.items():
+        np.save(directory / f"{name}.npy", values)
+
+
+def open_columns(directory: Path) -> dict[str, np.ndarray]:
+    """Memory-map the columns `share_columns` wrote; processes share the pages."""
+    return {
+        path.stem: np.load(path, mmap_mode="r") for path in sorted(directory.glob("*.npy"))
+    }
+
+
+def run_folds(
+    function, directory: Path, folds: list[np.ndarray], jobs: int | None, *args
+) -> list:
+    """Call `function(directory, held_out, *args)` for every fold, one process per fold."""
+    jobs = min(jobs or os.cpu_count() or 1, len(folds))
+    if jobs == 1:
+        return [function(directory, held_out, *args) for held_out in folds]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(function, directory, held_out, *args) for held_out in folds]
+        return [future.result() for future in futures]
+
+
+def mean_and_variance(values: list[float]) -> tuple[float, float]:
+    """Mean and sample variance, ignoring NaN (a fold without the readings)."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return float("nan"), float("nan")
+    variance = float(values.var(ddof=1)) if len(values) > 1 else 0.0
+    return float(values.mean()), variance
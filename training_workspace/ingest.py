@@ -0,0 +1,347 @@
+"""Parallel parsing of the raw PAMAP2 and WISDM files into NumPy columns."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from cache import COLUMN_NAMES, load_entry, prune, source_key, store_entry
+from sketches import QuantileSketch, merge_sketches
+
+ACTIVITY_ORDER = ["sleep", "rest", "walk", "run"]
+
+PAMAP2_ACTIVITY_MAP = {
+    1: "sleep",  # lying
+    2: "rest",  # sitting
+    3: "rest",  # standing
+    4: "walk",  # walking
+    5: "run",  # running
+    6: "walk",  # cycling
+    7: "walk",  # nordic walking
+    9: "rest",  # watching TV
+    10: "rest",  # computer work
+    11: "rest",  # car driving
+    12: "walk",  # ascending stairs
+    13: "walk",  # descending stairs
+    16: "walk",  # vacuum cleaning
+    17: "walk",  # ironing
+    18: "walk",  # folding laundry
+    19: "walk",  # house cleaning
+    20: "run",  # playing soccer
+}
+
+WISDM_ACTIVITY_MAP = {
+    "Walking": "walk",
+    "Jogging": "run",
+    "Sitting": "rest",
+    "Standing": "rest",
+    "LyingDown": "sleep",
+}
+
+# Label code for rows whose activity is not mapped to ACTIVITY_ORDER.
+UNMAPPED = 255
+WISDM_CHUNK_BYTES = 8 * 1024 * 1024
+
+_PAMAP2_CODES = np.full(max(PAMAP2_ACTIVITY_MAP) + 1, UNMAPPED, dtype=np.uint8)
+for _activity_id, _label in PAMAP2_ACTIVITY_MAP.items():
+    _PAMAP2_CODES[_activity_id] = ACTIVITY_ORDER.index(_label)
+_WISDM_CODES = {
+    name: ACTIVITY_ORDER.index(label) for name, label in WISDM_ACTIVITY_MAP.items()
+}
+
+
+@dataclass
+class Columns:
+    """Parsed samples as parallel arrays, one row per labeled accelerometer reading.
+
+    `magnitudes[i]` (the largest absolute accelerometer axis) has the activity
+    `ACTIVITY_ORDER[labels[i]]` and was recorded from subject `subjects[i]`
+    (the PAMAP2 subject number or the WISDM user id). `heart_rates` and
+    `temperatures` are NaN where the row has no reading. Values are float32,
+    labels uint8 and subjects int32; the arrays may be read-only memory maps
+    of the parse cache. `sketches` summarizes the "magnitude", "heart_rate"
+    and "temperature" readings of all labeled rows for threshold training,
+    taken before the float32 conversion.
+    """
+
+    magnitudes: np.ndarray
+    labels: np.ndarray
+    subjects: np.ndarray
+    heart_rates: np.ndarray
+    temperatures: np.ndarray
+    sketches: dict[str, QuantileSketch] = field(default_factory=dict)
+
+    @classmethod
+    def empty(cls) -> Columns:
+        return cls(
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.uint8),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.float32),
+        )
+
+    @classmethod
+    def concatenate(cls, parts: list[Columns]) -> Columns:
+        if not parts:
+            return cls.empty()
+        sketches: dict[str, QuantileSketch] = {}
+        for part in parts:
+            merge_sketches(sketches, part.sketches)
+        return cls(
+            np.concatenate([part.magnitudes for part in parts]),
+            np.concatenate([part.labels for part in parts]),
+            np.concatenate([part.subjects for part in parts]),
+            np.concatenate([part.heart_rates for part in parts]),
+            np.concatenate([part.temperatures for part in parts]),
+            sketches,
+        )
+
+
+def _labeled_columns(
+    codes: np.ndarray,
+    axes: np.ndarray,
+    subjects: np.ndarray,
+    heart_rates: np.ndarray | None = None,
+    temperatures: np.ndarray | None = None,
+) -> Columns:
+    mapped = codes != UNMAPPED
+    # max propagates NaN, so a row missing any axis drops out here.
+    magnitudes = np.abs(axes[mapped]).max(axis=1)
+    present = ~np.isnan(magnitudes)
+    readings = {}
+    for name, values in (("heart_rate", heart_rates), ("temperature", temperatures)):
+        if values is None:
+            values = np.full(len(codes), np.nan)
+        readings[name] = values[mapped]
+    sketches = sketch_values(
+        magnitude=magnitudes[present],
+        heart_rate=readings["heart_rate"][~np.isnan(readings["heart_rate"])],
+        temperature=readings["temperature"][~np.isnan(readings["temperature"])],
+    )
+    return Columns(
+        magnitudes[present].astype(np.float32),
+        codes[mapped][present],
+        subjects[mapped][present].astype(np.int32),
+        readings["heart_rate"][present].astype(np.float32),
+        readings["temperature"][present].astype(np.float32),
+        sketches,
+    )
+
+
+def sketch_values(**values: np.ndarray) -> dict[str, QuantileSketch]:
+    """Sketch each non-empty array, keyed by its argument name."""
+    return {
+        name: QuantileSketch.from_values(array) for name, array in values.items() if len(array)
+    }
+
+
+def _pamap2_subject(path: Path) -> int:
+    digits = re.search(r"\d+", path.stem)
+    if digits:
+        return int(digits.group())
+    # Any other name still gets a stable id of its own.
+    return zlib.crc32(path.name.encode("utf-8")) & 0x7FFFFFFF
+
+
+def parse_pamap2_file(path: Path) -> Columns:
+    """Parse one PAMAP2 subject file (activity id, heart rate, temperature, hand accel)."""
+    try:
+        table = np.loadtxt(path, usecols=range(1, 7), ndmin=2)
+    except ValueError:
+        # Malformed rows: genfromtxt skips short lines and turns bad numbers into NaN.
+        table = np.genfromtxt(path, usecols=range(1, 7), invalid_raise=False, ndmin=2)
+    if table.size == 0:
+        return Columns.empty()
+    activity_ids = table[:, 0]
+    known = (activity_ids >= 0) & (activity_ids < len(_PAMAP2_CODES))
+    codes = np.full(len(table), UNMAPPED, dtype=np.uint8)
+    codes[known] = _PAMAP2_CODES[activity_ids[known].astype(np.intp)]
+    subjects = np.full(len(table), _pamap2_subject(path), dtype=np.int32)
+    return _labeled_columns(codes, table[:, 3:6], subjects, table[:, 1], table[:, 2])
+
+
+def _read_lines(path: Path, start: int, end: int) -> list[str]:
+    """Return the lines that start inside the byte range [start, end)."""
+    with path.open("rb") as handle:
+        if start > 0:
+            # The line straddling `start` belongs to the previous range.
+            handle.seek(start - 1)
+            handle.readline()
+        data = handle.read(max(end - handle.tell(), 0))
+        if data and not data.endswith(b"\n"):
+            data += handle.readline()
+    return data.decode("utf-8").splitlines()
+
+
+def _wisdm_code(activity: str) -> int:
+    return _WISDM_CODES.get(activity.strip(), UNMAPPED)
+
+
+def _parse_wisdm_lines_slowly(lines: list[str]) -> np.ndarray:
+    rows = []
+    for line in lines:
+        fields = line.split(",")
+        if len(fields) < 6:
+            continue
+        try:
+            user = int(fields[0])
+            axes = [float(fields[3]), float(fields[4]), float(fields[5].strip().rstrip(";"))]
+        except ValueError:
+            continue
+        rows.append([user, _wisdm_code(fields[1]), *axes])
+    return np.array(rows, dtype=np.float64).reshape(-1, 5)
+
+
+def parse_wisdm_chunk(path: Path, start: int, end: int) -> Columns:
+    """Parse the WISDM raw lines (user,activity,timestamp,x,y,z;) in one byte range."""
+    # Dropping short rows first keeps most chunks on the fast path below.
+    lines = [line for line in _read_lines(path, start, end) if line.count(",") >= 5]
+    try:
+        table = np.loadtxt(
+            lines,
+            delimiter=",",
+            comments=";",
+            usecols=(0, 1, 3, 4, 5),
+            converters={1: _wisdm_code},
+            ndmin=2,
+        )
+    except ValueError:
+        # A row with an empty or non-numeric axis; parse this chunk line by line instead.
+        table = _parse_wisdm_lines_slowly(lines)
+    if table.size == 0:
+        return Columns.empty()
+    return _labeled_columns(table[:, 1].astype(np.uint8), table[:, 2:5], table[:, 0])
+
+
+def _byte_ranges(path: Path, chunk_bytes: int) -> list[tuple[int, int]]:
+    size = path.stat().st_size
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def _parse_and_cache(function, args: tuple, key: dict, cache_dir: Path | None) -> Columns:
+    columns = function(*args)
+    if cache_dir is not None:
+        arrays = {name: getattr(columns, name) for name in COLUMN_NAMES}
+        store_entry(cache_dir, key, arrays, columns.sketches)
+    return columns
+
+
+def _cached_columns(cache_dir: Path, key: dict) -> Columns | None:
+    entry = load_entry(cache_dir, key)
+    if entry is None:
+        return None
+    arrays, sketches = entry
+    return Columns(**arrays, sketches=sketches)
+
+
+def load_datasets(
+    pamap2_dir: Path | None,
+    wisdm_path: Path | None,
+    jobs: int | None = None,
+    cache_dir: Path | None = None,
+) -> tuple[Columns, Columns]:
+    """Parse every PAMAP2 subject file and the WISDM file in chunks, in parallel.
+
+    With `cache_dir`, each file or chunk is parsed once and stored there as
+    `.npy` columns keyed by path, size, mtime and byte range; later runs
+    memory-map them, and entries of files that changed since are deleted.
+    Returns the (PAMAP2, WISDM) columns in file order; a missing source is empty.
+    """
+    tasks = []
+    if pamap2_dir is not None:
+        tasks.extend(
+            (parse_pamap2_file, (path,), source_key(path))
+            for path in sorted(pamap2_dir.glob("*.dat"))
+        )
+    pamap2_count = len(tasks)
+    if wisdm_path is not None:
+        tasks.extend(
+            (parse_wisdm_chunk, (wisdm_path, start, end), source_key(wisdm_path, start, end))
+            for start, end in _byte_ranges(wisdm_path, WISDM_CHUNK_BYTES)
+        )
+    results: list[Columns | None] = [None] * len(tasks)
+    if cache_dir is not None:
+        results = [_cached_columns(cache_dir, key) for _, _, key in tasks]
+    missing = [index for index, columns in enumerate(results) if columns is None]
+    jobs = min(jobs or os.cpu_count() or 1, max(len(missing), 1))
+    if jobs == 1:
+        for index in missing:
+            results[index] = _parse_and_cache(*tasks[index], cache_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                index: pool.submit(_parse_and_cache, *tasks[index], cache_dir)
+                for index in missing
+            }
+            for index, future in futures.items():
+                results[index] = future.result()
+    if cache_dir is not None:
+        prune(cache_dir, [key for _, _, key in tasks])
+    return (
+        Columns.concatenate(results[:pamap2_count]),
+        Columns.concatenate(results[pamap2_count:]),
+    )
+
+
+def _recorded_rows(path: Path, offset: int) -> tuple[list[dict], int]:
+    """Return the complete rows after byte `offset` of a prediction file and the new offset."""
+    with path.open("rb") as handle:
+        header = handle.readline() if path.suffix == ".csv" else b""
+        start = max(offset, len(header))
+        handle.seek(start)
+        data = handle.read()
+    # A row still being written is left for the next run.
+    end = data.rfind(b"\n") + 1
+    text = data[:end].decode("utf-8")
+    if path.suffix == ".csv":
+        columns = header.decode("utf-8").strip().split(",")
+        rows = [dict(zip(columns, row)) for row in csv.reader(io.StringIO(text))]
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return rows, start + end
+
+
+def _column(rows: list[dict], name: str) -> np.ndarray:
+    values = [row.get(name) for row in rows]
+    return np.array([np.nan if value in (None, "") else value for value in values], float)
+
+
+def load_recordings(
+    data_dir: Path, consumed: dict[str, int]
+) -> tuple[dict[str, QuantileSketch], dict[str, int]]:
+    """Sketch the sensor readings `altrus run` recorded in a project's `data/` directory.
+
+    `consumed` maps prediction files to the bytes already folded into earlier
+    sketches; only rows after that offset are read. Returns the sketches of
+    the new rows and the updated offsets.
+    """
+    sketches: dict[str, QuantileSketch] = {}
+    offsets = {}
+    for path in sorted(data_dir.glob("predictions-*")):
+        if path.suffix not in (".ndjson", ".csv"):
+            continue
+        key = str(path.resolve())
+        rows, offsets[key] = _recorded_rows(path, consumed.get(key, 0))
+        if not rows:
+            continue
+        axes = np.stack([_column(rows, name) for name in ("accel_x", "accel_y", "accel_z")])
+        # Sketches skip NaN, so rows without a reading do not count.
+        merge_sketches(
+            sketches,
+            sketch_values(
+                magnitude=np.abs(axes).max(axis=0),
+                heart_rate=_column(rows, "heart_rate"),
+                temperature=_column(rows, "body_temperature"),
+            ),
+        )
+    return sketches, offsets
@@ -0,0 +1,139 @@
+"""Mergeable streaming quantile sketches for threshold training."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_K = 1024
+SKETCH_FORMAT_VERSION = 1
+
+
+class QuantileSketch:
+    """KLL quantile sketch: bounded memory, mergeable, serializable.
+
+    Values are kept in levels where an item on level `h` stands for `2**h`
+    inputs. When a level outgrows its capacity it is sorted and every other
+    item (random offset) moves up a level, so at most about `3 * k` values are
+    stored however many are added. Rank error is roughly `1.7 / k`; quantiles
+    are exact while fewer than `k` values have been added.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0) -> None:
+        self.k = k
+        self.count = 0
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, k: int = DEFAULT_K) -> QuantileSketch:
+        sketch = cls(k)
+        sketch.update(values)
+        return sketch
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: QuantileSketch) -> None:
+        """Add everything `other` has seen; `other` is left unchanged."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for height, level in enumerate(other.levels):
+            self.levels[height] = np.concatenate([self.levels[height], level])
+        self.count += other.count
+        self._compress()
+
+    def quantile(self, ratio: float) -> float:
+        """Return the value at index `int(count * ratio)` of the sorted input."""
+        if not self.count:
+            return 0.0
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(len(level), 2**height, dtype=np.int64)
+                for height, level in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        rank = min(max(int(self.count * ratio), 0), self.count - 1)
+        index = min(int(np.searchsorted(cumulative, rank, side="right")), len(values) - 1)
+        return float(values[order[index]])
+
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k,
+            "count": self.count,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> QuantileSketch:
+        sketch = cls(int(data["k"]))
+        sketch.count = int(data["count"])
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in data["levels"]]
+        return sketch
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.levels) - height - 1
+        return max(int(self.k * (2 / 3) ** depth), 2)
+
+    def _compress(self) -> None:
+        height = 0
+        while height < len(self.levels):
+            level = self.levels[height]
+            if len(level) > self._capacity(height):
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # An odd item out stays behind so the promoted pairs are exact halves.
+                leftover = level[:1] if len(level) % 2 else level[:0]
+                paired = level[len(leftover):]
+                promoted = paired[int(self._rng.integers(2))::2]
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+                self.levels[height] = leftover
+            height += 1
+
+
+def save_sketches(
+    path: Path, sketches: dict[str, QuantileSketch], sources: dict[str, int]
+) -> None:
+    """Write the sketches and the sources already folded into them as JSON.
+
+    `sources` maps each dataset or recording to the bytes of it consumed.
+    """
+    data = {
+        "version": SKETCH_FORMAT_VERSION,
+        "sources": sources,
+        "sketches": {name: sketch.to_dict() for name, sketch in sketches.items()},
+    }
+    path.write_text(json.dumps(data) + "\n", encoding="utf-8")
+
+
+def load_sketches(path: Path) -> tuple[dict[str, QuantileSketch], dict[str, int]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != SKETCH_FORMAT_VERSION:
+        raise ValueError(f"{path} has unsupported sketch format {data.get('version')!r}")
+    sketches = {
+        name: QuantileSketch.from_dict(item) for name, item in data["sketches"].items()
+    }
+    return sketches, dict(data["sources"])
+
+
+def merge_sketches(
+    into: dict[str, QuantileSketch], other: dict[str, QuantileSketch]
+) -> dict[str, QuantileSketch]:
+    for name, sketch in other.items():
+        if name in into:
+            into[name].merge(sketch)
+        else:
+            into[name] = QuantileSketch.from_dict(sketch.to_dict())
+    return into
@@ -0,0 +1,94 @@
+"""Label-aware search for the activity model's cut points."""
+
+from __future__ import annotations
+
+import numpy as np
+
+OBJECTIVES = ("accuracy", "macro-f1")
+# Macro F1 is searched over at most this many cut positions, spread evenly by rank.
+MAX_F1_CANDIDATES = 1024
+
+
+def _cumulative_counts(magnitudes: np.ndarray, labels: np.ndarray, classes: int) -> tuple:
+    """Sort once; return the distinct values and per-class counts below each cut.
+
+    `counts[j, c]` is the number of class `c` samples among the `j` smallest
+    distinct values, so a cut at `j` puts exactly those samples below it.
+    """
+    order = np.argsort(magnitudes, kind="stable")
+    values = np.asarray(magnitudes)[order]
+    labels = np.asarray(labels)[order]
+    # Equal values always land on the same side, so cuts only fall between distinct values.
+    ends = np.append(np.flatnonzero(np.diff(values)) + 1, len(values))
+    counts = np.zeros((len(ends) + 1, classes), dtype=np.int64)
+    for code in range(classes):
+        counts[1:, code] = np.cumsum(labels == code)[ends - 1]
+    return values[ends - 1].astype(np.float64), counts
+
+
+def _accuracy_cuts(counts: np.ndarray) -> list[int]:
+    """Exact linear-time DP: correct[k][j] is the best count with classes 0..k below cut j."""
+    positions = np.arange(len(counts))
+    correct = counts[:, 0]
+    choices = []
+    for code in range(1, counts.shape[1]):
+        # Class `code` covers [start, j): its correct count is counts[j] - counts[start].
+        gain = correct - counts[:, code]
+        best = np.maximum.accumulate(gain)
+        choices.append(np.maximum.accumulate(np.where(gain == best, positions, 0)))
+        correct = best + counts[:, code]
+    cuts = [len(counts) - 1]
+    for choice in reversed(choices):
+        cuts.append(int(choice[cuts[-1]]))
+    return cuts[:0:-1]
+
+
+def _macro_f1_cuts(counts: np.ndarray) -> list[int]:
+    """DP over candidate cuts; each class's F1 depends only on its own interval."""
+    totals = counts.sum(axis=1)
+    support = counts[-1]
+    grid = np.linspace(0, totals[-1], MAX_F1_CANDIDATES)
+    candidates = np.unique(np.searchsorted(totals, grid))
+    starts, ends = np.meshgrid(candidates, candidates, indexing="ij")
+    valid = starts <= ends
+    predicted = totals[ends] - totals[starts]
+
+    def f1(code: int) -> np.ndarray:
+        hits = counts[ends, code] - counts[starts, code]
+        denominator = predicted + support[code]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(denominator > 0, 2 * hits / denominator, 0.0)
+        return np.where(valid, scores, -np.inf)
+
+    score = f1(0)[0]
+    choices = []
+    for code in range(1, counts.shape[1]):
+        total = score[:, None] + f1(code)
+        choices.append(total.argmax(axis=0))
+        score = total.max(axis=0)
+    cuts = [len(candidates) - 1]
+    for choice in reversed(choices):
+        cuts.append(int(choice[cuts[-1]]))
+    return [int(candidates[index]) for index in cuts[:0:-1]]
+
+
+def optimal_thresholds(
+    magnitudes: np.ndarray, labels: np.ndarray, classes: int, objective: str = "accuracy"
+) -> list[float]:
+    """Return the `classes - 1` ascending thresholds that maximize `objective`.
+
+    A magnitude at or below `thresholds[i]` predicts class `i`, as in
+    `np.searchsorted(thresholds, magnitude)`. Costs one sort plus a DP over
+    cut points: linear and exact for accuracy; quadratic over up to
+    `MAX_F1_CANDIDATES` rank-spaced cuts for macro F1, which does not split
+    into per-cut gains.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"unknown objective {objective!r}; expected one of {OBJECTIVES}")
+    if not len(magnitudes):
+        raise ValueError("no labeled samples to search thresholds on")
+    values, counts = _cumulative_counts(magnitudes, labels, classes)
+    cuts = _accuracy_cuts(counts) if objective == "accuracy" else _macro_f1_cuts(counts)
+    # A cut between two values goes halfway; the outermost cuts take the extreme values.
+    edges = np.concatenate([[values[0] - 1.0], (values[:-1] + values[1:]) / 2, [values[-1]]])
+    return [float(edges[cut]) for cut in cuts]
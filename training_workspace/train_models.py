@@ -1,171 +1,132 @@
 from __future__ import annotations
 
 import argparse
-import csv
-import math
-import pickle
+import tempfile
 from pathlib import Path
-from typing import Iterable
 
-OUTPUT_DIR = Path(__file__).parent / "output"
-
-PAMAP2_ACTIVITY_MAP = {
-    1: "sleep",  # lying
-    2: "rest",  # sitting
-    3: "rest",  # standing
-    4: "walk",  # walking
-    5: "run",  # running
-    6: "walk",  # cycling
-    7: "walk",  # nordic walking
-    9: "rest",  # watching TV
-    10: "rest",  # computer work
-    11: "rest",  # car driving
-    12: "walk",  # ascending stairs
-    13: "walk",  # descending stairs
-    16: "walk",  # vacuum cleaning
-    17: "walk",  # ironing
-    18: "walk",  # folding laundry
-    19: "walk",  # house cleaning
-    20: "run",  # playing soccer
-}
+import numpy as np
+from altrus_cli.artifact import ACTIVITY_SCHEMA, ANOMALY_SCHEMA, write_artifact
+
+from cache import COLUMN_NAMES
+from crossval import (
+    assign_folds,
+    mean_and_variance,
+    open_columns,
+    run_folds,
+    share_columns,
+    subject_groups,
+)
+from ingest import ACTIVITY_ORDER, Columns, load_datasets, load_recordings, sketch_values
+from sketches import QuantileSketch, load_sketches, merge_sketches, save_sketches
+from thresholds import OBJECTIVES, optimal_thresholds
 
-WISDM_ACTIVITY_MAP = {
-    "Walking": "walk",
-    "Jogging": "run",
-    "Sitting": "rest",
-    "Standing": "rest",
-    "LyingDown": "sleep",
+OUTPUT_DIR = Path(__file__).parent / "output"
+SKETCHES_PATH = OUTPUT_DIR / "sketches.json"
+CACHE_DIR = OUTPUT_DIR / "cache"
+
+# column, fires at or above the threshold; mirrors the generated project's default rules
+ANOMALY_CHECKS = {
+    "tachycardia": ("heart_rates", True),
+    "bradycardia": ("heart_rates", False),
+    "fever": ("temperatures", True),
+    "heart_attack": ("magnitudes", True),
+    "cardiac_arrest": ("heart_rates", False),
 }
 
-ACTIVITY_ORDER = ["sleep", "rest", "walk", "run"]
-
-
-def _percentile(values: list[float], ratio: float) -> float:
-    if not values:
-        return 0.0
-    values = sorted(values)
-    index = int(len(values) * ratio)
-    index = min(max(index, 0), len(values) - 1)
-    return values[index]
 
-
-def _safe_float(value: str) -> float | None:
-    try:
-        number = float(value)
-    except ValueError:
-        return None
-    if math.isnan(number):
-        return None
-    return number
-
-
-def _accel_magnitude(x: float | None, y: float | None, z: float | None) -> float | None:
-    if x is None or y is None or z is None:
+def _percentile(sketches: dict[str, QuantileSketch], name: str, ratio: float) -> float | None:
+    sketch = sketches.get(name)
+    if sketch is None or not sketch.count:
         return None
-    return max(abs(x), abs(y), abs(z))
-
-
-def _load_pamap2(protocol_dir: Path) -> tuple[list[tuple[float, str]], list[float], list[float]]:
-    labeled_magnitudes: list[tuple[float, str]] = []
-    heart_rates: list[float] = []
-    temperatures: list[float] = []
-
-    for path in sorted(protocol_dir.glob("*.dat")):
-        with path.open("r", encoding="utf-8") as handle:
-            for line in handle:
-                parts = line.strip().split()
-                if len(parts) < 7:
-                    continue
-                activity_id = int(float(parts[1]))
-                mapped = PAMAP2_ACTIVITY_MAP.get(activity_id)
-                if not mapped:
-                    continue
-                heart_rate = _safe_float(parts[2])
-                temp = _safe_float(parts[3])
-                accel = _accel_magnitude(
-                    _safe_float(parts[4]),
-                    _safe_float(parts[5]),
-                    _safe_float(parts[6]),
-                )
-                if accel is not None:
-                    labeled_magnitudes.append((accel, mapped))
-                if heart_rate is not None:
-                    heart_rates.append(heart_rate)
-                if temp is not None:
-                    temperatures.append(temp)
-    return labeled_magnitudes, heart_rates, temperatures
-
-
-def _load_wisdm(raw_path: Path) -> list[tuple[float, str]]:
-    labeled_magnitudes: list[tuple[float, str]] = []
-    with raw_path.open("r", encoding="utf-8") as handle:
-        reader = csv.reader(handle)
-        for row in reader:
-            if len(row) < 6:
-                continue
-            activity = row[1].strip()
-            mapped = WISDM_ACTIVITY_MAP.get(activity)
-            if not mapped:
-                continue
-            x = _safe_float(row[3])
-            y = _safe_float(row[4])
-            z = _safe_float(row[5].rstrip(";"))
-            accel = _accel_magnitude(x, y, z)
-            if accel is not None:
-                labeled_magnitudes.append((accel, mapped))
-    return labeled_magnitudes
-
-
-def _train_activity_thresholds(magnitudes: list[float]) -> list[float]:
-    if not magnitudes:
+    return sketch.quantile(ratio)
+
+
+def _train_activity_thresholds(
+    sketches: dict[str, QuantileSketch], data: Columns | None, objective: str
+) -> list[float]:
+    if objective != "percentile" and data is not None and len(data.magnitudes):
+        thresholds = optimal_thresholds(
+            data.magnitudes, data.labels, len(ACTIVITY_ORDER), objective
+        )
+        return [round(value, 2) for value in thresholds]
+    if _percentile(sketches, "magnitude", 0.5) is None:
         return [0.4, 1.2, 2.2]
-    return [
-        round(_percentile(magnitudes, 0.25), 2),
-        round(_percentile(magnitudes, 0.5), 2),
-        round(_percentile(magnitudes, 0.75), 2),
-    ]
-
-
-def _predict_activity(magnitude: float, thresholds: list[float]) -> str:
-    if magnitude <= thresholds[0]:
-        return "sleep"
-    if magnitude <= thresholds[1]:
-        return "rest"
-    if magnitude <= thresholds[2]:
-        return "walk"
-    return "run"
-
-
-def _evaluate_activity(labeled: list[tuple[float, str]], thresholds: list[float]) -> dict:
-    if not labeled:
-        return {"accuracy": 0.0, "total": 0, "correct": 0}
-    correct = 0
-    total = 0
-    per_class = {label: {"correct": 0, "total": 0} for label in ACTIVITY_ORDER}
-    for magnitude, label in labeled:
-        prediction = _predict_activity(magnitude, thresholds)
-        total += 1
-        per_class[label]["total"] += 1
-        if prediction == label:
-            correct += 1
-            per_class[label]["correct"] += 1
+    return [round(_percentile(sketches, "magnitude", ratio), 2) for ratio in (0.25, 0.5, 0.75)]
+
+
+def _predict_activity(magnitudes: np.ndarray, thresholds: list[float]) -> np.ndarray:
+    """Return activity codes: a magnitude at or below `thresholds[i]` gets class `i`."""
+    return np.searchsorted(np.asarray(thresholds), magnitudes, side="left").astype(np.uint8)
+
+
+def _evaluate_activity(
+    magnitudes: np.ndarray, labels: np.ndarray, thresholds: list[float]
+) -> dict:
+    classes = len(ACTIVITY_ORDER)
+    predictions = _predict_activity(magnitudes, thresholds)
+    # Row = true label, column = prediction.
+    confusion = np.bincount(
+        labels.astype(np.intp) * classes + predictions, minlength=classes * classes
+    ).reshape(classes, classes)
+    total = int(confusion.sum())
+    correct = int(np.trace(confusion))
+    true_positives = np.diag(confusion)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(
+            precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0
+        )
+    per_class = {
+        label: {
+            "correct": int(true_positives[index]),
+            "total": int(support[index]),
+            "precision": float(precision[index]),
+            "recall": float(recall[index]),
+            "f1": float(f1[index]),
+        }
+        for index, label in enumerate(ACTIVITY_ORDER)
+    }
+    present = support > 0
     return {
         "accuracy": correct / total if total else 0.0,
+        "macro_f1": float(f1[present].mean()) if present.any() else 0.0,
         "total": total,
         "correct": correct,
         "per_class": per_class,
+        "confusion": confusion.tolist(),
     }
 
 
-def _train_anomaly_thresholds(
-    heart_rates: list[float],
-    temperatures: list[float],
-    accel_magnitudes: list[float],
-) -> dict[str, float]:
-    tachycardia = _percentile(heart_rates, 0.9) if heart_rates else 120.0
-    bradycardia = _percentile(heart_rates, 0.1) if heart_rates else 50.0
-    fever = _percentile(temperatures, 0.9) if temperatures else 38.0
-    heart_attack = _percentile(accel_magnitudes, 0.95) if accel_magnitudes else 3.5
+def _print_activity_report(results: dict) -> None:
+    print(
+        f"Activity accuracy: {results['accuracy']:.3f} "
+        f"({results['correct']}/{results['total']}), macro F1: {results['macro_f1']:.3f}"
+    )
+    print(f"  {'class':<6} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>9}")
+    for label in ACTIVITY_ORDER:
+        stats = results["per_class"][label]
+        print(
+            f"  {label:<6} {stats['precision']:9.3f} {stats['recall']:7.3f} "
+            f"{stats['f1']:6.3f} {stats['total']:9d}"
+        )
+    print("  Confusion matrix (rows: true, columns: predicted):")
+    print("  " + " " * 6 + "".join(f"{label:>10}" for label in ACTIVITY_ORDER))
+    for label, row in zip(ACTIVITY_ORDER, results["confusion"]):
+        print(f"  {label:<6}" + "".join(f"{count:10d}" for count in row))
+
+
+def _train_anomaly_thresholds(sketches: dict[str, QuantileSketch]) -> dict[str, float]:
+    def percentile(name: str, ratio: float, default: float) -> float:
+        value = _percentile(sketches, name, ratio)
+        return default if value is None else value
+
+    tachycardia = percentile("heart_rate", 0.9, 120.0)
+    bradycardia = percentile("heart_rate", 0.1, 50.0)
+    fever = percentile("temperature", 0.9, 38.0)
+    heart_attack = percentile("magnitude", 0.95, 3.5)
     cardiac_arrest = max(bradycardia - 5.0, 20.0)
     return {
         "tachycardia": round(tachycardia, 1),
@@ -176,6 +137,70 @@ def _train_anomaly_thresholds(
     }
 
 
+def _cv_fold(directory: Path, held_out: np.ndarray, objective: str) -> dict:
+    """Train on every subject outside `held_out` and score on the held-out ones."""
+    columns = open_columns(directory)
+    test = np.isin(columns["groups"], held_out)
+    train = Columns(*(columns[name][~test] for name in COLUMN_NAMES))
+    train.sketches = sketch_values(
+        magnitude=train.magnitudes,
+        heart_rate=train.heart_rates[~np.isnan(train.heart_rates)],
+        temperature=train.temperatures[~np.isnan(train.temperatures)],
+    )
+    activity_thresholds = _train_activity_thresholds(train.sketches, train, objective)
+    anomaly_thresholds = _train_anomaly_thresholds(train.sketches)
+    results = _evaluate_activity(
+        columns["magnitudes"][test], columns["labels"][test], activity_thresholds
+    )
+    firing_rates = {}
+    for name, (column, at_least) in ANOMALY_CHECKS.items():
+        values = columns[column][test]
+        values = values[~np.isnan(values)]
+        threshold = anomaly_thresholds[name]
+        fired = values >= threshold if at_least else values <= threshold
+        firing_rates[name] = float(fired.mean()) if len(values) else float("nan")
+    return {
+        "subjects": len(held_out),
+        "rows": results["total"],
+        "accuracy": results["accuracy"],
+        "macro_f1": results["macro_f1"],
+        "firing_rates": firing_rates,
+    }
+
+
+def _cross_validate(
+    data: Columns,
+    groups: np.ndarray,
+    folds: list[np.ndarray],
+    objective: str,
+    jobs: int | None,
+) -> list[dict]:
+    with tempfile.TemporaryDirectory(prefix="altrus-cv-") as directory:
+        shared = {name: getattr(data, name) for name in COLUMN_NAMES}
+        share_columns(Path(directory), {**shared, "groups": groups})
+        return run_folds(_cv_fold, Path(directory), folds, jobs, objective)
+
+
+def _print_cv_report(folds: list[dict]) -> None:
+    subjects = sum(fold["subjects"] for fold in folds)
+    print(f"Cross-validation: {len(folds)} folds over {subjects} subjects")
+    for index, fold in enumerate(folds, start=1):
+        print(
+            f"  fold {index}: {fold['subjects']} subjects, {fold['rows']} rows, "
+            f"accuracy {fold['accuracy']:.3f}, macro F1 {fold['macro_f1']:.3f}"
+        )
+    print(f"  {'metric':<26} {'mean':>8} {'variance':>10}")
+    metrics = [("accuracy", [fold["accuracy"] for fold in folds])]
+    metrics.append(("macro F1", [fold["macro_f1"] for fold in folds]))
+    metrics.extend(
+        (f"{name} firing rate", [fold["firing_rates"][name] for fold in folds])
+        for name in ANOMALY_CHECKS
+    )
+    for label, values in metrics:
+        mean, variance = mean_and_variance(values)
+        print(f"  {label:<26} {mean:8.4f} {variance:10.6f}")
+
+
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Train demo activity/anomaly thresholds from real datasets.",
@@ -183,7 +208,6 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--dataset-root",
         type=Path,
-        required=True,
         help="Path to the dataset root containing PAMAP2/WISDM folders.",
     )
     parser.add_argument(
@@ -191,55 +215,128 @@ def _parse_args() -> argparse.Namespace:
         action="store_true",
         help="Print activity classification accuracy from the training data.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--activity-objective",
+        choices=("percentile", *OBJECTIVES),
+        help="How activity thresholds are chosen: the 25/50/75th magnitude percentiles, or "
+        "the cuts that maximize accuracy or macro F1 on the labeled data "
+        "(default: accuracy; percentile with --update).",
+    )
+    parser.add_argument(
+        "--cv",
+        type=int,
+        metavar="K",
+        help="Also run K-fold cross-validation with whole subjects held out (PAMAP2 "
+        "subject files, WISDM user ids) and report the spread across folds.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Processes used to parse the datasets (default: one per CPU).",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=CACHE_DIR,
+        help=f"Where parsed datasets are cached as .npy columns (default: {CACHE_DIR}).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse the datasets from scratch without reading or writing the cache.",
+    )
+    parser.add_argument(
+        "--recordings",
+        type=Path,
+        help="A generated project's data/ directory; fold its recorded readings into the "
+        "threshold sketches.",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Start from the saved sketches instead of parsing --dataset-root again.",
+    )
+    parser.add_argument(
+        "--sketches",
+        type=Path,
+        default=SKETCHES_PATH,
+        help=f"Where the threshold sketches are saved (default: {SKETCHES_PATH}).",
+    )
+    args = parser.parse_args()
+    if args.update:
+        if args.evaluate or args.cv:
+            parser.error("--evaluate and --cv need the parsed datasets; drop --update")
+        if args.activity_objective not in (None, "percentile"):
+            parser.error("--update has no labeled data; use --activity-objective percentile")
+        args.activity_objective = "percentile"
+    elif args.dataset_root is None:
+        parser.error("--dataset-root is required unless --update is given")
+    if args.cv is not None and args.cv < 2:
+        parser.error("--cv needs at least 2 folds")
+    elif args.activity_objective is None:
+        args.activity_objective = "accuracy"
+    return args
 
 
 def main() -> None:
     args = _parse_args()
-    dataset_root = args.dataset_root
-
-    pamap2_dir = dataset_root / "PAMAP2_Dataset" / "Protocol"
-    wisdm_path = dataset_root / "WISDM_ar_v1.1" / "WISDM_ar_v1.1_raw.txt"
-
-    labeled_magnitudes: list[tuple[float, str]] = []
-    heart_rates: list[float] = []
-    temperatures: list[float] = []
-
-    if pamap2_dir.exists():
-        pamap2_labeled, pamap2_hr, pamap2_temp = _load_pamap2(pamap2_dir)
-        labeled_magnitudes.extend(pamap2_labeled)
-        heart_rates.extend(pamap2_hr)
-        temperatures.extend(pamap2_temp)
-
-    if wisdm_path.exists():
-        labeled_magnitudes.extend(_load_wisdm(wisdm_path))
-
-    magnitudes = [value for value, _ in labeled_magnitudes]
+    data = None
+    if args.update:
+        sketches, sources = load_sketches(args.sketches)
+    else:
+        pamap2_dir = args.dataset_root / "PAMAP2_Dataset" / "Protocol"
+        wisdm_path = args.dataset_root / "WISDM_ar_v1.1" / "WISDM_ar_v1.1_raw.txt"
+        pamap2, wisdm = load_datasets(
+            pamap2_dir if pamap2_dir.exists() else None,
+            wisdm_path if wisdm_path.exists() else None,
+            args.jobs,
+            None if args.no_cache else args.cache,
+        )
+        data = Columns.concatenate([pamap2, wisdm])
+        if args.cv:
+            groups = subject_groups([pamap2.subjects, wisdm.subjects])
+            try:
+                folds = assign_folds(groups, args.cv)
+            except ValueError as error:
+                raise SystemExit(f"--cv {args.cv}: {error}.") from None
+        sketches = data.sketches
+        files = [*sorted(pamap2_dir.glob("*.dat")), wisdm_path]
+        sources = {str(path.resolve()): path.stat().st_size for path in files if path.exists()}
+
+    if args.recordings is not None:
+        recorded, sources_after = load_recordings(args.recordings, sources)
+        merge_sketches(sketches, recorded)
+        sources.update(sources_after)
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    args.sketches.parent.mkdir(parents=True, exist_ok=True)
+    save_sketches(args.sketches, sketches, sources)
 
-    activity_thresholds = _train_activity_thresholds(magnitudes)
-    anomaly_thresholds = _train_anomaly_thresholds(heart_rates, temperatures, magnitudes)
+    activity_thresholds = _train_activity_thresholds(sketches, data, args.activity_objective)
+    anomaly_thresholds = _train_anomaly_thresholds(sketches)
 
-    activity_payload = {"thresholds": activity_thresholds}
-    anomaly_payload = {"thresholds": anomaly_thresholds}
+    activity_params = {"thresholds": activity_thresholds}
+    anomaly_params = {"thresholds": anomaly_thresholds}
 
-    (OUTPUT_DIR / "activity_model.pkl").write_bytes(pickle.dumps(activity_payload))
-    (OUTPUT_DIR / "anomaly_model.pkl").write_bytes(pickle.dumps(anomaly_payload))
+    write_artifact(OUTPUT_DIR / "activity_model.altm", ACTIVITY_SCHEMA, activity_params)
+    write_artifact(OUTPUT_DIR / "anomaly_model.altm", ANOMALY_SCHEMA, anomaly_params)
 
     print("Training complete.")
-    print(f"Activity thresholds: {activity_thresholds}")
+    print(f"Activity thresholds ({args.activity_objective}): {activity_thresholds}")
     print(f"Anomaly thresholds: {anomaly_thresholds}")
     print(f"Models saved to: {OUTPUT_DIR}")
+    counts = ", ".join(f"{name}={sketch.count}" for name, sketch in sketches.items())
+    print(f"Sketches saved to: {args.sketches} ({counts})")
 
     if args.evaluate:
-        results = _evaluate_activity(labeled_magnitudes, activity_thresholds)
-        print(f"Activity accuracy: {results['accuracy']:.3f} ({results['correct']}/{results['total']})")
-        for label in ACTIVITY_ORDER:
-            stats = results["per_class"][label]
-            if stats["total"]:
-                rate = stats["correct"] / stats["total"]
-                print(f"  {label}: {rate:.3f} ({stats['correct']}/{stats['total']})")
+        _print_activity_report(
+            _evaluate_activity(data.magnitudes, data.labels, activity_thresholds)
+        )
+
+    if args.cv:
+        _print_cv_report(
+            _cross_validate(data, groups, folds, args.activity_objective, args.jobs)
+        )
 
 
 if __name__ == "__main__":